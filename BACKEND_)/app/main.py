@@ -5,19 +5,59 @@ This module demonstrates how to use direct text matching to answer queries about
 """
 import os
 import re
+import json
+import asyncio
+import bisect
+import functools
 from dotenv import load_dotenv
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Header
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 from app.modules.text_extractor import TextExtractor
 from app.modules.text_preprocessor import TextPreprocessor
+from app.modules.paragraph_store import ParagraphStore
+from app.modules.bm25_index import BM25Index
+from app.modules.section_parser import SectionParser
+from app.modules.section_index import SectionIndex
+from app.modules.answer_cache import AnswerCache
+from app.modules.completion_cache import CompletionCache, get_completion_cache
+from app.modules.single_flight import SingleFlight
+from app.modules.data_watcher import DataDirectoryWatcher
+from app.modules.corpus_snapshot import CorpusSnapshot, MappedDocuments, DEFAULT_SNAPSHOT_DIR
+from app.modules.rank_fusion import reciprocal_rank_fusion
+from app.modules.embedding_cache import EmbeddingCache, DEFAULT_CACHE_PATH as DEFAULT_EMBEDDING_CACHE_PATH
 import openai
 
+# Embedding-based features need sentence-transformers and faiss
+try:
+    from app.modules.vector_retriever import VectorRetriever, SENTENCE_TRANSFORMERS_AVAILABLE
+    from app.modules.semantic_cache import SemanticCache
+    VECTOR_SUPPORT = SENTENCE_TRANSFORMERS_AVAILABLE
+except ImportError:
+    VECTOR_SUPPORT = False
+if not VECTOR_SUPPORT:
+    print("sentence-transformers or faiss not installed - hybrid search and semantic query cache disabled")
+
 # Load environment variables
 load_dotenv()
 
 # Set up OpenAI API
 openai.api_key = os.getenv("OPENAI_API_KEY")
+async_openai_client = None  # Shared async client, created on first use
+
+# Response modes:
+#   direct - return the matched section text without calling the model
+#   single - one combined GPT-4 call
+#   full   - a GPT-4 answer followed by a GPT-4 synthesis of that answer
+RESPONSE_MODES = ("direct", "single", "full")
+DEFAULT_RESPONSE_MODE = os.getenv("RESPONSE_MODE", "single").lower()
+
+class FallbackResponse(str):
+    """A response built from the matched text because the model call failed; never cached."""
+
+class IncompleteResponse(str):
+    """Empty marker yielded when a streamed completion fails after part of it was sent; never cached."""
 
 # Create FastAPI app
 app = FastAPI()
@@ -33,12 +73,49 @@ app.add_middleware(
 
 # Global variables
 documents = {}  # Store text content of all files
-sections_map = {}  # Map of section numbers to content for each file
+sections_map = {}  # Map of canonical "file_id:SECTION_ID" keys to Section objects
+section_index = SectionIndex()  # Sorted section IDs per file for exact, prefix and closest lookups
+paragraph_store = ParagraphStore()  # Paragraphs of all files, split once at load time
+search_index = BM25Index()  # Inverted index over the paragraphs in paragraph_store
+corpus_version = 0  # Incremented every time the corpus is (re)loaded
+answer_cache = AnswerCache(
+    max_size=int(os.getenv("ANSWER_CACHE_SIZE", "1024")),
+    ttl_seconds=float(os.getenv("ANSWER_CACHE_TTL", "3600"))
+)
+vector_retriever = None  # Shared embedding model, created on first use
+paragraph_vectors = None  # VectorRetriever over the paragraphs in paragraph_store, for hybrid search
+embedding_cache = None  # Paragraph embeddings by content hash, created on first use
+semantic_cache = None  # Cache of answers to paraphrased queries, created at startup when enabled
+query_flights = SingleFlight()  # Identical concurrent queries share one answer computation
+BATCH_MAX_QUERIES = int(os.getenv("BATCH_MAX_QUERIES", "500"))  # Largest accepted /api/query/batch request
+BATCH_CONCURRENCY = int(os.getenv("BATCH_CONCURRENCY", "8"))  # Default number of batch queries answered at once
+BATCH_MAX_CONCURRENCY = int(os.getenv("BATCH_MAX_CONCURRENCY", "32"))  # Upper bound for a requested concurrency
+# Hybrid search fuses the BM25 ranking with an embedding ranking of the paragraphs
+HYBRID_SEARCH_ENABLED = os.getenv("HYBRID_SEARCH_ENABLED", "1").lower() in ("1", "true", "yes")
+HYBRID_KEYWORD_WEIGHT = float(os.getenv("HYBRID_KEYWORD_WEIGHT", "1.0"))
+HYBRID_VECTOR_WEIGHT = float(os.getenv("HYBRID_VECTOR_WEIGHT", "1.0"))
+HYBRID_RRF_K = int(os.getenv("HYBRID_RRF_K", "60"))
+HYBRID_CANDIDATES = int(os.getenv("HYBRID_CANDIDATES", "20"))  # Paragraphs taken from the vector ranking
+HYBRID_MIN_SIMILARITY = float(os.getenv("HYBRID_MIN_SIMILARITY", "0.3"))  # Cosine similarity below which paragraphs are ignored
+VECTOR_INDEX_TYPE = os.getenv("VECTOR_INDEX_TYPE", "flat").lower()  # flat, ivf_flat, hnsw, ivf_pq, sq8 or pq
+VECTOR_NPROBE = int(os.getenv("VECTOR_NPROBE", "8"))  # Clusters searched by IVF indexes
+VECTOR_EF_SEARCH = int(os.getenv("VECTOR_EF_SEARCH", "64"))  # Candidate list size of HNSW searches
+VECTOR_PQ_M = int(os.getenv("VECTOR_PQ_M", "0")) or None  # Bytes per vector of pq indexes; 0 uses dimension / 8
+# Memory-map the saved paragraph vector index so all workers share one copy
+VECTOR_INDEX_MMAP = os.getenv("VECTOR_INDEX_MMAP", "0").lower() in ("1", "true", "yes")
+EMBEDDING_CACHE_PATH = os.getenv("EMBEDDING_CACHE_PATH", DEFAULT_EMBEDDING_CACHE_PATH)  # Empty disables the cache
+EMBEDDING_CACHE_MAX_ENTRIES = int(os.getenv("EMBEDDING_CACHE_MAX_ENTRIES", "200000"))
+QUERY_EMBEDDING_CACHE_SIZE = int(os.getenv("QUERY_EMBEDDING_CACHE_SIZE", "1024"))  # Recent query embeddings kept in memory
+# Fused scores are at most the sum of the weights; scaling them to the range of BM25
+# scores keeps the file keyword boost and relevance ratios in find_relevant_text meaningful
+HYBRID_SCORE_SCALE = 10.0
+SEMANTIC_CACHE_ENABLED = os.getenv("SEMANTIC_CACHE_ENABLED", "0").lower() in ("1", "true", "yes")
 
 # Pydantic models for request/response
 class QueryRequest(BaseModel):
     query: str
     selected_file: str = None  # Optional parameter for when user selects a file
+    mode: str = None  # Optional response mode, one of RESPONSE_MODES
 
 class QueryResponse(BaseModel):
     exact_match: str
@@ -47,64 +124,158 @@ class QueryResponse(BaseModel):
     response: str = None
     file_options: list = None  # List of files that contain relevant information
 
+section_parser = SectionParser()
+
 # File paths
 DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data")
 print(f"Data directory path: {DATA_DIR}")  # Log the full path
 
+data_watcher = DataDirectoryWatcher(DATA_DIR)  # Detects data files changed since the last load
+reload_lock = asyncio.Lock()  # Only one reload runs at a time
+data_watch_task = None  # Background task polling the data directory, if enabled
+DATA_WATCH_INTERVAL = float(os.getenv("DATA_WATCH_INTERVAL", "0"))  # Seconds between checks; 0 disables polling
+CORPUS_SNAPSHOT_DIR = os.getenv("CORPUS_SNAPSHOT_DIR", DEFAULT_SNAPSHOT_DIR)  # Empty disables the snapshot
+corpus_snapshot = CorpusSnapshot(CORPUS_SNAPSHOT_DIR) if CORPUS_SNAPSHOT_DIR else None
+# Serve the corpus text from the memory-mapped snapshot so all workers share one copy
+CORPUS_MMAP = os.getenv("CORPUS_MMAP", "0").lower() in ("1", "true", "yes")
+corpus_snapshot_manifest = None  # Manifest of the snapshot holding the current corpus, if any
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN", "")  # Required in the X-Admin-Token header of admin endpoints when set
+
 def extract_sections(text, file_id):
     """
-    Extract sections from the text and create a mapping of section numbers to their content.
+    Extract sections from the text and create a mapping of section numbers to their sections.
     
     Args:
         text (str): Full text content
         file_id (str): Identifier for the source file
         
     Returns:
-        dict: Dictionary mapping section numbers to their content
+        dict: Dictionary mapping canonical "file_id:SECTION_ID" keys to Section objects
+    """
+    # Sections like "3A." or "9AB." followed by a title and content, found in one pass
+    return section_parser.parse(text, file_id)
+
+def get_section_text(section, documents):
     """
-    # Regular expression to find sections like "3A." or "9AB." followed by a title and content
-    section_pattern = r'(\d+[A-Z]*)\.[\s\t]+(.*?)(?=\n\d+[A-Z]*\.|\Z)'
+    Get the content of a section from the loaded documents.
     
-    # Find all sections in the text using a more careful approach
-    sections = {}
+    A mapped corpus decodes only the section instead of its whole document.
     
-    # First, try to identify all possible section IDs from the table of contents
-    toc_pattern = r'(\d+[A-Z]*)\.[\s\t]+(.*?)(?=\n|$)'
-    toc_sections = re.findall(toc_pattern, text)
-    section_ids = [section_id for section_id, _ in toc_sections]
+    Args:
+        section (Section): Section from sections_map
+        documents (dict): Dictionary of document texts
+        
+    Returns:
+        str: Section content including the heading
+    """
+    if isinstance(documents, MappedDocuments):
+        return documents.get_section_text(section)
+    return section.get_text(documents.get(section.file_id, ""))
+
+def add_file_to_corpus(extractor, file_name, file_documents, all_sections, all_section_ids, all_paragraphs):
+    """
+    Extract a data file and add its text, sections and paragraphs to the given corpus structures.
     
-    # For each section ID, try to find its content in the document
-    for section_id in section_ids:
-        # Look for patterns like "3A. Consolidated Allowance to Ministers."
-        full_section_pattern = rf'{section_id}\.[\s\t]+(.*?)(?=\n\d+[A-Z]*\.|\Z)'
-        matches = re.finditer(full_section_pattern, text, re.DOTALL)
+    Args:
+        extractor (TextExtractor): Extractor used to read the file
+        file_name (str): Name of the file in the data directory
+        file_documents (dict): Map of file IDs to text content to add the file to
+        all_sections (dict): Map of canonical section keys to Section objects to add the sections to
+        all_section_ids (SectionIndex): Section index to add the section IDs to
+        all_paragraphs (ParagraphStore): Paragraph store to add the paragraphs to
         
-        for match in matches:
-            section_content = match.group(0).strip()
-            # Store both the full section ID and a normalized version (e.g., both "3A" and "3a")
-            key = f"{file_id}:{section_id}"
-            sections[key] = section_content
-            sections[f"{file_id}:{section_id.lower()}"] = section_content
-            
-            # Also store without the period (e.g., "3A" instead of "3A.")
-            sections[f"{file_id}:{section_id.replace('.', '')}"] = section_content
-            sections[f"{file_id}:{section_id.lower().replace('.', '')}"] = section_content
-    
-    # Special search for common section patterns
-    for section_match in re.finditer(r'(?:^|\n)(\d+[A-Z]*)\.[\s\t]+(.*?)(?=\n\d+[A-Z]*\.|\Z)', text, re.DOTALL):
-        section_id = section_match.group(1)
-        section_content = section_match.group(0).strip()
-        
-        key = f"{file_id}:{section_id}"
-        if key not in sections:
-            sections[key] = section_content
-            sections[f"{file_id}:{section_id.lower()}"] = section_content
-            
-            # Also store without the period
-            sections[f"{file_id}:{section_id.replace('.', '')}"] = section_content
-            sections[f"{file_id}:{section_id.lower().replace('.', '')}"] = section_content
+    Returns:
+        list: The paragraphs added for the file, empty if it could not be loaded
+    """
+    try:
+        file_path = os.path.join(DATA_DIR, file_name)
+        file_id = os.path.splitext(file_name)[0]  # Remove extension to get ID
+        print(f"Processing file: {file_name} (ID: {file_id})")
+        print(f"Full file path: {file_path}")
+        
+        if not os.path.isfile(file_path):
+            print(f"Warning: {file_path} is not a file or does not exist")
+            return []
+        
+        text = extractor.extract_from_text_file(file_path)
+        
+        if not text or len(text.strip()) == 0:
+            print(f"No text could be extracted from {file_name}")
+            return []
+        if not isinstance(text, str):
+            print(f"Warning: Extracted content from {file_name} is not a string")
+            return []
+        
+        file_documents[file_id] = text
+        file_paragraphs = all_paragraphs.add_document(file_id, text)
+        
+        # Extract sections for this file
+        try:
+            file_sections = extract_sections(text, file_id)
+            all_sections.update(file_sections)
+            all_section_ids.add_file(file_id, [section.section_id.upper() for section in file_sections.values()])
+            print(f"Successfully loaded {len(text)} characters and {len(file_sections)} sections from {file_name}")
+        except Exception as e:
+            print(f"Error extracting sections from {file_name}: {str(e)}")
+        return file_paragraphs
+    except Exception as e:
+        print(f"Error processing file {file_name}: {str(e)}")
+        return []
+
+def load_corpus_snapshot():
+    """
+    Restore the corpus from the snapshot if it was built from the current data files.
+    
+    Source files are compared by modification time and size first and only hashed
+    when those differ, so a valid snapshot is accepted without reading the sources.
+    
+    Returns:
+        tuple: (documents, sections_map, section_index, paragraph_store, search_index), or None
+    """
+    global corpus_snapshot_manifest
+    
+    if corpus_snapshot is None:
+        return None
+    manifest = corpus_snapshot.load_manifest()
+    if manifest is None:
+        return None
+    
+    data_watcher.fingerprints = {file_name: tuple(fingerprint) for file_name, fingerprint in manifest["sources"].items()}
+    changes = data_watcher.scan()
+    if any(changes.values()):
+        print(f"Corpus snapshot is out of date: {changes}")
+        return None
+    restored = corpus_snapshot.load(manifest, mapped=CORPUS_MMAP)
+    if restored is not None:
+        data_watcher.commit()
+        corpus_snapshot_manifest = manifest
+    return restored
+
+def save_corpus_snapshot(file_documents):
+    """
+    Write the current corpus to the snapshot so the next start can skip extraction.
+    
+    With CORPUS_MMAP the corpus is then mapped back from the snapshot, so this
+    process shares the text with the other workers as well.
+    
+    Args:
+        file_documents (dict): Map of file IDs to text content of the current corpus
+        
+    Returns:
+        tuple: The mapped (documents, sections_map, section_index, paragraph_store, search_index), or None
+    """
+    global corpus_snapshot_manifest
     
-    return sections
+    corpus_snapshot_manifest = None
+    if corpus_snapshot is None:
+        return None
+    if not corpus_snapshot.save(data_watcher.fingerprints, file_documents, sections_map, section_index,
+                                paragraph_store, search_index):
+        return None
+    corpus_snapshot_manifest = corpus_snapshot.load_manifest()
+    if not CORPUS_MMAP or corpus_snapshot_manifest is None:
+        return None
+    return corpus_snapshot.load(corpus_snapshot_manifest, mapped=True)
 
 def load_data_files():
     """
@@ -113,7 +284,7 @@ def load_data_files():
     Returns:
         dict: Dictionary mapping file IDs to their text content
     """
-    global documents, sections_map
+    global documents, sections_map, section_index, paragraph_store, search_index, paragraph_vectors
     
     print(f"Attempting to load data files from: {DATA_DIR}")
     print(f"Current working directory: {os.getcwd()}")
@@ -131,10 +302,26 @@ def load_data_files():
     
     file_documents = {}
     all_sections = {}
+    all_section_ids = SectionIndex()
+    all_paragraphs = ParagraphStore()
+    
+    # Paragraph IDs change with a full load, so the vector index has to be rebuilt by refresh_paragraph_vectors
+    paragraph_vectors = None
     
     try:
         extractor = TextExtractor()
         
+        # Start from the snapshot when no source file changed since it was written
+        restored = load_corpus_snapshot()
+        if restored is not None:
+            file_documents, sections_map, section_index, paragraph_store, search_index = restored
+            invalidate_answers()
+            print(f"Total: Restored {len(sections_map)} section entries and {len(paragraph_store)} paragraphs of {len(file_documents)} files from the snapshot")
+            return file_documents
+        
+        # Fingerprint the directory so later reloads only pick up changes
+        data_watcher.scan()
+        
         # Get all .txt files in the data directory
         try:
             txt_files = [f for f in os.listdir(DATA_DIR) if f.endswith('.txt')]
@@ -149,40 +336,28 @@ def load_data_files():
         
         # Load each text file
         for file_name in txt_files:
-            try:
-                file_path = os.path.join(DATA_DIR, file_name)
-                file_id = os.path.splitext(file_name)[0]  # Remove extension to get ID
-                print(f"Processing file: {file_name} (ID: {file_id})")
-                print(f"Full file path: {file_path}")
-                
-                if not os.path.isfile(file_path):
-                    print(f"Warning: {file_path} is not a file or does not exist")
-                    continue
-                
-                text = extractor.extract_from_text_file(file_path)
-                
-                if text and len(text.strip()) > 0:
-                    if isinstance(text, str):
-                        file_documents[file_id] = text
-                        
-                        # Extract sections for this file
-                        try:
-                            file_sections = extract_sections(text, file_id)
-                            all_sections.update(file_sections)
-                            print(f"Successfully loaded {len(text)} characters and {len(file_sections)} sections from {file_name}")
-                        except Exception as e:
-                            print(f"Error extracting sections from {file_name}: {str(e)}")
-                    else:
-                        print(f"Warning: Extracted content from {file_name} is not a string")
-                else:
-                    print(f"No text could be extracted from {file_name}")
-            except Exception as e:
-                print(f"Error processing file {file_name}: {str(e)}")
-                continue
+            add_file_to_corpus(extractor, file_name, file_documents, all_sections, all_section_ids, all_paragraphs)
+        
+        # Files that could not be loaded are not remembered, so the next reload tries them again
+        data_watcher.commit(failed=[f for f in txt_files if os.path.splitext(f)[0] not in file_documents])
+        
+        # Build the keyword search index over all paragraphs
+        paragraph_index = BM25Index()
+        for paragraph in all_paragraphs.iter_paragraphs():
+            paragraph_index.add_document(paragraph.paragraph_id, paragraph.file_id, paragraph.text_lower)
         
         sections_map = all_sections
+        section_index = all_section_ids
+        paragraph_store = all_paragraphs
+        search_index = paragraph_index
+        
+        invalidate_answers()
         print(f"Total: Extracted {len(sections_map)} section entries from {len(file_documents)} files")
+        print(f"Total: Indexed {len(paragraph_store)} paragraphs with {len(search_index.postings)} distinct terms")
         
+        mapped = save_corpus_snapshot(file_documents)
+        if mapped is not None:
+            file_documents, sections_map, section_index, paragraph_store, search_index = mapped
         return file_documents
     except Exception as e:
         print(f"Error loading data files: {str(e)}")
@@ -191,7 +366,293 @@ def load_data_files():
         print(f"Stack trace: {traceback.format_exc()}")
         return {}
 
-def find_relevant_text(query, documents, selected_file=None):
+def invalidate_answers():
+    """
+    Start a new corpus version, dropping cached answers computed from the previous one.
+    """
+    global corpus_version
+    
+    corpus_version += 1
+    answer_cache.clear()
+    if semantic_cache is not None:
+        semantic_cache.clear()
+
+def build_updated_corpus(changes):
+    """
+    Build copies of the corpus structures with the changed data files re-indexed.
+    
+    Only added, changed and removed files are extracted or dropped; everything else is
+    reused. The live structures are not modified, so queries can keep using them
+    while this runs in a worker thread.
+    
+    Args:
+        changes (dict): File names under "added", "changed" and "removed", from DataDirectoryWatcher.scan()
+        
+    Returns:
+        tuple: (documents, sections_map, section_index, paragraph_store, search_index)
+    """
+    new_documents = dict(documents)
+    new_section_index = section_index.copy()
+    new_paragraph_store = paragraph_store.copy()
+    new_search_index = search_index.copy()
+    
+    stale_files = {os.path.splitext(file_name)[0] for file_name in changes["changed"] + changes["removed"]}
+    for file_id in stale_files:
+        new_documents.pop(file_id, None)
+        new_section_index.remove_file(file_id)
+        new_paragraph_store.remove_file(file_id)
+        new_search_index.remove_file(file_id)
+    new_sections_map = {key: section for key, section in sections_map.items() if section.file_id not in stale_files}
+    
+    extractor = TextExtractor()
+    for file_name in changes["added"] + changes["changed"]:
+        file_paragraphs = add_file_to_corpus(extractor, file_name, new_documents, new_sections_map,
+                                             new_section_index, new_paragraph_store)
+        for paragraph in file_paragraphs:
+            new_search_index.add_document(paragraph.paragraph_id, paragraph.file_id, paragraph.text_lower)
+    
+    return new_documents, new_sections_map, new_section_index, new_paragraph_store, new_search_index
+
+async def reload_data_files():
+    """
+    Re-index the data files that were added, changed or removed since the last load.
+    
+    The updated corpus is built off the event loop and swapped in at once, so
+    in-flight queries finish on the corpus they started with.
+    
+    Files that could not be extracted are listed under "failed" and retried by the
+    next reload.
+    
+    Returns:
+        dict: Changed file names under "added", "changed", "removed" and "failed", and the corpus version
+    """
+    global documents, sections_map, section_index, paragraph_store, search_index
+    
+    async with reload_lock:
+        changes = await run_blocking(data_watcher.scan)
+        failed = []
+        if any(changes.values()):
+            print(f"Reloading data files: {changes}")
+            updated = await run_blocking(build_updated_corpus, changes)
+            failed = [f for f in changes["added"] + changes["changed"] if os.path.splitext(f)[0] not in updated[0]]
+            data_watcher.commit(failed=failed)
+            documents, sections_map, section_index, paragraph_store, search_index = updated
+            invalidate_answers()
+            print(f"Reloaded corpus version {corpus_version}: {len(documents)} files, {len(paragraph_store)} paragraphs")
+            mapped = await run_blocking(save_corpus_snapshot, documents)
+            if mapped is not None:
+                documents, sections_map, section_index, paragraph_store, search_index = mapped
+            await refresh_paragraph_vectors()
+        else:
+            data_watcher.commit()
+        return dict(changes, failed=failed, corpus_version=corpus_version)
+
+async def watch_data_directory(interval):
+    """
+    Poll the data directory and reload changed files until cancelled.
+    
+    Args:
+        interval (float): Seconds between checks
+    """
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            await reload_data_files()
+        except Exception as e:
+            print(f"Error reloading data files: {str(e)}")
+
+def get_embedding_cache():
+    """
+    Get the shared paragraph embedding cache, opening its database on first use.
+    
+    Returns:
+        EmbeddingCache: The shared cache, or None if EMBEDDING_CACHE_PATH is empty
+    """
+    global embedding_cache
+    
+    if embedding_cache is None and EMBEDDING_CACHE_PATH:
+        embedding_cache = EmbeddingCache(EMBEDDING_CACHE_PATH, max_entries=EMBEDDING_CACHE_MAX_ENTRIES)
+    return embedding_cache
+
+def paragraph_chunk_metadata(paragraphs, sections):
+    """
+    Build the vector index metadata of paragraphs.
+    
+    Args:
+        paragraphs (list): Paragraphs to describe
+        sections (dict): Map of section keys to Section objects of the same corpus
+        
+    Returns:
+        list: Dictionary per paragraph with its file ID, paragraph ID, character span and
+            the ID of the section it starts in (None before the first section)
+    """
+    file_sections = {}
+    for section in sections.values():
+        file_sections.setdefault(section.file_id, []).append(section)
+    section_starts = {}
+    for file_id, file_section_list in file_sections.items():
+        file_section_list.sort(key=lambda section: section.start)
+        section_starts[file_id] = [section.start for section in file_section_list]
+    
+    metadata = []
+    for paragraph in paragraphs:
+        section_id = None
+        starts = section_starts.get(paragraph.file_id)
+        if starts:
+            position = bisect.bisect_right(starts, paragraph.start) - 1
+            if position >= 0 and paragraph.start < file_sections[paragraph.file_id][position].end:
+                section_id = file_sections[paragraph.file_id][position].section_id
+        metadata.append({"file_id": paragraph.file_id, "paragraph_id": paragraph.paragraph_id,
+                         "start": paragraph.start, "end": paragraph.end, "section_id": section_id})
+    return metadata
+
+def build_paragraph_vectors(retriever, store, sections, manifest=None, previous=None):
+    """
+    Build a vector index over the paragraphs of a store, or load the one saved with its snapshot.
+    
+    When a previous index over an earlier version of the store is given, it is
+    copied and updated with only the added and removed paragraphs instead.
+    
+    Args:
+        retriever (VectorRetriever): Retriever whose embedding model is shared
+        store (ParagraphStore): Paragraphs to index
+        sections (dict): Map of section keys to Section objects of the same corpus
+        manifest (dict, optional): Manifest of the corpus snapshot holding these paragraphs
+        previous (VectorRetriever, optional): Index over the paragraphs before the latest reload
+        
+    Returns:
+        VectorRetriever: Index whose chunk metadata holds the file and paragraph IDs, or None if there are no paragraphs
+    """
+    vectors = VectorRetriever(model=retriever.model, index_type=VECTOR_INDEX_TYPE,
+                              nprobe=VECTOR_NPROBE, ef_search=VECTOR_EF_SEARCH, pq_m=VECTOR_PQ_M,
+                              embedding_cache=get_embedding_cache(), query_cache=retriever.query_cache)
+    directory = corpus_snapshot.vector_directory(manifest) if corpus_snapshot is not None and manifest is not None else None
+    if directory and os.path.isdir(directory) and vectors.load_index(directory, mmap=VECTOR_INDEX_MMAP):
+        if vectors.index_type == VECTOR_INDEX_TYPE:
+            return vectors
+        print(f"Saved vector index is {vectors.index_type}, rebuilding as {VECTOR_INDEX_TYPE}")
+        vectors.index_type = VECTOR_INDEX_TYPE
+    
+    paragraphs = list(store.iter_paragraphs())
+    if not paragraphs:
+        return None
+    if previous is not None and previous.index_type == VECTOR_INDEX_TYPE:
+        vectors = update_paragraph_vectors(previous, store, sections)
+    else:
+        vectors.add_chunks([paragraph.text for paragraph in paragraphs], paragraph_chunk_metadata(paragraphs, sections))
+    if directory:
+        vectors.save_index(directory)
+    return vectors
+
+def update_paragraph_vectors(previous, store, sections):
+    """
+    Copy a paragraph vector index and bring it up to date with a store.
+    
+    Paragraph IDs are never reused within a store and the copies made by reloads,
+    so vectors of paragraphs that are gone are removed and only paragraphs without
+    vectors are embedded.
+    
+    Args:
+        previous (VectorRetriever): Index over an earlier version of the store
+        store (ParagraphStore): Current paragraphs
+        sections (dict): Map of section keys to Section objects of the current corpus
+        
+    Returns:
+        VectorRetriever: The updated copy; previous is not modified
+    """
+    vectors = previous.copy()
+    live_paragraphs = {paragraph.paragraph_id: paragraph for paragraph in store.iter_paragraphs()}
+    indexed = set()
+    stale_chunks = []
+    for chunk_id, metadata in enumerate(vectors.metadata):
+        if metadata is None:
+            continue
+        paragraph = live_paragraphs.get(metadata.get("paragraph_id"))
+        if paragraph is None or paragraph.file_id != metadata.get("file_id"):
+            stale_chunks.append(chunk_id)
+        else:
+            indexed.add(paragraph.paragraph_id)
+    
+    removed = vectors.remove_chunks(stale_chunks)
+    new_paragraphs = [paragraph for paragraph_id, paragraph in live_paragraphs.items() if paragraph_id not in indexed]
+    added = vectors.insert_chunks([paragraph.text for paragraph in new_paragraphs],
+                                  paragraph_chunk_metadata(new_paragraphs, sections))
+    print(f"Updated paragraph vectors: removed {removed} chunks, added {len(added)} chunks for {len(new_paragraphs)} paragraphs")
+    return vectors
+
+async def refresh_paragraph_vectors():
+    """
+    Build the vector index for hybrid search over the current paragraphs, off the event loop.
+    
+    After a reload the current index is updated with the changed paragraphs. Queries
+    use keyword search alone until the first index is ready.
+    """
+    global paragraph_vectors
+    
+    if not HYBRID_SEARCH_ENABLED or not VECTOR_SUPPORT:
+        return
+    retriever = await run_blocking(get_vector_retriever)
+    if retriever is None or not retriever.is_available():
+        return
+    
+    store = paragraph_store
+    vectors = await run_blocking(build_paragraph_vectors, retriever, store, sections_map, corpus_snapshot_manifest,
+                                 paragraph_vectors)
+    # Skip the result if the corpus was replaced while the index was being built
+    if paragraph_store is store:
+        paragraph_vectors = vectors
+        print(f"Hybrid search ready with {vectors.index.ntotal if vectors is not None else 0} paragraph vectors")
+
+def rank_paragraphs_by_vector(query, file_ids, query_embedding=None):
+    """
+    Rank paragraphs by embedding similarity to a query.
+    
+    Args:
+        query (str): User query
+        file_ids (iterable): Only rank paragraphs of these files
+        query_embedding (numpy.ndarray, optional): Precomputed embedding of the query
+        
+    Returns:
+        list: Paragraph IDs, most similar first; empty if the vector index is not available
+    """
+    vectors = paragraph_vectors
+    if vectors is None:
+        return []
+    
+    ranking = []
+    seen = set()
+    for similarity, chunk_index in vectors.search(query, HYBRID_CANDIDATES, file_ids, query_embedding):
+        if similarity < HYBRID_MIN_SIMILARITY:
+            break
+        metadata = vectors.metadata[chunk_index]
+        paragraph_id = metadata.get("paragraph_id")
+        if paragraph_id is None or paragraph_id in seen or paragraph_id >= len(paragraph_store.paragraphs):
+            continue
+        # Skip vectors of paragraphs removed by a reload the index has not caught up with yet
+        paragraph = paragraph_store.paragraphs[paragraph_id]
+        if paragraph is None or paragraph.file_id != metadata.get("file_id"):
+            continue
+        seen.add(paragraph_id)
+        ranking.append(paragraph_id)
+    return ranking
+
+def fuse_paragraph_scores(keyword_scores, vector_ranking):
+    """
+    Combine BM25 paragraph scores with an embedding ranking using reciprocal rank fusion.
+    
+    Args:
+        keyword_scores (dict): Map of paragraph IDs to BM25 scores
+        vector_ranking (list): Paragraph IDs from rank_paragraphs_by_vector, most similar first
+        
+    Returns:
+        dict: Map of paragraph IDs to fused scores on the scale of BM25 scores
+    """
+    keyword_ranking = sorted(keyword_scores, key=lambda paragraph_id: (-keyword_scores[paragraph_id], paragraph_id))
+    fused_scores = reciprocal_rank_fusion([keyword_ranking, vector_ranking],
+                                          [HYBRID_KEYWORD_WEIGHT, HYBRID_VECTOR_WEIGHT], HYBRID_RRF_K)
+    return {paragraph_id: score * HYBRID_SCORE_SCALE for paragraph_id, score in fused_scores.items()}
+
+def find_relevant_text(query, documents, selected_file=None, query_embedding=None):
     """
     Find relevant portions of text based on the query across all documents or a specific file.
     
@@ -199,13 +660,15 @@ def find_relevant_text(query, documents, selected_file=None):
         query (str): User query
         documents (dict): Dictionary of document texts
         selected_file (str, optional): If provided, search only in this file
+        query_embedding (numpy.ndarray, optional): Embedding of the query for hybrid search,
+            when it was encoded together with other queries
         
     Returns:
         tuple: (relevant_text, file_options)
             - relevant_text: The most relevant text snippet
             - file_options: List of files containing relevant information
     """
-    global sections_map
+    global sections_map, section_index, paragraph_store, search_index
     
     if not documents:
         return "The document information is not available.", []
@@ -220,43 +683,46 @@ def find_relevant_text(query, documents, selected_file=None):
     is_section_query, section_ids = preprocessor.extract_section_queries(query)
     
     if is_section_query and section_ids:
-        # Handle section queries as before...
-        # [existing section query code]
+        # All variations of the requested ID share one canonical form (e.g., "3a." -> "3A")
+        base_section_id = section_parser.normalize_section_id(section_ids[0])
+        
         if selected_file:
-            # Try each of the normalized section IDs in the selected file
-            for section_id in section_ids:
-                key = f"{selected_file}:{section_id}"
-                if key in sections_map:
-                    return f"Here's the information about section {section_id} from {selected_file}:\n\n{sections_map[key]}", [selected_file]
+            # Look up the canonical section ID in the selected file
+            key = section_parser.make_key(selected_file, base_section_id)
+            if key in sections_map:
+                return f"Here's the information about section {base_section_id} from {selected_file}:\n\n{get_section_text(sections_map[key], documents)}", [selected_file]
             
-            # If section wasn't found with normalized IDs, try a more flexible search
-            base_section_id = section_ids[0]  # Use first one as the base
-            matching_keys = []
-            for key in sections_map.keys():
-                file_id, sec_id = key.split(":", 1)
-                if file_id == selected_file and base_section_id.lower() in sec_id.lower():
-                    return f"Here's the information that might be related to section {base_section_id} from {selected_file}:\n\n{sections_map[key]}", [selected_file]
+            # If section wasn't found with the canonical ID, try a sub-section (e.g., "3A" for "3")
+            # or the nearest section with the same number (e.g., "3B" for "3C")
+            related_ids = section_index.find_prefix(selected_file, base_section_id)
+            related_id = related_ids[0] if related_ids else section_index.find_closest(selected_file, base_section_id)
+            if related_id:
+                key = section_parser.make_key(selected_file, related_id)
+                return f"Here's the information that might be related to section {base_section_id} from {selected_file}:\n\n{get_section_text(sections_map[key], documents)}", [selected_file]
             
             return f"I couldn't find any specific information about section {base_section_id} in {selected_file}. Please try a different query.", []
         
         # If no file is selected, search across all files
         matching_files = {}
-        for section_id in section_ids:
-            for key in sections_map.keys():
-                if section_id in key:
-                    file_id = key.split(":", 1)[0]
-                    if file_id not in matching_files:
-                        matching_files[file_id] = sections_map[key]
+        for file_id in section_index.files_with_section(base_section_id):
+            matching_files[file_id] = get_section_text(sections_map[section_parser.make_key(file_id, base_section_id)], documents)
+        
+        # Fall back to sub-sections when no file has the exact section
+        if not matching_files:
+            for file_id in section_index.file_keys:
+                related_ids = section_index.find_prefix(file_id, base_section_id)
+                if related_ids:
+                    matching_files[file_id] = get_section_text(sections_map[section_parser.make_key(file_id, related_ids[0])], documents)
         
         if matching_files:
             if len(matching_files) == 1:
                 file_id = list(matching_files.keys())[0]
-                return f"Here's the information about section {section_ids[0]} from {file_id}:\n\n{matching_files[file_id]}", [file_id]
+                return f"Here's the information about section {base_section_id} from {file_id}:\n\n{matching_files[file_id]}", [file_id]
             else:
                 file_ids = list(matching_files.keys())
-                return f"I found information about section {section_ids[0]} in multiple files. Please select which file you want to get information from.", file_ids
+                return f"I found information about section {base_section_id} in multiple files. Please select which file you want to get information from.", file_ids
         
-        return f"I couldn't find any specific information about section {section_ids[0]}. Please try a different query.", []
+        return f"I couldn't find any specific information about section {base_section_id}. Please try a different query.", []
     
     # Check if query is looking for a specific section title
     # This handles queries like "Give me all points in SECTION NAME"
@@ -323,7 +789,7 @@ def find_relevant_text(query, documents, selected_file=None):
     
     if selected_file:
         # Only search in the selected file
-        search_docs = {selected_file: documents[selected_file]} if selected_file in documents else {}
+        search_docs = {selected_file} if selected_file in documents else set()
     else:
         # Search across all files
         search_docs = documents
@@ -334,59 +800,41 @@ def find_relevant_text(query, documents, selected_file=None):
         title_lower = potential_section_title.lower()
         title_capitalized = potential_section_title.title()
         
-        for file_id, text in search_docs.items():
+        for file_id in search_docs:
             # Check for exact matches or close variants of the section title
             for variant in [potential_section_title, title_upper, title_lower, title_capitalized]:
-                if variant in text:
-                    # Find the paragraph containing the section title
-                    paragraphs = re.split(r'\n\s*\n', text)
-                    for paragraph in paragraphs:
-                        if variant in paragraph:
-                            # Found exact match for the section title
-                            print(f"Found exact section title match in {file_id}: '{variant}'")
-                            # Include a few paragraphs after the title for context
-                            start_idx = text.find(paragraph)
-                            content_after = text[start_idx:start_idx+5000]  # Get a good chunk of text after
-                            paragraphs_after = re.split(r'\n\s*\n', content_after)[:5]  # Take first 5 paragraphs
-                            exact_title_matches[file_id] = (10, "\n\n".join(paragraphs_after))
-                            break
+                # Find the paragraph containing the section title
+                for paragraph in paragraph_store.get_file_paragraphs(file_id):
+                    if paragraph.contains(variant):
+                        # Found exact match for the section title
+                        print(f"Found exact section title match in {file_id}: '{variant}'")
+                        # Include a few paragraphs after the title for context
+                        content_after = paragraph_store.get_context_after(paragraph, max_paragraphs=5, max_chars=5000)
+                        exact_title_matches[file_id] = (10, content_after)
+                        break
     
     # If exact title matches were found, prefer these over regular keyword matches
     if exact_title_matches:
         file_matches = exact_title_matches
     else:
-        # Regular keyword-based search
-        for file_id, text in search_docs.items():
-            # Get paragraphs from the text
-            paragraphs = re.split(r'\n\s*\n', text)
-            
-            # Score paragraphs based on keyword matches
-            scored_paragraphs = []
-            for paragraph in paragraphs:
-                paragraph_lower = paragraph.lower()
-                
-                # Basic score based on keyword frequency
-                keyword_score = sum(1 for keyword in keywords if keyword in paragraph_lower)
-                
-                # Bonus for exact title match if potential_section_title was found
-                title_bonus = 0
-                if potential_section_title and potential_section_title in paragraph_lower:
-                    title_bonus = 5
-                elif potential_section_title and potential_section_title.upper() in paragraph:
-                    title_bonus = 5
-                
-                # Total score
-                total_score = keyword_score + title_bonus
-                
-                if total_score > 0:
-                    scored_paragraphs.append((total_score, paragraph))
-            
-            # Sort paragraphs by score
-            scored_paragraphs.sort(reverse=True)
-            
-            # Store the top matching paragraph for this file if any matches found
-            if scored_paragraphs:
-                file_matches[file_id] = scored_paragraphs[0]
+        # Regular keyword-based search using BM25 over the inverted index
+        query_tokens = [token for keyword in keywords for token in search_index.tokenize(keyword)]
+        paragraph_scores = search_index.score(query_tokens, file_ids=search_docs)
+        
+        # Bonus for exact title match if potential_section_title was found
+        if potential_section_title:
+            for paragraph_id in paragraph_scores:
+                if paragraph_store.paragraphs[paragraph_id].contains(potential_section_title, ignore_case=True):
+                    paragraph_scores[paragraph_id] += 5
+        
+        # Fuse with the embedding ranking of the same files so paraphrased questions also match
+        vector_ranking = rank_paragraphs_by_vector(query, search_docs, query_embedding)
+        if vector_ranking:
+            paragraph_scores = fuse_paragraph_scores(paragraph_scores, vector_ranking)
+        
+        # Store the top matching paragraph for each file that has any matches
+        for file_id, (score, paragraph_id) in search_index.best_per_file(paragraph_scores).items():
+            file_matches[file_id] = (score, paragraph_store.paragraphs[paragraph_id].text)
     
     # If no matches found in any file
     if not file_matches:
@@ -397,20 +845,11 @@ def find_relevant_text(query, documents, selected_file=None):
             
             if title_words:
                 print(f"Trying flexible search with title words: {title_words}")
-                for file_id, text in search_docs.items():
-                    paragraphs = re.split(r'\n\s*\n', text)
-                    scored_paragraphs = []
-                    
-                    for paragraph in paragraphs:
-                        paragraph_lower = paragraph.lower()
-                        score = sum(2 for word in title_words if word.lower() in paragraph_lower)
-                        
-                        if score > 0:
-                            scored_paragraphs.append((score, paragraph))
-                    
-                    scored_paragraphs.sort(reverse=True)
-                    if scored_paragraphs:
-                        file_matches[file_id] = scored_paragraphs[0]
+                title_tokens = [token for word in title_words for token in search_index.tokenize(word)]
+                paragraph_scores = search_index.score(title_tokens * 2, file_ids=search_docs)
+                
+                for file_id, (score, paragraph_id) in search_index.best_per_file(paragraph_scores).items():
+                    file_matches[file_id] = (score, paragraph_store.paragraphs[paragraph_id].text)
             
             if not file_matches:
                 return f"I couldn't find specific information about '{potential_section_title}'. Please try a different query or check the exact wording.", []
@@ -457,9 +896,49 @@ def find_relevant_text(query, documents, selected_file=None):
     # If no good matches found
     return "I couldn't find specific information related to your query. Please try a different question.", []
 
-def get_ai_response(query, context, file_id=None):
+def get_async_openai_client():
     """
-    Generate an AI response based on the query and context.
+    Get the shared async OpenAI client, creating it on first use.
+    
+    Returns:
+        openai.AsyncOpenAI: Client whose connection pool is shared by all requests
+    """
+    global async_openai_client
+    
+    if async_openai_client is None:
+        async_openai_client = openai.AsyncOpenAI(api_key=openai.api_key)
+    return async_openai_client
+
+def get_vector_retriever():
+    """
+    Get the shared vector retriever, loading the embedding model on first use.
+    
+    Returns:
+        VectorRetriever: The shared retriever, or None if sentence-transformers or faiss is not installed
+    """
+    global vector_retriever
+    
+    if vector_retriever is None and VECTOR_SUPPORT:
+        vector_retriever = VectorRetriever(query_cache_size=QUERY_EMBEDDING_CACHE_SIZE)
+    return vector_retriever
+
+async def warmup_vector_model():
+    """
+    Load the embedding model and run a first encoding off the event loop, so the first
+    query does not wait for it. Does nothing if no embedding-based feature is enabled.
+    """
+    if not VECTOR_SUPPORT or not (HYBRID_SEARCH_ENABLED or SEMANTIC_CACHE_ENABLED):
+        return
+    retriever = await run_blocking(get_vector_retriever)
+    seconds = await run_blocking(retriever.warmup)
+    if seconds is None:
+        print("Embedding model not available - hybrid search and semantic query cache disabled")
+    else:
+        print(f"Embedding model warmed up in {seconds:.2f} seconds")
+
+def build_ai_messages(query, context, file_id=None):
+    """
+    Build the chat messages asking the model to answer a query from the matched context.
     
     Args:
         query (str): User query
@@ -467,12 +946,11 @@ def get_ai_response(query, context, file_id=None):
         file_id (str, optional): The ID of the file the context is from
         
     Returns:
-        str: AI-generated response
+        list: Chat messages for the completion request
     """
-    try:
-        file_context = f" from {file_id}" if file_id else ""
-        
-        prompt = f"""
+    file_context = f" from {file_id}" if file_id else ""
+    
+    prompt = f"""
         QUERY: {query}
         
         CONTEXT{file_context}: {context}
@@ -491,25 +969,15 @@ def get_ai_response(query, context, file_id=None):
         Remember: Focus ONLY on answering what was directly asked. If asked about a specific section, rule, or topic, limit your answer to that specific item.
         Always cite the source document{file_context} in your response.
         """
-        
-        response = openai.chat.completions.create(
-            model="gpt-4",
-            messages=[
-                {"role": "system", "content": "You are an expert assistant that provides precise, focused information about Gujarat Civil Services rules and regulations, addressing only what was specifically asked."},
-                {"role": "user", "content": prompt}
-            ],
-            max_tokens=1000,
-            temperature=0.3
-        )
-        
-        return response.choices[0].message.content.strip()
-    except Exception as e:
-        print(f"Error generating AI response: {str(e)}")
-        return f"I found this information{file_context}: {context}"
+    
+    return [
+        {"role": "system", "content": "You are an expert assistant that provides precise, focused information about Gujarat Civil Services rules and regulations, addressing only what was specifically asked."},
+        {"role": "user", "content": prompt}
+    ]
 
-def get_enhanced_response(query, direct_match, ai_response, file_id=None):
+def build_enhanced_messages(query, direct_match, ai_response, file_id=None):
     """
-    Generate an enhanced response by synthesizing the direct match and AI response.
+    Build the chat messages asking the model to synthesize the direct match and AI response.
     
     Args:
         query (str): User query
@@ -518,12 +986,11 @@ def get_enhanced_response(query, direct_match, ai_response, file_id=None):
         file_id (str, optional): The ID of the file the responses are from
         
     Returns:
-        str: Enhanced synthesized response
+        list: Chat messages for the completion request
     """
-    try:
-        file_context = f" from {file_id}" if file_id else ""
-        
-        prompt = f"""
+    file_context = f" from {file_id}" if file_id else ""
+    
+    prompt = f"""
         QUERY: {query}
         
         DIRECT MATCH{file_context}: {direct_match}
@@ -545,38 +1012,350 @@ def get_enhanced_response(query, direct_match, ai_response, file_id=None):
         The user has specifically requested that responses contain ONLY the information they asked for, without surrounding topics or general context.
         Always indicate the source document{file_context} in your response.
         """
+    
+    return [
+        {"role": "system", "content": "You are an expert assistant that provides precise, focused responses about Gujarat Civil Services rules and regulations. You address ONLY what was specifically asked without including surrounding topics or general context."},
+        {"role": "user", "content": prompt}
+    ]
+
+def build_single_messages(query, context, file_id=None):
+    """
+    Build the chat messages for answering a query and formatting the answer in one call.
+    
+    Args:
+        query (str): User query
+        context (str): Context from the direct text search
+        file_id (str, optional): The ID of the file the context is from
         
-        response = openai.chat.completions.create(
-            model="gpt-4",  # Using GPT-4 for better synthesis
-            messages=[
-                {"role": "system", "content": "You are an expert assistant that provides precise, focused responses about Gujarat Civil Services rules and regulations. You address ONLY what was specifically asked without including surrounding topics or general context."},
-                {"role": "user", "content": prompt}
-            ],
-            max_tokens=1000,
-            temperature=0.2
-        )
+    Returns:
+        list: Chat messages for the completion request
+    """
+    file_context = f" from {file_id}" if file_id else ""
+    
+    prompt = f"""
+        QUERY: {query}
+        
+        CONTEXT{file_context}: {context}
+        
+        Using only the context above, provide a precise answer that addresses ONLY what was specifically asked in the query.
+        Follow these requirements:
+        
+        1. Focus EXCLUSIVELY on the specific request or question posed - do not include tangential information
+        2. Structure your response with headings (## and ###) that directly address the query
+        3. Use bullet points or numbered lists to make specific information clear
+        4. Bold (**text**) key points, rules, or section numbers
+        5. If the query asks for specific points or requirements, list ONLY those points
+        6. Omit any surrounding context or related topics not specifically requested
+        7. Do not provide general introductions or background unless explicitly asked
+        8. If the exact information requested isn't available in the context, clearly state this
+        
+        Always cite the source document{file_context} in your response.
+        """
+    
+    return [
+        {"role": "system", "content": "You are an expert assistant that provides precise, focused responses about Gujarat Civil Services rules and regulations. You address ONLY what was specifically asked without including surrounding topics or general context."},
+        {"role": "user", "content": prompt}
+    ]
+
+def resolve_response_mode(mode=None):
+    """
+    Validate a requested response mode, falling back to the deployment default.
+    
+    Args:
+        mode (str, optional): Requested mode, one of RESPONSE_MODES
         
-        # Extract the synthesized answer from the response
-        synthesized_answer = response.choices[0].message.content.strip()
-        return synthesized_answer
+    Returns:
+        str: The response mode to use
+    """
+    if mode and str(mode).lower() in RESPONSE_MODES:
+        return str(mode).lower()
+    if mode:
+        print(f"Unknown response mode '{mode}', using '{DEFAULT_RESPONSE_MODE}'")
+    return DEFAULT_RESPONSE_MODE if DEFAULT_RESPONSE_MODE in RESPONSE_MODES else "single"
+
+async def run_blocking(func, *args):
+    """
+    Run a blocking function in the default thread pool without blocking the event loop.
+    
+    Args:
+        func (callable): Function to run
+        *args: Positional arguments for the function
+        
+    Returns:
+        The function's return value
+    """
+    return await asyncio.get_running_loop().run_in_executor(None, functools.partial(func, *args))
+
+async def cached_chat_completion(messages, max_tokens, temperature, model="gpt-4"):
+    """
+    Get a chat completion, reusing a stored completion for identical requests.
+    
+    Completions are kept in the persistent completion cache, keyed by model, messages,
+    temperature and max_tokens, so they survive restarts and are shared by all workers.
+    
+    Args:
+        messages (list): Chat messages for the completion request
+        max_tokens (int): Maximum number of tokens to generate
+        temperature (float): Sampling temperature
+        model (str): OpenAI model to use
+        
+    Returns:
+        str: The completion content
+    """
+    completion_cache = get_completion_cache()
+    cache_key = CompletionCache.make_key(model, messages, temperature, max_tokens)
+    
+    if completion_cache is not None:
+        cached_content = await run_blocking(completion_cache.get, cache_key)
+        if cached_content is not None:
+            return cached_content
+    
+    response = await get_async_openai_client().chat.completions.create(
+        model=model,
+        messages=messages,
+        max_tokens=max_tokens,
+        temperature=temperature
+    )
+    content = response.choices[0].message.content.strip()
+    
+    if completion_cache is not None:
+        await run_blocking(completion_cache.set, cache_key, content, model)
+    return content
+
+async def get_ai_response(query, context, file_id=None):
+    """
+    Generate an AI response based on the query and context.
+    
+    Args:
+        query (str): User query
+        context (str): Context from the direct text search
+        file_id (str, optional): The ID of the file the context is from
+        
+    Returns:
+        str: AI-generated response
+    """
+    file_context = f" from {file_id}" if file_id else ""
+    
+    try:
+        return await cached_chat_completion(build_ai_messages(query, context, file_id), max_tokens=1000, temperature=0.3)
+    except Exception as e:
+        print(f"Error generating AI response: {str(e)}")
+        return FallbackResponse(f"I found this information{file_context}: {context}")
+
+async def get_enhanced_response(query, direct_match, ai_response, file_id=None):
+    """
+    Generate an enhanced response by synthesizing the direct match and AI response.
+    
+    Args:
+        query (str): User query
+        direct_match (str): Direct text match from the search
+        ai_response (str): AI-generated response
+        file_id (str, optional): The ID of the file the responses are from
+        
+    Returns:
+        str: Enhanced synthesized response
+    """
+    try:
+        # Using GPT-4 for better synthesis
+        return await cached_chat_completion(build_enhanced_messages(query, direct_match, ai_response, file_id), max_tokens=1000, temperature=0.2)
     
     except Exception as e:
         print(f"Error synthesizing responses: {str(e)}")
         # Fall back to the AI response if synthesis fails
-        return ai_response
+        return FallbackResponse(ai_response)
+
+async def get_single_response(query, context, file_id=None):
+    """
+    Generate a formatted answer from the query and context with a single model call.
+    
+    Args:
+        query (str): User query
+        context (str): Context from the direct text search
+        file_id (str, optional): The ID of the file the context is from
+        
+    Returns:
+        str: AI-generated response
+    """
+    file_context = f" from {file_id}" if file_id else ""
+    
+    try:
+        return await cached_chat_completion(build_single_messages(query, context, file_id), max_tokens=1000, temperature=0.2)
+    except Exception as e:
+        print(f"Error generating single-call response: {str(e)}")
+        return FallbackResponse(f"I found this information{file_context}: {context}")
+
+async def generate_responses(query, exact_match, file_id=None, mode="single"):
+    """
+    Generate the AI and enhanced responses for a matched context in the given mode.
+    
+    Args:
+        query (str): User query
+        exact_match (str): Direct text match from the search
+        file_id (str, optional): The ID of the file the match is from
+        mode (str): Response mode, one of RESPONSE_MODES
+        
+    Returns:
+        tuple: (ai_response, enhanced_response)
+    """
+    if mode == "direct":
+        return exact_match, exact_match
+    
+    if mode == "single":
+        response = await get_single_response(query, exact_match, file_id)
+        return response, response
+    
+    # Get AI-generated response
+    ai_response = await get_ai_response(query, exact_match, file_id)
+    print(f"Generated AI response of length {len(ai_response)}")
+    
+    # Generate enhanced response using RAG synthesis
+    enhanced_response = await get_enhanced_response(query, exact_match, ai_response, file_id)
+    print(f"Generated enhanced response of length {len(enhanced_response)}")
+    return ai_response, enhanced_response
+
+async def stream_chat_completion(messages, max_tokens, temperature, fallback):
+    """
+    Stream the content of a GPT-4 completion as it is generated.
+    
+    A completion found in the persistent completion cache is yielded in one piece, and
+    a fully streamed completion is stored there. If the completion fails after some
+    content was yielded, an empty IncompleteResponse is yielded last.
+    
+    Args:
+        messages (list): Chat messages for the completion request
+        max_tokens (int): Maximum number of tokens to generate
+        temperature (float): Sampling temperature
+        fallback (str): Text to yield if the completion fails before producing any content
+        
+    Yields:
+        str: Pieces of the generated text
+    """
+    produced_content = False
+    try:
+        completion_cache = get_completion_cache()
+        cache_key = CompletionCache.make_key("gpt-4", messages, temperature, max_tokens)
+        if completion_cache is not None:
+            cached_content = await run_blocking(completion_cache.get, cache_key)
+            if cached_content is not None:
+                yield cached_content
+                return
+        
+        stream = await get_async_openai_client().chat.completions.create(
+            model="gpt-4",
+            messages=messages,
+            max_tokens=max_tokens,
+            temperature=temperature,
+            stream=True
+        )
+        
+        parts = []
+        async for chunk in stream:
+            if chunk.choices and chunk.choices[0].delta.content:
+                produced_content = True
+                parts.append(chunk.choices[0].delta.content)
+                yield chunk.choices[0].delta.content
+        
+        if completion_cache is not None and parts:
+            await run_blocking(completion_cache.set, cache_key, "".join(parts).strip(), "gpt-4")
+    except Exception as e:
+        print(f"Error streaming completion: {str(e)}")
+        if not produced_content:
+            yield FallbackResponse(fallback)
+        else:
+            yield IncompleteResponse()
+
+def format_file_options(file_options):
+    """
+    Attach display names to a list of file IDs for the frontend.
+    
+    Args:
+        file_options (list): File IDs
+        
+    Returns:
+        list: List of {"id", "name"} dictionaries
+    """
+    # Use a nicer display name for each file
+    return [{"id": file_id, "name": file_id.replace('_', ' ')} for file_id in file_options]
+
+def semantic_cache_scope(query, selected_file, mode):
+    """
+    Get the scope a query's answer is shared within by the semantic query cache.
+    
+    Queries about different sections embed almost identically ("what is 3A" and
+    "what is 3B"), so the section a query asks about is part of its scope.
+    
+    Args:
+        query (str): User query
+        selected_file (str, optional): File the query is restricted to
+        mode (str): Response mode, one of RESPONSE_MODES
+        
+    Returns:
+        tuple: (selected_file, mode, corpus_version, section ID or None)
+    """
+    is_section_query, section_ids = TextPreprocessor().extract_section_queries(query)
+    section_id = section_parser.normalize_section_id(section_ids[0]) if is_section_query and section_ids else None
+    return (selected_file, mode, corpus_version, section_id)
+
+async def get_cached_answer(query, selected_file, mode):
+    """
+    Look up a cached answer for the exact query first, then for a paraphrase of it.
+    
+    Args:
+        query (str): User query
+        selected_file (str, optional): File the query is restricted to
+        mode (str): Response mode, one of RESPONSE_MODES
+        
+    Returns:
+        tuple: (cached response or None, query embedding or None for reuse by cache_answer)
+    """
+    cached_response = answer_cache.get(answer_cache.make_key(query, selected_file, mode, corpus_version))
+    if cached_response is not None:
+        return cached_response, None
+    
+    if semantic_cache is None or not semantic_cache.is_available():
+        return None, None
+    
+    embedding = await run_blocking(semantic_cache.embed, query)
+    cached_response = semantic_cache.lookup(embedding, semantic_cache_scope(query, selected_file, mode))
+    if cached_response is not None:
+        print("Found cached response for a similar query")
+    return cached_response, embedding
+
+async def cache_answer(query, selected_file, mode, response_dict, embedding=None):
+    """
+    Store an answer in the answer cache and, for final answers, in the semantic cache.
+    
+    Args:
+        query (str): User query
+        selected_file (str, optional): File the query is restricted to
+        mode (str): Response mode, one of RESPONSE_MODES
+        response_dict (dict): Response to cache
+        embedding (numpy.ndarray, optional): Query embedding returned by get_cached_answer
+    """
+    answer_cache.set(answer_cache.make_key(query, selected_file, mode, corpus_version), response_dict)
+    
+    # Document selection prompts depend on the exact wording, so only final answers are shared
+    if semantic_cache is None or response_dict["file_options"]:
+        return
+    if embedding is None:
+        embedding = await run_blocking(semantic_cache.embed, query)
+    semantic_cache.add(embedding, semantic_cache_scope(query, selected_file, mode), response_dict)
 
-def answer_query(query, selected_file=None):
+async def answer_query(query, selected_file=None, mode=None, match=None):
     """
     Answer a user query by searching in all document files or a specific file.
     
     Args:
         query (str): User query
         selected_file (str, optional): If provided, search only in this file
+        mode (str, optional): Response mode, one of RESPONSE_MODES. Defaults to RESPONSE_MODE
+        match (tuple, optional): (exact_match, file_options) already found by find_relevant_text
         
     Returns:
         dict: Response containing the exact match, AI response, enhanced response, and file options
     """
-    print(f"answer_query called with query='{query}', selected_file='{selected_file}'")
+    mode = resolve_response_mode(mode)
+    print(f"answer_query called with query='{query}', selected_file='{selected_file}', mode='{mode}'")
     
     if not query or len(query.strip()) == 0:
         print("Empty query received")
@@ -587,38 +1366,53 @@ def answer_query(query, selected_file=None):
             "file_options": []
         }
     
+    # Concurrent requests for the same query, file, mode and corpus wait for one computation
+    flight_key = answer_cache.make_key(query, selected_file, mode, corpus_version)
+    return dict(await query_flights.run(flight_key, compute_answer, query, selected_file, mode, match))
+
+async def compute_answer(query, selected_file, mode, match=None):
+    """
+    Compute the answer to a non-empty query, using the answer caches when possible.
+    
+    Args:
+        query (str): User query
+        selected_file (str, optional): If provided, search only in this file
+        mode (str): Response mode, one of RESPONSE_MODES
+        match (tuple, optional): (exact_match, file_options) already found by find_relevant_text
+        
+    Returns:
+        dict: Response containing the exact match, AI response, enhanced response, and file options
+    """
     try:
+        cached_response, query_embedding = await get_cached_answer(query, selected_file, mode)
+        if cached_response is not None:
+            print("Returning cached response")
+            return dict(cached_response)
+        
         # Get exact match from the text and file options
-        exact_match, file_options = find_relevant_text(query, documents, selected_file)
+        # The search encodes the query for hybrid search, so it runs off the event loop
+        if match is None:
+            match = await run_blocking(find_relevant_text, query, documents, selected_file)
+        exact_match, file_options = match
         print(f"find_relevant_text returned match of length {len(exact_match)} and {len(file_options)} file options")
         
         # If multiple file options and no file selected, return options for user to choose
         if len(file_options) > 1 and not selected_file:
             print(f"Multiple file options found: {file_options}")
-            file_options_with_names = []
-            for file_id in file_options:
-                # Use a nicer display name for the file
-                display_name = file_id.replace('_', ' ')
-                file_options_with_names.append({"id": file_id, "name": display_name})
-                
-            return {
+            response_dict = {
                 "exact_match": exact_match,
                 "ai_response": "Please select a document to continue.",
                 "enhanced_response": "I found information in multiple documents. Please select which one you'd like me to use:",
-                "file_options": file_options_with_names
+                "file_options": format_file_options(file_options)
             }
+            await cache_answer(query, selected_file, mode, response_dict, query_embedding)
+            return dict(response_dict)
         
         # Get file ID if available
         file_id = file_options[0] if file_options else None
         print(f"Using file_id: {file_id}")
         
-        # Get AI-generated response
-        ai_response = get_ai_response(query, exact_match, file_id)
-        print(f"Generated AI response of length {len(ai_response)}")
-        
-        # Generate enhanced response using RAG synthesis
-        enhanced_response = get_enhanced_response(query, exact_match, ai_response, file_id)
-        print(f"Generated enhanced response of length {len(enhanced_response)}")
+        ai_response, enhanced_response = await generate_responses(query, exact_match, file_id, mode)
         
         response_dict = {
             "exact_match": exact_match,
@@ -627,7 +1421,11 @@ def answer_query(query, selected_file=None):
             "file_options": []  # Empty if no options needed
         }
         print(f"Returning response with keys: {list(response_dict.keys())}")
-        return response_dict
+        
+        # Only cache answers that the model actually produced
+        if not isinstance(ai_response, FallbackResponse) and not isinstance(enhanced_response, FallbackResponse):
+            await cache_answer(query, selected_file, mode, response_dict, query_embedding)
+        return dict(response_dict)
     except Exception as e:
         print(f"Exception in answer_query: {e}")
         import traceback
@@ -644,10 +1442,39 @@ def answer_query(query, selected_file=None):
 @app.on_event("startup")
 async def startup_event():
     """Load all document files on startup"""
-    global documents
+    global documents, semantic_cache, data_watch_task
     
     documents = load_data_files()
+    await warmup_vector_model()
+    await refresh_paragraph_vectors()
     print(f"Loaded {len(documents)} document files and ready for queries")
+    
+    if DATA_WATCH_INTERVAL > 0:
+        data_watch_task = asyncio.ensure_future(watch_data_directory(DATA_WATCH_INTERVAL))
+        print(f"Watching {DATA_DIR} for changes every {DATA_WATCH_INTERVAL} seconds")
+    
+    if SEMANTIC_CACHE_ENABLED and VECTOR_SUPPORT:
+        # Loading the embedding model takes a few seconds, so keep it off the event loop
+        retriever = await run_blocking(get_vector_retriever)
+        semantic_cache = SemanticCache(
+            retriever,
+            threshold=float(os.getenv("SEMANTIC_CACHE_THRESHOLD", "0.92")),
+            max_size=int(os.getenv("SEMANTIC_CACHE_SIZE", "512"))
+        )
+        print(f"Semantic query cache enabled: {semantic_cache.is_available()}")
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Stop the data directory watcher and close the shared OpenAI client on shutdown"""
+    global async_openai_client, data_watch_task
+    
+    if data_watch_task is not None:
+        data_watch_task.cancel()
+        data_watch_task = None
+    
+    if async_openai_client is not None:
+        await async_openai_client.close()
+        async_openai_client = None
 
 @app.post("/api/test")
 async def test_endpoint(request: dict):
@@ -662,9 +1489,10 @@ async def handle_query(request: dict):
     
     print(f"Received raw query request: {request}")
     
-    # Extract query and selected_file from request
+    # Extract query, selected_file and response mode from request
     query = request.get("query", "")
     selected_file = request.get("selected_file", None)
+    mode = request.get("mode", None)
     
     print(f"Extracted query: {query}")
     print(f"Extracted selected_file: {selected_file}")
@@ -697,7 +1525,7 @@ async def handle_query(request: dict):
     
     try:
         print(f"Processing query with {len(documents)} loaded documents")
-        result = answer_query(query, selected_file)
+        result = await answer_query(query, selected_file, mode)
         
         # Return the result for the frontend display
         response = {
@@ -725,6 +1553,328 @@ async def handle_query(request: dict):
             "file_options": []
         }
 
+def format_sse(event, data):
+    """
+    Format a Server-Sent Events message.
+    
+    Args:
+        event (str): Event name
+        data (dict): JSON-serializable event payload
+        
+    Returns:
+        str: The encoded event
+    """
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+async def stream_query_events(query, selected_file=None, mode=None):
+    """
+    Answer a query as a stream of Server-Sent Events.
+    
+    The direct text match is sent first. In "full" mode the AI response is streamed as
+    "ai_token" events; the final answer is streamed as "enhanced_token" events. The final
+    "done" event carries the complete response in the same shape as /api/query,
+    including file_options. If a completion failed part-way, the "done" event also has
+    "incomplete": true and the truncated answer is not cached.
+    
+    Args:
+        query (str): User query
+        selected_file (str, optional): If provided, search only in this file
+        mode (str, optional): Response mode, one of RESPONSE_MODES
+        
+    Yields:
+        str: Encoded SSE messages
+    """
+    mode = resolve_response_mode(mode)
+    try:
+        # Replay a cached answer as a single token
+        cached_response, query_embedding = await get_cached_answer(query, selected_file, mode)
+        if cached_response is not None:
+            yield format_sse("exact_match", {"exact_match": cached_response["exact_match"]})
+            if not cached_response["file_options"]:
+                yield format_sse("enhanced_token", {"content": cached_response["enhanced_response"]})
+            yield format_sse("done", dict(cached_response, response=cached_response["enhanced_response"]))
+            return
+        
+        exact_match, file_options = await run_blocking(find_relevant_text, query, documents, selected_file)
+        yield format_sse("exact_match", {"exact_match": exact_match})
+        
+        # If multiple file options and no file selected, return options for user to choose
+        if len(file_options) > 1 and not selected_file:
+            response_dict = {
+                "exact_match": exact_match,
+                "ai_response": "Please select a document to continue.",
+                "enhanced_response": "I found information in multiple documents. Please select which one you'd like me to use:",
+                "file_options": format_file_options(file_options)
+            }
+            await cache_answer(query, selected_file, mode, response_dict, query_embedding)
+            yield format_sse("done", dict(response_dict, response=response_dict["enhanced_response"]))
+            return
+        
+        file_id = file_options[0] if file_options else None
+        file_context = f" from {file_id}" if file_id else ""
+        
+        used_fallback = False
+        incomplete = False
+        if mode == "direct":
+            ai_response = enhanced_response = exact_match
+        else:
+            if mode == "single":
+                ai_response = None
+                final_messages = build_single_messages(query, exact_match, file_id)
+                final_fallback = f"I found this information{file_context}: {exact_match}"
+            else:
+                ai_parts = []
+                async for content in stream_chat_completion(build_ai_messages(query, exact_match, file_id), 1000, 0.3,
+                                                            fallback=f"I found this information{file_context}: {exact_match}"):
+                    if isinstance(content, IncompleteResponse):
+                        incomplete = True
+                        continue
+                    ai_parts.append(content)
+                    used_fallback = used_fallback or isinstance(content, FallbackResponse)
+                    yield format_sse("ai_token", {"content": content})
+                ai_response = "".join(ai_parts).strip()
+                final_messages = build_enhanced_messages(query, exact_match, ai_response, file_id)
+                final_fallback = ai_response
+            
+            enhanced_parts = []
+            async for content in stream_chat_completion(final_messages, 1000, 0.2, fallback=final_fallback):
+                if isinstance(content, IncompleteResponse):
+                    incomplete = True
+                    continue
+                enhanced_parts.append(content)
+                used_fallback = used_fallback or isinstance(content, FallbackResponse)
+                yield format_sse("enhanced_token", {"content": content})
+            enhanced_response = "".join(enhanced_parts).strip()
+            if ai_response is None:
+                ai_response = enhanced_response
+        
+        response_dict = {
+            "exact_match": exact_match,
+            "ai_response": ai_response,
+            "enhanced_response": enhanced_response,
+            "file_options": []
+        }
+        if not used_fallback and not incomplete:
+            await cache_answer(query, selected_file, mode, response_dict, query_embedding)
+        done_event = dict(response_dict, response=enhanced_response)
+        if incomplete:
+            done_event["incomplete"] = True
+        yield format_sse("done", done_event)
+    except Exception as e:
+        print(f"Error streaming query: {str(e)}")
+        import traceback
+        print(f"Stack trace: {traceback.format_exc()}")
+        yield format_sse("done", {
+            "exact_match": "An error occurred while processing your query.",
+            "ai_response": "An error occurred while processing your query.",
+            "enhanced_response": f"I'm sorry, there was an error processing your query: {str(e)}",
+            "response": f"I'm sorry, there was an error processing your query: {str(e)}",
+            "file_options": []
+        })
+
+@app.post("/api/query/stream")
+async def handle_query_stream(request: dict):
+    """Handle a query from the frontend, streaming the answer as Server-Sent Events"""
+    global documents
+    
+    query = request.get("query", "")
+    selected_file = request.get("selected_file", None)
+    mode = request.get("mode", None)
+    print(f"Received streaming query: {query}, selected_file: {selected_file}, mode: {mode}")
+    
+    async def single_event(message):
+        yield format_sse("done", {
+            "exact_match": message,
+            "ai_response": message,
+            "enhanced_response": message,
+            "response": message,
+            "file_options": []
+        })
+    
+    headers = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    
+    # Basic validation
+    if not query or not isinstance(query, str) or query.strip() == "":
+        return StreamingResponse(single_event("Please provide a specific query about Gujarat Civil Services."),
+                                 media_type="text/event-stream", headers=headers)
+    
+    if not documents:
+        print("No documents loaded, attempting to load...")
+        documents = load_data_files()
+        if not documents:
+            return StreamingResponse(single_event("The document data is not available."),
+                                     media_type="text/event-stream", headers=headers)
+    
+    return StreamingResponse(stream_query_events(query.strip(), selected_file, mode),
+                             media_type="text/event-stream", headers=headers)
+
+def find_relevant_texts(requests):
+    """
+    Run the direct text search for many queries in one pass.
+    
+    Duplicate (query, file) pairs are searched once, and the queries are encoded for
+    hybrid search in a single batch instead of one encoder call each. Empty queries
+    and queries whose search fails get None, so answer_query handles them as usual.
+    
+    Args:
+        requests (list): List of (query, selected_file) tuples
+        
+    Returns:
+        list: (exact_match, file_options) tuples or None, in request order
+    """
+    query_embeddings = {}
+    vectors = paragraph_vectors
+    if vectors is not None:
+        unique_queries = list(dict.fromkeys(query for query, _ in requests if query and query.strip()))
+        if unique_queries:
+            embeddings = vectors.encode_queries(unique_queries)
+            if embeddings is not None:
+                query_embeddings = dict(zip(unique_queries, embeddings))
+    
+    matches = {}
+    results = []
+    for query, selected_file in requests:
+        key = (query, selected_file)
+        if key not in matches:
+            matches[key] = None
+            if query and query.strip():
+                try:
+                    matches[key] = find_relevant_text(query, documents, selected_file, query_embeddings.get(query))
+                except Exception as e:
+                    print(f"Error searching for batch query '{query}': {str(e)}")
+        results.append(matches[key])
+    return results
+
+def parse_batch_request(request):
+    """
+    Validate a batch request and expand it into one entry per query.
+    
+    Each query is either a string or an object with "query" and optional
+    "selected_file" and "mode"; missing values default to the request-level ones.
+    A selected file must be a string and a mode one of RESPONSE_MODES.
+    
+    Args:
+        request (dict): Body of a /api/query/batch request
+        
+    Returns:
+        list: List of (query, selected_file, mode) tuples
+    """
+    queries = request.get("queries")
+    if not isinstance(queries, list) or not queries:
+        raise HTTPException(status_code=400, detail="'queries' must be a non-empty list")
+    if len(queries) > BATCH_MAX_QUERIES:
+        raise HTTPException(status_code=400, detail=f"A batch can contain at most {BATCH_MAX_QUERIES} queries")
+    
+    items = []
+    for entry in queries:
+        if isinstance(entry, str):
+            entry = {"query": entry}
+        if not isinstance(entry, dict) or not isinstance(entry.get("query", ""), str):
+            raise HTTPException(status_code=400, detail="Each query must be a string or an object with a 'query' string")
+        selected_file = entry.get("selected_file", request.get("selected_file"))
+        mode = entry.get("mode", request.get("mode"))
+        if selected_file is not None and not isinstance(selected_file, str):
+            raise HTTPException(status_code=400, detail="'selected_file' must be a string")
+        if mode is not None and (not isinstance(mode, str) or mode.lower() not in RESPONSE_MODES):
+            raise HTTPException(status_code=400, detail=f"'mode' must be one of {', '.join(RESPONSE_MODES)}")
+        items.append((entry.get("query", "").strip(), selected_file, mode))
+    return items
+
+async def answer_batch_item(index, item, match, semaphore):
+    """
+    Answer one query of a batch once a concurrency slot is free.
+    
+    Args:
+        index (int): Position of the query in the batch
+        item (tuple): (query, selected_file, mode)
+        match (tuple): Result of find_relevant_text for the query, or None
+        semaphore (asyncio.Semaphore): Limits how many queries of the batch run at once
+        
+    Returns:
+        dict: The /api/query response fields plus the index, query and selected file
+    """
+    query, selected_file, mode = item
+    async with semaphore:
+        result = await answer_query(query, selected_file, mode, match)
+    return {
+        "index": index,
+        "query": query,
+        "selected_file": selected_file,
+        "exact_match": result.get("exact_match", "No direct match found."),
+        "ai_response": result.get("ai_response", "No AI response available."),
+        "enhanced_response": result.get("enhanced_response", "No enhanced response available."),
+        "response": result.get("enhanced_response", "No response available."),
+        "file_options": result.get("file_options", [])
+    }
+
+@app.post("/api/query/batch")
+async def handle_query_batch(request: dict):
+    """Answer a list of queries, returned in order or streamed as NDJSON lines as they complete"""
+    global documents
+    
+    items = parse_batch_request(request)
+    try:
+        concurrency = int(request.get("concurrency") or BATCH_CONCURRENCY)
+    except (TypeError, ValueError):
+        raise HTTPException(status_code=400, detail="'concurrency' must be an integer")
+    concurrency = max(1, min(concurrency, BATCH_MAX_CONCURRENCY))
+    print(f"Received batch of {len(items)} queries, concurrency {concurrency}")
+    
+    if not documents:
+        print("No documents loaded, attempting to load...")
+        documents = load_data_files()
+        if not documents:
+            raise HTTPException(status_code=503, detail="The document data is not available.")
+    
+    # Search for all queries up front, off the event loop, then fan out the model calls
+    matches = await run_blocking(find_relevant_texts, [(query, selected_file) for query, selected_file, _ in items])
+    semaphore = asyncio.Semaphore(concurrency)
+    
+    if not request.get("stream"):
+        results = await asyncio.gather(*[
+            answer_batch_item(index, item, match, semaphore)
+            for index, (item, match) in enumerate(zip(items, matches))
+        ])
+        return {"results": results}
+    
+    async def stream_results():
+        tasks = [
+            asyncio.ensure_future(answer_batch_item(index, item, match, semaphore))
+            for index, (item, match) in enumerate(zip(items, matches))
+        ]
+        try:
+            for next_result in asyncio.as_completed(tasks):
+                yield json.dumps(await next_result) + "\n"
+        finally:
+            # Stop the remaining queries if the client goes away
+            for task in tasks:
+                task.cancel()
+    
+    return StreamingResponse(stream_results(), media_type="application/x-ndjson",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+@app.post("/api/admin/reload")
+async def handle_reload(x_admin_token: str = Header(None)):
+    """Re-index data files that were added, changed or removed since the last load"""
+    if ADMIN_TOKEN and x_admin_token != ADMIN_TOKEN:
+        raise HTTPException(status_code=403, detail="Invalid admin token")
+    return await reload_data_files()
+
+@app.get("/api/cache/stats")
+async def cache_stats():
+    """Report answer cache statistics"""
+    completion_cache = get_completion_cache()
+    return {
+        "answer_cache": answer_cache.stats(),
+        "completion_cache": await run_blocking(completion_cache.stats) if completion_cache is not None else None,
+        "semantic_cache": semantic_cache.stats() if semantic_cache is not None else None,
+        "query_embedding_cache": vector_retriever.query_cache.stats() if vector_retriever is not None else None,
+        "paragraph_vectors": await run_blocking(paragraph_vectors.memory_report) if paragraph_vectors is not None else None,
+        "embedding_cache": await run_blocking(embedding_cache.stats) if embedding_cache is not None else None,
+        "single_flight": query_flights.stats(),
+        "corpus_version": corpus_version
+    }
+
 @app.post("/api/chatbot", response_model=dict)
 async def legacy_handle_query(request: dict):
     """Handle a query from older versions of the frontend"""
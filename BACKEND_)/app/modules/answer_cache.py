@@ -0,0 +1,125 @@
+"""
+Answer cache module for reusing responses to repeated queries.
+"""
+import re
+import time
+from collections import OrderedDict
+
+class AnswerCache:
+    """
+    Class implementing a bounded in-memory cache with LRU and TTL eviction.
+    """
+
+    def __init__(self, max_size=1024, ttl_seconds=3600):
+        """
+        Initialize the cache.
+
+        Args:
+            max_size (int): Maximum number of entries before the least recently used is evicted
+            ttl_seconds (float): Seconds an entry stays valid after it is stored. 0 disables expiry
+        """
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self._entries = OrderedDict()  # Map of keys to (expires_at, value), oldest first
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def normalize_query(query):
+        """
+        Normalize a query so trivial variations share a cache entry.
+
+        Args:
+            query (str): User query
+
+        Returns:
+            str: Lowercased query with collapsed whitespace and no trailing punctuation
+        """
+        return re.sub(r'\s+', ' ', query.lower()).strip().rstrip('?.! ')
+
+    def make_key(self, query, selected_file=None, *parts):
+        """
+        Build a cache key from a query, the selected file and any extra parts.
+
+        Args:
+            query (str): User query
+            selected_file (str, optional): File the query is restricted to
+            *parts: Additional values that change the answer (e.g., response mode, corpus version)
+
+        Returns:
+            tuple: Hashable cache key
+        """
+        return (self.normalize_query(query), selected_file) + parts
+
+    def get(self, key):
+        """
+        Look up an entry and mark it as recently used.
+
+        Args:
+            key (tuple): Cache key
+
+        Returns:
+            The cached value, or None on a miss or when the entry has expired
+        """
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+
+        expires_at, value = entry
+        if expires_at is not None and expires_at <= time.monotonic():
+            del self._entries[key]
+            self.evictions += 1
+            self.misses += 1
+            return None
+
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(self, key, value):
+        """
+        Store an entry, evicting the least recently used entries if the cache is full.
+
+        Args:
+            key (tuple): Cache key
+            value: Value to cache
+        """
+        if self.max_size <= 0:
+            return
+
+        expires_at = time.monotonic() + self.ttl_seconds if self.ttl_seconds else None
+        self._entries[key] = (expires_at, value)
+        self._entries.move_to_end(key)
+
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def clear(self):
+        """
+        Remove all entries, keeping the hit and miss counters.
+        """
+        self._entries.clear()
+
+    def stats(self):
+        """
+        Get cache statistics.
+
+        Returns:
+            dict: Size, capacity, hit, miss and eviction counts and the hit rate
+        """
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "ttl_seconds": self.ttl_seconds,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": self.hits / lookups if lookups else 0.0
+        }
+
+    def __len__(self):
+        return len(self._entries)
@@ -0,0 +1,216 @@
+"""
+BM25 inverted index module for ranking paragraphs against keyword queries.
+"""
+import heapq
+import math
+import re
+from collections import Counter
+
+# Words are runs of letters and digits, matching TextPreprocessor.clean_text
+TOKEN_PATTERN = re.compile(r'\w+')
+
+class BM25Index:
+    """
+    Class implementing an inverted index with Okapi BM25 scoring.
+
+    Two adjustments keep short and list-like paragraphs from outranking the text that
+    answers a query: documents shorter than min_length times the average length are
+    normalized as if they had that length, so headings and page headers get no bonus
+    for being short, and scores are scaled by the fraction of distinct query terms a
+    document contains, so one rare term does not outweigh matching the whole query.
+    """
+
+    def __init__(self, k1=1.2, b=0.75, min_length=1.0):
+        """
+        Initialize an empty index.
+
+        Args:
+            k1 (float): Term frequency saturation parameter
+            b (float): Document length normalization parameter
+            min_length (float): Shortest document length used for normalization, relative to the average length
+        """
+        self.k1 = k1
+        self.b = b
+        self.min_length = min_length
+        self.postings = {}  # Map of terms to {doc_id: term frequency}
+        self.doc_lengths = {}  # Map of document IDs to their number of tokens
+        self.doc_files = {}  # Map of document IDs to their source file IDs
+        self.file_docs = {}  # Map of file IDs to the document IDs they contain
+        self.total_length = 0
+
+    @staticmethod
+    def normalize_token(token):
+        """
+        Reduce simple plural forms so "ministers" matches "minister".
+
+        Args:
+            token (str): Lowercase token
+
+        Returns:
+            str: Normalized token
+        """
+        if len(token) > 4 and token.endswith("ies"):
+            return token[:-3] + "y"
+        if len(token) > 3 and token.endswith("s") and not token.endswith("ss"):
+            return token[:-1]
+        return token
+
+    def tokenize(self, text):
+        """
+        Split text into normalized tokens.
+
+        Args:
+            text (str): Input text
+
+        Returns:
+            list: List of normalized tokens
+        """
+        return [self.normalize_token(token) for token in TOKEN_PATTERN.findall(text.lower())]
+
+    def add_document(self, doc_id, file_id, text):
+        """
+        Add a document to the index.
+
+        Args:
+            doc_id (int): Unique identifier of the document
+            file_id (str): Identifier of the source file
+            text (str): Document text
+        """
+        tokens = self.tokenize(text)
+        for term, frequency in Counter(tokens).items():
+            self.postings.setdefault(term, {})[doc_id] = frequency
+
+        self.doc_lengths[doc_id] = len(tokens)
+        self.doc_files[doc_id] = file_id
+        self.file_docs.setdefault(file_id, []).append(doc_id)
+        self.total_length += len(tokens)
+
+    def remove_file(self, file_id):
+        """
+        Remove all documents of a file from the index.
+
+        Args:
+            file_id (str): Identifier of the source file
+        """
+        removed = set(self.file_docs.pop(file_id, ()))
+        if not removed:
+            return
+
+        for doc_id in removed:
+            self.total_length -= self.doc_lengths.pop(doc_id)
+            del self.doc_files[doc_id]
+
+        for term, postings in list(self.postings.items()):
+            for doc_id in removed.intersection(postings):
+                del postings[doc_id]
+            if not postings:
+                del self.postings[term]
+
+    def copy(self):
+        """
+        Create an independent copy of the index, e.g. to update it while queries use the original.
+
+        Returns:
+            BM25Index: The copy
+        """
+        index = BM25Index(self.k1, self.b, self.min_length)
+        index.postings = {term: dict(postings) for term, postings in self.postings.items()}
+        index.doc_lengths = dict(self.doc_lengths)
+        index.doc_files = dict(self.doc_files)
+        index.file_docs = {file_id: list(doc_ids) for file_id, doc_ids in self.file_docs.items()}
+        index.total_length = self.total_length
+        return index
+
+    def idf(self, term):
+        """
+        Compute the inverse document frequency of a term.
+
+        Args:
+            term (str): Normalized term
+
+        Returns:
+            float: IDF weight, 0 if the term is not indexed
+        """
+        document_frequency = len(self.postings.get(term, ()))
+        if not document_frequency:
+            return 0.0
+        doc_count = len(self.doc_lengths)
+        return math.log(1 + (doc_count - document_frequency + 0.5) / (document_frequency + 0.5))
+
+    def score(self, query_tokens, file_ids=None):
+        """
+        Score every document that contains at least one query term.
+
+        Only the postings lists of the query terms are visited. Repeated query
+        tokens weigh their term proportionally more, and each score is scaled by
+        the fraction of distinct query terms the document contains.
+
+        Args:
+            query_tokens (list): Normalized query tokens
+            file_ids (iterable, optional): Only score documents from these files
+
+        Returns:
+            dict: Map of document IDs to their BM25 scores
+        """
+        if not self.doc_lengths:
+            return {}
+
+        allowed_files = set(file_ids) if file_ids is not None else None
+        average_length = self.total_length / len(self.doc_lengths) or 1.0
+        min_length = self.min_length * average_length
+        query_terms = Counter(query_tokens)
+        scores = {}
+        matched_terms = Counter()
+
+        for term, query_frequency in query_terms.items():
+            postings = self.postings.get(term)
+            if not postings:
+                continue
+            weight = self.idf(term) * query_frequency
+
+            for doc_id, frequency in postings.items():
+                if allowed_files is not None and self.doc_files[doc_id] not in allowed_files:
+                    continue
+                length = max(self.doc_lengths[doc_id], min_length)
+                length_norm = 1 - self.b + self.b * length / average_length
+                term_score = weight * frequency * (self.k1 + 1) / (frequency + self.k1 * length_norm)
+                scores[doc_id] = scores.get(doc_id, 0.0) + term_score
+                matched_terms[doc_id] += 1
+
+        return {doc_id: score * matched_terms[doc_id] / len(query_terms) for doc_id, score in scores.items()}
+
+    def search(self, query_tokens, top_k=10, file_ids=None):
+        """
+        Find the highest scoring documents for a query.
+
+        Args:
+            query_tokens (list): Normalized query tokens
+            top_k (int): Number of documents to return
+            file_ids (iterable, optional): Only search documents from these files
+
+        Returns:
+            list: List of (score, doc_id) tuples, best first
+        """
+        scores = self.score(query_tokens, file_ids)
+        return heapq.nlargest(top_k, ((score, doc_id) for doc_id, score in scores.items()))
+
+    def best_per_file(self, scores):
+        """
+        Select the highest scoring document of each file.
+
+        Args:
+            scores (dict): Map of document IDs to scores, as returned by score()
+
+        Returns:
+            dict: Map of file IDs to (score, doc_id) tuples
+        """
+        best = {}
+        for doc_id, score in scores.items():
+            file_id = self.doc_files[doc_id]
+            # On equal scores prefer the earlier document
+            if file_id not in best or (score, -doc_id) > (best[file_id][0], -best[file_id][1]):
+                best[file_id] = (score, doc_id)
+        return best
+
+    def __len__(self):
+        return len(self.doc_lengths)
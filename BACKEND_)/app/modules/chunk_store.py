@@ -0,0 +1,231 @@
+"""
+Chunk store module for saving vector index chunks in a memory-mappable binary format.
+"""
+import hashlib
+import json
+import mmap
+import os
+from collections.abc import Sequence
+import numpy as np
+
+MANIFEST_FILE = "chunks.json"
+TEXT_FILE = "chunks.bin"
+OFFSETS_FILE = "chunks_offsets.npy"
+SIGNATURES_FILE = "chunks_signatures.npy"
+
+class MappedChunks(Sequence):
+    """
+    Chunk texts that are decoded on access from a memory-mapped blob.
+
+    Chunks can be appended and removed like in a list of chunk texts; changes are
+    kept in memory next to the mapped chunks and never written to the blob.
+    """
+
+    def __init__(self, buffer, offsets):
+        """
+        Initialize the chunk list.
+
+        Args:
+            buffer (mmap.mmap): Buffer holding the UTF-8 encoded chunk texts, or None if all are empty
+            offsets (numpy.ndarray): int64 array of (byte_start, byte_end) per chunk; -1 marks removed chunks
+        """
+        self.buffer = buffer
+        self.offsets = offsets
+        self.removed = set()  # Mapped chunks removed since loading
+        self.added = []  # Chunks appended since loading
+
+    def __len__(self):
+        return len(self.offsets) + len(self.added)
+
+    def __getitem__(self, chunk_id):
+        if chunk_id < 0:
+            chunk_id += len(self)
+        if not 0 <= chunk_id < len(self):
+            raise IndexError("chunk index out of range")
+        if chunk_id >= len(self.offsets):
+            return self.added[chunk_id - len(self.offsets)]
+        if chunk_id in self.removed:
+            return None
+        start, end = self.offsets[chunk_id]
+        if start < 0:
+            return None
+        return self.buffer[int(start):int(end)].decode("utf-8") if self.buffer is not None else ""
+
+    def __setitem__(self, chunk_id, chunk):
+        """
+        Replace a chunk; mapped chunks can only be removed by setting them to None.
+        """
+        if chunk_id < 0:
+            chunk_id += len(self)
+        if chunk_id >= len(self.offsets):
+            self.added[chunk_id - len(self.offsets)] = chunk
+        elif chunk is None:
+            self.removed.add(chunk_id)
+        else:
+            raise ValueError("Mapped chunks can only be removed")
+
+    def extend(self, chunks):
+        self.added.extend(chunks)
+
+    def copy(self):
+        """
+        Create a copy that shares the mapped chunks but not the changes made after loading.
+
+        Returns:
+            MappedChunks: The copy
+        """
+        chunks = MappedChunks(self.buffer, self.offsets)
+        chunks.removed = set(self.removed)
+        chunks.added = list(self.added)
+        return chunks
+
+class ChunkStore:
+    """
+    Class that saves the chunks of a vector index and loads them without reading their text.
+
+    A chunk store in the index directory consists of:
+        chunks.bin            - the UTF-8 text of all chunks, one after the other
+        chunks_offsets.npy    - (byte_start, byte_end) of every chunk in chunks.bin, (-1, -1) for removed chunks
+        chunks_signatures.npy - the uint64 dedup signature of every chunk, see VectorRetriever
+        chunks.json           - format version, chunk count, per-chunk metadata and the index checksum
+
+    The manifest records the SHA-256 of the FAISS index file saved with the chunks,
+    so chunks are never paired with an index whose chunk IDs mean something else.
+    Like DataDirectoryWatcher, loading only hashes the index file again when its
+    modification time or size differ from the recorded ones, so startup does not
+    read the whole index. The manifest is written last, so a partially written store
+    is never loaded.
+    """
+
+    FORMAT_VERSION = 1
+
+    def __init__(self, directory):
+        """
+        Initialize the chunk store.
+
+        Args:
+            directory (str): Directory holding the vector index files
+        """
+        self.directory = directory
+
+    def _path(self, file_name):
+        return os.path.join(self.directory, file_name)
+
+    def _write(self, file_name, write):
+        """
+        Write a store file through a temporary file so readers never see it half written.
+        """
+        temporary_path = self._path(f"{file_name}.{os.getpid()}.tmp")
+        with open(temporary_path, "wb") as file:
+            write(file)
+        os.replace(temporary_path, self._path(file_name))
+
+    def exists(self):
+        """
+        Check if the directory holds a chunk store.
+
+        Returns:
+            bool: True if the manifest exists
+        """
+        return os.path.exists(self._path(MANIFEST_FILE))
+
+    @staticmethod
+    def checksum(path):
+        """
+        Compute the SHA-256 hash of a file's content.
+
+        Args:
+            path (str): Path of the file
+
+        Returns:
+            str: Hex digest of the content
+        """
+        digest = hashlib.sha256()
+        with open(path, "rb") as file:
+            for block in iter(lambda: file.read(1 << 20), b""):
+                digest.update(block)
+        return digest.hexdigest()
+
+    def save(self, chunks, metadata, index_path, signatures=None):
+        """
+        Write chunks and their metadata for an index that was already saved.
+
+        Args:
+            chunks (list): Chunk texts by chunk ID; None for removed chunks
+            metadata (list): Metadata dictionary of each chunk; None for removed chunks
+            index_path (str): Path of the saved FAISS index the chunk IDs refer to
+            signatures (numpy.ndarray, optional): uint64 dedup signature of each chunk
+        """
+        offsets = np.full((len(chunks), 2), -1, dtype='int64')
+        encoded_chunks = []
+        position = 0
+        for chunk_id, chunk in enumerate(chunks):
+            if chunk is None:
+                continue
+            encoded = chunk.encode("utf-8")
+            offsets[chunk_id] = (position, position + len(encoded))
+            encoded_chunks.append(encoded)
+            position += len(encoded)
+
+        index_stat = os.stat(index_path)
+        manifest = {
+            "format_version": self.FORMAT_VERSION,
+            "chunk_count": len(chunks),
+            "text_size": position,
+            "index_checksum": self.checksum(index_path),
+            "index_mtime_ns": index_stat.st_mtime_ns,
+            "index_size": index_stat.st_size,
+            "metadata": metadata
+        }
+        self._write(TEXT_FILE, lambda file: file.writelines(encoded_chunks))
+        self._write(OFFSETS_FILE, lambda file: np.save(file, offsets))
+        if signatures is not None:
+            self._write(SIGNATURES_FILE, lambda file: np.save(file, np.asarray(signatures, dtype='uint64')))
+        elif os.path.exists(self._path(SIGNATURES_FILE)):
+            os.remove(self._path(SIGNATURES_FILE))
+        self._write(MANIFEST_FILE, lambda file: file.write(json.dumps(manifest, ensure_ascii=False).encode("utf-8")))
+
+    def load(self, index_path):
+        """
+        Map the chunks saved for an index.
+
+        Args:
+            index_path (str): Path of the FAISS index to be loaded with the chunks
+
+        Returns:
+            tuple: (MappedChunks, metadata list, signatures array or None if they were not saved), or
+                None if the store is unreadable, in an unsupported format or was saved with a different index
+        """
+        try:
+            with open(self._path(MANIFEST_FILE), "r", encoding="utf-8") as file:
+                manifest = json.load(file)
+            if manifest.get("format_version") != self.FORMAT_VERSION:
+                print(f"Ignoring chunk store with format version {manifest.get('format_version')}")
+                return None
+            index_stat = os.stat(index_path)
+            unchanged = (manifest.get("index_mtime_ns"), manifest.get("index_size")) == (index_stat.st_mtime_ns, index_stat.st_size)
+            if not unchanged and manifest["index_checksum"] != self.checksum(index_path):
+                print(f"Chunk store in {self.directory} does not belong to its vector index")
+                return None
+
+            offsets = np.load(self._path(OFFSETS_FILE), mmap_mode="r")
+            signatures = None
+            if os.path.exists(self._path(SIGNATURES_FILE)):
+                signatures = np.load(self._path(SIGNATURES_FILE), mmap_mode="r")
+            buffer = None
+            with open(self._path(TEXT_FILE), "rb") as file:
+                if os.fstat(file.fileno()).st_size != manifest["text_size"]:
+                    print("Chunk store text does not match its manifest")
+                    return None
+                if manifest["text_size"]:
+                    buffer = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError, KeyError) as e:
+            print(f"Error reading chunk store from {self.directory}: {str(e)}")
+            return None
+
+        if offsets.shape != (manifest["chunk_count"], 2) or len(manifest["metadata"]) != manifest["chunk_count"]:
+            print("Chunk store offsets do not match its manifest")
+            return None
+        if signatures is not None and signatures.shape != (manifest["chunk_count"],):
+            signatures = None
+        return MappedChunks(buffer, offsets), manifest["metadata"], signatures
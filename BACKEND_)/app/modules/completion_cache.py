@@ -0,0 +1,182 @@
+"""
+Completion cache module for persisting LLM completions across restarts and workers.
+"""
+import hashlib
+import json
+import os
+import sqlite3
+import time
+from app.modules.sqlite_store import connect, create_database
+
+DEFAULT_CACHE_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "cache", "completions.sqlite3")
+
+class CompletionCache:
+    """
+    Class implementing a size-bounded completion store in SQLite.
+
+    Every operation opens its own connection and the database runs in WAL mode, so
+    several uvicorn workers and threads can read and write the same file safely.
+    """
+
+    def __init__(self, path=DEFAULT_CACHE_PATH, max_entries=10000, timeout=10.0):
+        """
+        Initialize the cache and create the database if needed.
+
+        Args:
+            path (str): Path of the SQLite database file
+            max_entries (int): Maximum number of completions kept; least recently used are evicted
+            timeout (float): Seconds to wait for a lock held by another process
+        """
+        self.path = path
+        self.max_entries = max_entries
+        self.timeout = timeout
+        self.hits = 0
+        self.misses = 0
+
+        try:
+            create_database(path, [
+                "CREATE TABLE IF NOT EXISTS completions ("
+                "key TEXT PRIMARY KEY, model TEXT, content TEXT NOT NULL, "
+                "created_at REAL NOT NULL, last_access REAL NOT NULL)",
+                "CREATE INDEX IF NOT EXISTS completions_last_access ON completions (last_access)"
+            ], timeout)
+            self.available = True
+        except (sqlite3.Error, OSError) as e:
+            print(f"Error initializing completion cache at {path}: {e}")
+            self.available = False
+
+    def _connect(self):
+        """
+        Open a connection to the cache database for one transaction and close it afterwards.
+        """
+        return connect(self.path, self.timeout)
+
+    @staticmethod
+    def make_key(model, messages, temperature, max_tokens):
+        """
+        Build the cache key of a completion request.
+
+        Args:
+            model (str): Model name
+            messages (list): Chat messages
+            temperature (float): Sampling temperature
+            max_tokens (int): Maximum number of tokens to generate
+
+        Returns:
+            str: SHA-256 hex digest of the request parameters
+        """
+        payload = json.dumps(
+            {"model": model, "messages": messages, "temperature": temperature, "max_tokens": max_tokens},
+            sort_keys=True, ensure_ascii=False
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def get(self, key):
+        """
+        Look up a completion and mark it as recently used.
+
+        Args:
+            key (str): Cache key from make_key()
+
+        Returns:
+            str: Cached completion content, or None on a miss or error
+        """
+        if not self.available:
+            return None
+        try:
+            with self._connect() as connection:
+                row = connection.execute("SELECT content FROM completions WHERE key = ?", (key,)).fetchone()
+                if row is not None:
+                    connection.execute("UPDATE completions SET last_access = ? WHERE key = ?", (time.time(), key))
+        except sqlite3.Error as e:
+            print(f"Error reading completion cache: {e}")
+            return None
+
+        if row is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return row[0]
+
+    def set(self, key, content, model=None):
+        """
+        Store a completion, evicting the least recently used ones beyond max_entries.
+
+        Args:
+            key (str): Cache key from make_key()
+            content (str): Completion content
+            model (str, optional): Model name, stored for inspection
+        """
+        if not self.available:
+            return
+        now = time.time()
+        try:
+            with self._connect() as connection:
+                connection.execute(
+                    "INSERT OR REPLACE INTO completions (key, model, content, created_at, last_access) VALUES (?, ?, ?, ?, ?)",
+                    (key, model, content, now, now)
+                )
+                connection.execute(
+                    "DELETE FROM completions WHERE key IN ("
+                    "SELECT key FROM completions ORDER BY last_access DESC LIMIT -1 OFFSET ?)",
+                    (self.max_entries,)
+                )
+        except sqlite3.Error as e:
+            print(f"Error writing completion cache: {e}")
+
+    def clear(self):
+        """
+        Remove all stored completions.
+        """
+        if not self.available:
+            return
+        try:
+            with self._connect() as connection:
+                connection.execute("DELETE FROM completions")
+        except sqlite3.Error as e:
+            print(f"Error clearing completion cache: {e}")
+
+    def stats(self):
+        """
+        Get cache statistics for this process.
+
+        Returns:
+            dict: Stored entry count, capacity and this process's hit and miss counts
+        """
+        size = 0
+        if self.available:
+            try:
+                with self._connect() as connection:
+                    size = connection.execute("SELECT COUNT(*) FROM completions").fetchone()[0]
+            except sqlite3.Error as e:
+                print(f"Error reading completion cache: {e}")
+        lookups = self.hits + self.misses
+        return {
+            "path": self.path,
+            "size": size,
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0
+        }
+
+_default_cache = None
+
+def get_completion_cache():
+    """
+    Get the process-wide completion cache configured from the environment.
+
+    COMPLETION_CACHE_PATH sets the database file (an empty value disables the cache)
+    and COMPLETION_CACHE_MAX_ENTRIES its capacity.
+
+    Returns:
+        CompletionCache: The shared cache, or None if disabled
+    """
+    global _default_cache
+
+    path = os.getenv("COMPLETION_CACHE_PATH", DEFAULT_CACHE_PATH)
+    if not path:
+        return None
+    if _default_cache is None or _default_cache.path != path:
+        _default_cache = CompletionCache(path, max_entries=int(os.getenv("COMPLETION_CACHE_MAX_ENTRIES", "10000")))
+    return _default_cache
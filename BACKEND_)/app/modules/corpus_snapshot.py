@@ -0,0 +1,309 @@
+"""
+Corpus snapshot module for storing the loaded corpus and its indexes on disk.
+"""
+import json
+import mmap
+import os
+import pickle
+import shutil
+import uuid
+from collections.abc import Mapping
+from app.modules.paragraph_store import ParagraphStore
+
+DEFAULT_SNAPSHOT_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "cache", "snapshot")
+
+MANIFEST_FILE = "manifest.json"
+CORPUS_FILE = "corpus.bin"
+INDEX_FILE = "index.pickle"
+VECTORS_DIR = "vectors"
+
+class MappedDocuments(Mapping):
+    """
+    Read-only map of file IDs to document texts that are decoded on access from a shared buffer.
+
+    The buffer is a memory map of the snapshot's corpus file, so processes mapping
+    the same snapshot share one copy of the text in the page cache.
+    """
+
+    def __init__(self, buffer, files, section_spans=None):
+        """
+        Initialize the mapping.
+
+        Args:
+            buffer (mmap.mmap): Buffer holding the UTF-8 encoded documents
+            files (dict): Map of file IDs to (offset, length) in the buffer
+            section_spans (dict, optional): Map of (file_id, start) of sections to (byte_start, byte_end) in the buffer
+        """
+        self.buffer = buffer
+        self.files = files
+        self.section_spans = section_spans or {}
+
+    def __getitem__(self, file_id):
+        offset, length = self.files[file_id]
+        return self.buffer[offset:offset + length].decode("utf-8")
+
+    def get_section_text(self, section):
+        """
+        Decode the text of a section without decoding the rest of its document.
+
+        Args:
+            section (Section): Section of one of the documents
+
+        Returns:
+            str: Section content including the heading, like Section.get_text
+        """
+        span = self.section_spans.get((section.file_id, section.start))
+        if span is None:
+            return section.get_text(self.get(section.file_id, ""))
+        byte_start, byte_end = span
+        return self.buffer[byte_start:byte_end].decode("utf-8").strip()
+
+    def __contains__(self, file_id):
+        return file_id in self.files
+
+    def __iter__(self):
+        return iter(self.files)
+
+    def __len__(self):
+        return len(self.files)
+
+class CorpusSnapshot:
+    """
+    Class that saves and restores the corpus without re-extracting or re-parsing the source files.
+
+    A snapshot directory holds three files:
+        manifest.json - format version, source file fingerprints and the file table
+        corpus.bin    - the UTF-8 text of all documents, one after the other
+        index.pickle  - sections, paragraph spans, the section index and the BM25 index
+        vectors/<id>/ - the paragraph vector index of snapshot <id>, if one was saved
+
+    Paragraph spans hold both character offsets in their document and byte offsets
+    in corpus.bin, and sections have byte offsets too, so a mapped corpus can decode
+    single paragraphs and sections.
+
+    The manifest is written last and names the snapshot ID stored in the index, so a
+    partially written snapshot is never mistaken for a complete one.
+    """
+
+    FORMAT_VERSION = 6  # Raised whenever the stored structures change, including how sections are parsed
+
+    def __init__(self, directory=DEFAULT_SNAPSHOT_DIR):
+        """
+        Initialize the snapshot store.
+
+        Args:
+            directory (str): Directory holding the snapshot files
+        """
+        self.directory = directory
+
+    def _path(self, file_name):
+        return os.path.join(self.directory, file_name)
+
+    def _write(self, file_name, write):
+        """
+        Write a snapshot file through a temporary file so readers never see it half written.
+        """
+        temporary_path = self._path(f"{file_name}.{os.getpid()}.tmp")
+        with open(temporary_path, "wb") as file:
+            write(file)
+        os.replace(temporary_path, self._path(file_name))
+
+    def load_manifest(self):
+        """
+        Read the manifest of the stored snapshot.
+
+        Returns:
+            dict: The manifest, or None if there is no snapshot in a supported format
+        """
+        try:
+            with open(self._path(MANIFEST_FILE), "r", encoding="utf-8") as file:
+                manifest = json.load(file)
+        except (OSError, ValueError):
+            return None
+        if manifest.get("format_version") != self.FORMAT_VERSION:
+            print(f"Ignoring corpus snapshot with format version {manifest.get('format_version')}")
+            return None
+        return manifest
+
+    def save(self, fingerprints, documents, sections_map, section_index, paragraph_store, search_index):
+        """
+        Write a snapshot of the corpus.
+
+        Args:
+            fingerprints (dict): Map of source file names to (mtime_ns, size, sha256), from DataDirectoryWatcher
+            documents (dict): Map of file IDs to text content
+            sections_map (dict): Map of canonical section keys to Section objects
+            section_index (SectionIndex): Section IDs of every file
+            paragraph_store (ParagraphStore): Paragraphs of every file
+            search_index (BM25Index): Keyword index over the paragraphs
+
+        Returns:
+            bool: True if the snapshot was written
+        """
+        snapshot_id = uuid.uuid4().hex
+        files = []
+        offset = 0
+        encoded_documents = []
+        paragraph_spans = {}
+        section_spans = {}
+        file_sections = {}
+        for section in sections_map.values():
+            file_sections.setdefault(section.file_id, []).append(section)
+        for file_id, text in documents.items():
+            encoded = text.encode("utf-8")
+            files.append({"file_id": file_id, "offset": offset, "length": len(encoded)})
+            encoded_documents.append(encoded)
+            paragraph_spans[file_id] = self._paragraph_spans(paragraph_store.get_file_paragraphs(file_id), text, offset)
+            section_spans.update(self._section_spans(file_sections.get(file_id, []), text, offset))
+            offset += len(encoded)
+
+        index = {
+            "snapshot_id": snapshot_id,
+            "sections_map": sections_map,
+            "section_index": section_index,
+            "paragraph_count": len(paragraph_store.paragraphs),
+            "paragraph_spans": paragraph_spans,
+            "section_spans": section_spans,
+            "search_index": search_index
+        }
+        manifest = {
+            "format_version": self.FORMAT_VERSION,
+            "snapshot_id": snapshot_id,
+            "sources": {file_name: list(fingerprint) for file_name, fingerprint in fingerprints.items()},
+            "files": files,
+            "corpus_size": offset
+        }
+
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            self._write(CORPUS_FILE, lambda file: file.writelines(encoded_documents))
+            self._write(INDEX_FILE, lambda file: pickle.dump(index, file, protocol=pickle.HIGHEST_PROTOCOL))
+            self._write(MANIFEST_FILE, lambda file: file.write(json.dumps(manifest, ensure_ascii=False).encode("utf-8")))
+        except OSError as e:
+            print(f"Error writing corpus snapshot to {self.directory}: {str(e)}")
+            return False
+
+        # Vector indexes of earlier snapshots no longer match the paragraphs
+        vectors_root = self._path(VECTORS_DIR)
+        if os.path.isdir(vectors_root):
+            for name in os.listdir(vectors_root):
+                if name != snapshot_id:
+                    shutil.rmtree(os.path.join(vectors_root, name), ignore_errors=True)
+
+        print(f"Saved corpus snapshot of {len(files)} files ({offset} bytes) to {self.directory}")
+        return True
+
+    def vector_directory(self, manifest):
+        """
+        Get the directory for the vector index built from a snapshot's paragraphs.
+
+        Args:
+            manifest (dict): Manifest of the snapshot
+
+        Returns:
+            str: Directory path; it exists only once an index was saved there
+        """
+        return os.path.join(self._path(VECTORS_DIR), manifest["snapshot_id"])
+
+    @staticmethod
+    def _paragraph_spans(paragraphs, text, offset):
+        """
+        Get the character and byte offsets of a document's paragraphs.
+
+        Args:
+            paragraphs (list): Paragraphs of the document in document order
+            text (str): Full text of the document
+            offset (int): Byte offset of the document in the corpus file
+
+        Returns:
+            list: List of (paragraph_id, start, end, byte_start, byte_end) tuples
+        """
+        spans = []
+        position = 0
+        byte_position = offset
+        for paragraph in paragraphs:
+            byte_start = byte_position + len(text[position:paragraph.start].encode("utf-8"))
+            byte_end = byte_start + len(text[paragraph.start:paragraph.end].encode("utf-8"))
+            spans.append((paragraph.paragraph_id, paragraph.start, paragraph.end, byte_start, byte_end))
+            position, byte_position = paragraph.end, byte_end
+        return spans
+
+    @staticmethod
+    def _section_spans(sections, text, offset):
+        """
+        Get the byte offsets of a document's sections in the corpus file.
+
+        Args:
+            sections (list): Sections of the document
+            text (str): Full text of the document
+            offset (int): Byte offset of the document in the corpus file
+
+        Returns:
+            dict: Map of (file_id, start) to (byte_start, byte_end)
+        """
+        # Encode the text between consecutive boundaries once instead of from the start for every section
+        byte_offsets = {}
+        position = 0
+        byte_position = offset
+        for boundary in sorted({bound for section in sections for bound in (section.start, section.end)}):
+            byte_position += len(text[position:boundary].encode("utf-8"))
+            byte_offsets[boundary] = byte_position
+            position = boundary
+        return {(section.file_id, section.start): (byte_offsets[section.start], byte_offsets[section.end]) for section in sections}
+
+    def load(self, manifest, mapped=False):
+        """
+        Restore the corpus from the snapshot described by a manifest.
+
+        The corpus text is read through a memory map, and paragraphs are rebuilt from
+        their stored offsets instead of splitting the documents again. In mapped mode the
+        map stays open and documents and paragraphs decode their text from it on access,
+        so processes sharing the snapshot do not each hold a copy of the corpus.
+
+        Args:
+            manifest (dict): Manifest returned by load_manifest()
+            mapped (bool): Keep the text in the memory map instead of decoding it up front
+
+        Returns:
+            tuple: (documents, sections_map, section_index, paragraph_store, search_index), or None
+                if the snapshot is incomplete or unreadable
+        """
+        try:
+            with open(self._path(INDEX_FILE), "rb") as file:
+                index = pickle.load(file)
+            if index.get("snapshot_id") != manifest["snapshot_id"]:
+                print("Corpus snapshot files belong to different snapshots")
+                return None
+
+            documents = {}
+            corpus = None
+            with open(self._path(CORPUS_FILE), "rb") as file:
+                if os.fstat(file.fileno()).st_size != manifest["corpus_size"]:
+                    print("Corpus snapshot text does not match its manifest")
+                    return None
+                if manifest["corpus_size"]:
+                    corpus = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+
+            if mapped and corpus is not None:
+                documents = MappedDocuments(corpus, {entry["file_id"]: (entry["offset"], entry["length"]) for entry in manifest["files"]},
+                                            index["section_spans"])
+            elif corpus is not None:
+                with corpus:
+                    for entry in manifest["files"]:
+                        start = entry["offset"]
+                        documents[entry["file_id"]] = corpus[start:start + entry["length"]].decode("utf-8")
+        except (OSError, ValueError, KeyError, AttributeError, ImportError, pickle.UnpicklingError, EOFError) as e:
+            print(f"Error reading corpus snapshot from {self.directory}: {str(e)}")
+            return None
+
+        paragraph_store = ParagraphStore()
+        for file_id, spans in index["paragraph_spans"].items():
+            if isinstance(documents, MappedDocuments):
+                paragraph_store.add_mapped_spans(file_id, documents.buffer, spans)
+            else:
+                paragraph_store.add_spans(file_id, documents[file_id], spans)
+        if len(paragraph_store.paragraphs) < index["paragraph_count"]:
+            # Keep paragraph IDs of removed files unused
+            paragraph_store.paragraphs.extend([None] * (index["paragraph_count"] - len(paragraph_store.paragraphs)))
+
+        return documents, index["sections_map"], index["section_index"], paragraph_store, index["search_index"]
@@ -0,0 +1,107 @@
+"""
+Data watcher module for detecting added, changed and removed source files.
+"""
+import hashlib
+import os
+
+class DataDirectoryWatcher:
+    """
+    Class that tracks the files of a directory by modification time, size and content hash.
+
+    Files whose modification time and size are unchanged are not read again. A file
+    that was touched but has the same content is not reported as changed.
+
+    A scan only reports changes; the state it found is remembered by commit(), once
+    the changed files were indexed, so files that could not be indexed are reported
+    again by the next scan.
+    """
+
+    def __init__(self, directory, extension=".txt"):
+        """
+        Initialize the watcher with no known files.
+
+        Args:
+            directory (str): Directory to watch
+            extension (str): Only files with this extension are tracked
+        """
+        self.directory = directory
+        self.extension = extension
+        self.fingerprints = {}  # Map of file names to (mtime_ns, size, sha256) tuples
+        self.scanned = None  # Fingerprints found by the last scan, until they are committed
+
+    @staticmethod
+    def hash_file(path):
+        """
+        Compute the SHA-256 hash of a file's content.
+
+        Args:
+            path (str): Path of the file
+
+        Returns:
+            str: Hex digest of the content
+        """
+        digest = hashlib.sha256()
+        with open(path, "rb") as file:
+            for block in iter(lambda: file.read(1 << 20), b""):
+                digest.update(block)
+        return digest.hexdigest()
+
+    def scan(self):
+        """
+        Compare the directory with the committed state.
+
+        A file that cannot be read keeps its previous fingerprint, so a transient error
+        does not report it as removed.
+
+        Returns:
+            dict: Lists of file names under "added", "changed" and "removed"
+        """
+        changes = {"added": [], "changed": [], "removed": []}
+        try:
+            file_names = sorted(f for f in os.listdir(self.directory) if f.endswith(self.extension))
+        except OSError as e:
+            print(f"Error listing files in {self.directory}: {str(e)}")
+            return changes
+
+        fingerprints = {}
+        for file_name in file_names:
+            path = os.path.join(self.directory, file_name)
+            previous = self.fingerprints.get(file_name)
+            try:
+                stat = os.stat(path)
+                if previous is not None and previous[:2] == (stat.st_mtime_ns, stat.st_size):
+                    fingerprints[file_name] = previous
+                    continue
+
+                fingerprints[file_name] = (stat.st_mtime_ns, stat.st_size, self.hash_file(path))
+            except OSError as e:
+                print(f"Error reading {path}: {str(e)}")
+                if previous is not None:
+                    fingerprints[file_name] = previous
+                continue
+
+            if previous is None:
+                changes["added"].append(file_name)
+            elif previous[2] != fingerprints[file_name][2]:
+                changes["changed"].append(file_name)
+
+        changes["removed"] = sorted(set(self.fingerprints) - set(fingerprints))
+        self.scanned = fingerprints
+        return changes
+
+    def commit(self, failed=()):
+        """
+        Remember the state found by the last scan, so the next scan reports changes relative to it.
+
+        Files that could not be indexed are forgotten, so the next scan reports them as
+        added and they are indexed again.
+
+        Args:
+            failed (iterable): Names of files of the last scan that could not be indexed
+        """
+        if self.scanned is None:
+            return
+        for file_name in failed:
+            self.scanned.pop(file_name, None)
+        self.fingerprints = self.scanned
+        self.scanned = None
@@ -0,0 +1,179 @@
+"""
+Embedding cache module for persisting chunk embeddings across re-indexing and restarts.
+"""
+import hashlib
+import os
+import sqlite3
+import time
+import numpy as np
+from app.modules.sqlite_store import connect, create_database
+
+DEFAULT_CACHE_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "cache", "embeddings.sqlite3")
+
+class EmbeddingCache:
+    """
+    Class implementing a size-bounded store of text embeddings in SQLite, keyed by content hash.
+
+    Embeddings are stored per model, so switching models never returns vectors of
+    another embedding space. Like CompletionCache, every operation opens its own
+    connection and the database runs in WAL mode, so workers can share the file.
+    """
+
+    def __init__(self, path=DEFAULT_CACHE_PATH, max_entries=200000, timeout=10.0):
+        """
+        Initialize the cache and create the database if needed.
+
+        Args:
+            path (str): Path of the SQLite database file
+            max_entries (int): Maximum number of embeddings kept; least recently used are evicted
+            timeout (float): Seconds to wait for a lock held by another process
+        """
+        self.path = path
+        self.max_entries = max_entries
+        self.timeout = timeout
+        self.hits = 0
+        self.misses = 0
+
+        try:
+            create_database(path, [
+                "CREATE TABLE IF NOT EXISTS embeddings ("
+                "model TEXT NOT NULL, content_hash TEXT NOT NULL, vector BLOB NOT NULL, "
+                "last_access REAL NOT NULL, PRIMARY KEY (model, content_hash))",
+                "CREATE INDEX IF NOT EXISTS embeddings_last_access ON embeddings (last_access)"
+            ], timeout)
+            self.available = True
+        except (sqlite3.Error, OSError) as e:
+            print(f"Error initializing embedding cache at {path}: {e}")
+            self.available = False
+
+    def _connect(self):
+        """
+        Open a connection to the cache database for one transaction and close it afterwards.
+        """
+        return connect(self.path, self.timeout)
+
+    @staticmethod
+    def content_hash(text):
+        """
+        Hash a text for use as a cache key.
+
+        Args:
+            text (str): The embedded text
+
+        Returns:
+            str: SHA-256 hex digest of the UTF-8 encoded text
+        """
+        return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+    def get_many(self, model, texts):
+        """
+        Look up the embeddings of several texts and mark them as recently used.
+
+        Args:
+            model (str): Name of the embedding model
+            texts (list): Texts to look up
+
+        Returns:
+            list: float32 embedding for each text, or None where it is not cached
+        """
+        results = [None] * len(texts)
+        if not self.available or not texts:
+            return results
+
+        hashes = [self.content_hash(text) for text in texts]
+        found = {}
+        try:
+            with self._connect() as connection:
+                unique_hashes = list(dict.fromkeys(hashes))
+                # Stay below SQLite's limit on the number of query parameters
+                for start in range(0, len(unique_hashes), 500):
+                    batch = unique_hashes[start:start + 500]
+                    placeholders = ",".join("?" * len(batch))
+                    rows = connection.execute(
+                        f"SELECT content_hash, vector FROM embeddings WHERE model = ? AND content_hash IN ({placeholders})",
+                        [model] + batch
+                    ).fetchall()
+                    found.update(rows)
+                if found:
+                    now = time.time()
+                    connection.executemany(
+                        "UPDATE embeddings SET last_access = ? WHERE model = ? AND content_hash = ?",
+                        [(now, model, content_hash) for content_hash in found]
+                    )
+        except sqlite3.Error as e:
+            print(f"Error reading embedding cache: {e}")
+            self.misses += len(texts)
+            return results
+
+        for position, content_hash in enumerate(hashes):
+            vector = found.get(content_hash)
+            if vector is not None:
+                results[position] = np.frombuffer(vector, dtype='float32')
+        hits = sum(1 for result in results if result is not None)
+        self.hits += hits
+        self.misses += len(texts) - hits
+        return results
+
+    def set_many(self, model, texts, embeddings):
+        """
+        Store the embeddings of several texts, evicting the least recently used ones beyond max_entries.
+
+        Args:
+            model (str): Name of the embedding model
+            texts (list): Embedded texts
+            embeddings (numpy.ndarray): float32 array with one row per text
+        """
+        if not self.available or not texts:
+            return
+        now = time.time()
+        rows = [(model, self.content_hash(text), np.ascontiguousarray(embedding, dtype='float32').tobytes(), now)
+                for text, embedding in zip(texts, embeddings)]
+        try:
+            with self._connect() as connection:
+                connection.executemany(
+                    "INSERT OR REPLACE INTO embeddings (model, content_hash, vector, last_access) VALUES (?, ?, ?, ?)",
+                    rows
+                )
+                connection.execute(
+                    "DELETE FROM embeddings WHERE rowid IN ("
+                    "SELECT rowid FROM embeddings ORDER BY last_access DESC LIMIT -1 OFFSET ?)",
+                    (self.max_entries,)
+                )
+        except sqlite3.Error as e:
+            print(f"Error writing embedding cache: {e}")
+
+    def clear(self):
+        """
+        Remove all stored embeddings.
+        """
+        if not self.available:
+            return
+        try:
+            with self._connect() as connection:
+                connection.execute("DELETE FROM embeddings")
+        except sqlite3.Error as e:
+            print(f"Error clearing embedding cache: {e}")
+
+    def stats(self):
+        """
+        Get cache statistics for this process.
+
+        Returns:
+            dict: Stored entry count, capacity and this process's hit and miss counts
+        """
+        size = 0
+        if self.available:
+            try:
+                with self._connect() as connection:
+                    size = connection.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+            except sqlite3.Error as e:
+                print(f"Error reading embedding cache: {e}")
+        lookups = self.hits + self.misses
+        return {
+            "path": self.path,
+            "size": size,
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0
+        }
@@ -0,0 +1,278 @@
+"""
+Paragraph store module for holding pre-split document paragraphs.
+"""
+import re
+
+# Paragraphs are separated by one or more blank lines
+PARAGRAPH_SEPARATOR = re.compile(r'\n\s*\n')
+
+class Paragraph:
+    """
+    A single paragraph of a source document.
+    """
+    __slots__ = ("paragraph_id", "file_id", "position", "start", "end", "text", "text_lower")
+
+    def __init__(self, paragraph_id, file_id, position, start, end, text):
+        """
+        Initialize a paragraph.
+
+        Args:
+            paragraph_id (int): Identifier of the paragraph within the store
+            file_id (str): Identifier of the source file
+            position (int): Index of the paragraph within its file
+            start (int): Offset of the first character in the source text
+            end (int): Offset one past the last character in the source text
+            text (str): Original paragraph text
+        """
+        self.paragraph_id = paragraph_id
+        self.file_id = file_id
+        self.position = position
+        self.start = start
+        self.end = end
+        self.text = text
+        self.text_lower = text.lower()
+
+    def contains(self, phrase, ignore_case=False):
+        """
+        Check whether the paragraph contains a phrase.
+
+        Args:
+            phrase (str): Phrase to look for
+            ignore_case (bool): Whether to ignore case
+
+        Returns:
+            bool: True if the phrase occurs in the paragraph
+        """
+        if ignore_case:
+            return phrase.lower() in self.text_lower
+        return phrase in self.text
+
+class MappedParagraph:
+    """
+    A paragraph whose text stays in a shared read-only buffer and is decoded on every access.
+
+    Nothing decoded is kept, so a worker's heap does not grow with the corpus; phrase
+    checks search the buffer directly instead of decoding the paragraph.
+    """
+    __slots__ = ("paragraph_id", "file_id", "position", "start", "end", "buffer", "byte_start", "byte_end")
+
+    def __init__(self, paragraph_id, file_id, position, start, end, buffer, byte_start, byte_end):
+        """
+        Initialize a mapped paragraph.
+
+        Args:
+            paragraph_id (int): Identifier of the paragraph within the store
+            file_id (str): Identifier of the source file
+            position (int): Index of the paragraph within its file
+            start (int): Offset of the first character in the source text
+            end (int): Offset one past the last character in the source text
+            buffer (mmap.mmap): Buffer holding the UTF-8 encoded source text
+            byte_start (int): Offset of the paragraph's first byte in the buffer
+            byte_end (int): Offset one past the paragraph's last byte in the buffer
+        """
+        self.paragraph_id = paragraph_id
+        self.file_id = file_id
+        self.position = position
+        self.start = start
+        self.end = end
+        self.buffer = buffer
+        self.byte_start = byte_start
+        self.byte_end = byte_end
+
+    @property
+    def text(self):
+        return self.buffer[self.byte_start:self.byte_end].decode("utf-8")
+
+    @property
+    def text_lower(self):
+        return self.text.lower()
+
+    def contains(self, phrase, ignore_case=False):
+        """
+        Check whether the paragraph contains a phrase without decoding it.
+
+        UTF-8 never encodes a character as part of another one, so a byte match is a text
+        match. Ignoring case is done on the bytes for ASCII phrases only; other phrases are
+        compared against the decoded text.
+
+        Args:
+            phrase (str): Phrase to look for
+            ignore_case (bool): Whether to ignore case
+
+        Returns:
+            bool: True if the phrase occurs in the paragraph
+        """
+        encoded = phrase.encode("utf-8")
+        if not ignore_case:
+            return self.buffer.find(encoded, self.byte_start, self.byte_end) != -1
+        if phrase.isascii():
+            pattern = re.compile(re.escape(encoded), re.IGNORECASE)
+            return pattern.search(self.buffer, self.byte_start, self.byte_end) is not None
+        return phrase.lower() in self.text_lower
+
+class ParagraphStore:
+    """
+    Class that splits documents into paragraphs once so queries only have to score them.
+    """
+
+    def __init__(self):
+        """
+        Initialize an empty paragraph store.
+        """
+        self.paragraphs = []  # Paragraphs by ID; removed paragraphs leave None so IDs stay stable
+        self.file_paragraphs = {}  # Map of file IDs to their paragraphs in document order
+
+    def add_document(self, file_id, text):
+        """
+        Split a document into paragraphs and add them to the store.
+
+        Args:
+            file_id (str): Identifier for the source file
+            text (str): Full text content
+
+        Returns:
+            list: The paragraphs created for the document
+        """
+        file_paragraphs = []
+        start = 0
+        for separator in PARAGRAPH_SEPARATOR.finditer(text):
+            self._append(file_paragraphs, file_id, start, separator.start(), text)
+            start = separator.end()
+        self._append(file_paragraphs, file_id, start, len(text), text)
+
+        self.file_paragraphs[file_id] = file_paragraphs
+        return file_paragraphs
+
+    def remove_file(self, file_id):
+        """
+        Remove the paragraphs of a file from the store.
+
+        Paragraph IDs are never reused, so IDs held by other indexes cannot point
+        to a paragraph of a different file.
+
+        Args:
+            file_id (str): Identifier for the source file
+        """
+        for paragraph in self.file_paragraphs.pop(file_id, []):
+            self.paragraphs[paragraph.paragraph_id] = None
+
+    def copy(self):
+        """
+        Create a copy of the store that can be changed without affecting this one.
+
+        Paragraph objects are shared, since they are never modified.
+
+        Returns:
+            ParagraphStore: The copy
+        """
+        store = ParagraphStore()
+        store.paragraphs = list(self.paragraphs)
+        store.file_paragraphs = dict(self.file_paragraphs)
+        return store
+
+    def add_spans(self, file_id, text, spans):
+        """
+        Add the paragraphs of a document from previously computed spans, e.g. from a corpus snapshot.
+
+        Args:
+            file_id (str): Identifier for the source file
+            text (str): Full text content
+            spans (list): List of (paragraph_id, start, end, ...) tuples in document order
+
+        Returns:
+            list: The paragraphs created for the document
+        """
+        file_paragraphs = []
+        for paragraph_id, start, end, *_ in spans:
+            if paragraph_id >= len(self.paragraphs):
+                self.paragraphs.extend([None] * (paragraph_id + 1 - len(self.paragraphs)))
+            paragraph = Paragraph(paragraph_id, file_id, len(file_paragraphs), start, end, text[start:end])
+            self.paragraphs[paragraph_id] = paragraph
+            file_paragraphs.append(paragraph)
+
+        self.file_paragraphs[file_id] = file_paragraphs
+        return file_paragraphs
+
+    def add_mapped_spans(self, file_id, buffer, spans):
+        """
+        Add the paragraphs of a document whose text stays in a shared buffer.
+
+        Args:
+            file_id (str): Identifier for the source file
+            buffer (mmap.mmap): Buffer holding the UTF-8 encoded source text
+            spans (list): List of (paragraph_id, start, end, byte_start, byte_end) tuples in document order
+
+        Returns:
+            list: The paragraphs created for the document
+        """
+        file_paragraphs = []
+        for paragraph_id, start, end, byte_start, byte_end in spans:
+            if paragraph_id >= len(self.paragraphs):
+                self.paragraphs.extend([None] * (paragraph_id + 1 - len(self.paragraphs)))
+            paragraph = MappedParagraph(paragraph_id, file_id, len(file_paragraphs), start, end, buffer, byte_start, byte_end)
+            self.paragraphs[paragraph_id] = paragraph
+            file_paragraphs.append(paragraph)
+
+        self.file_paragraphs[file_id] = file_paragraphs
+        return file_paragraphs
+
+    def _append(self, file_paragraphs, file_id, start, end, text):
+        """
+        Create a paragraph for a span of the text and register it.
+        """
+        paragraph = Paragraph(len(self.paragraphs), file_id, len(file_paragraphs), start, end, text[start:end])
+        self.paragraphs.append(paragraph)
+        file_paragraphs.append(paragraph)
+
+    def get_file_paragraphs(self, file_id):
+        """
+        Get the paragraphs of a file in document order.
+
+        Args:
+            file_id (str): Identifier for the source file
+
+        Returns:
+            list: Paragraphs of the file, or an empty list if the file is unknown
+        """
+        return self.file_paragraphs.get(file_id, [])
+
+    def iter_paragraphs(self, file_ids=None):
+        """
+        Iterate over paragraphs, optionally restricted to a set of files.
+
+        Args:
+            file_ids (iterable, optional): File IDs to include. All files if None
+
+        Yields:
+            Paragraph: Paragraphs in file and document order
+        """
+        if file_ids is None:
+            file_ids = self.file_paragraphs.keys()
+        for file_id in file_ids:
+            yield from self.get_file_paragraphs(file_id)
+
+    def get_context_after(self, paragraph, max_paragraphs=5, max_chars=5000):
+        """
+        Get a paragraph together with the paragraphs that follow it in the same file.
+
+        Args:
+            paragraph (Paragraph): The paragraph to start from
+            max_paragraphs (int): Maximum number of paragraphs to include
+            max_chars (int): Only include paragraphs that start within this many characters
+
+        Returns:
+            str: The paragraphs joined by blank lines
+        """
+        file_paragraphs = self.get_file_paragraphs(paragraph.file_id)
+        position = paragraph.position
+        limit = paragraph.start + max_chars
+
+        selected = []
+        for following in file_paragraphs[position:position + max_paragraphs]:
+            if following.start >= limit:
+                break
+            selected.append(following.text[:limit - following.start])
+        return "\n\n".join(selected)
+
+    def __len__(self):
+        return sum(len(file_paragraphs) for file_paragraphs in self.file_paragraphs.values())
@@ -5,6 +5,7 @@ import os
 import openai
 from dotenv import load_dotenv
 from app.modules.rule_matcher import RuleMatcher
+from app.modules.completion_cache import CompletionCache, get_completion_cache
 from langdetect import detect, LangDetectException
 
 class RagChatbot:
@@ -12,7 +13,7 @@ class RagChatbot:
     Class for implementing a Retrieval-Augmented Generation (RAG) chatbot.
     """
     
-    def __init__(self, vector_retriever, api_key=None, model="gpt-3.5-turbo"):
+    def __init__(self, vector_retriever, api_key=None, model="gpt-3.5-turbo", completion_cache=None):
         """
         Initialize the RAG chatbot with a vector retriever and OpenAI settings.
         
@@ -20,8 +21,10 @@ class RagChatbot:
             vector_retriever: Vector retriever for retrieving relevant chunks
             api_key (str, optional): OpenAI API key. If None, attempts to load from env
             model (str): OpenAI model to use
+            completion_cache (CompletionCache, optional): Store for completions. If None, uses the shared cache
         """
         self.vector_retriever = vector_retriever
+        self.completion_cache = completion_cache if completion_cache is not None else get_completion_cache()
         self.fallback_matcher = RuleMatcher()
         
         # Try to get API key from environment if not provided
@@ -361,18 +364,27 @@ Question: {query}
 {language_instruction}
 """
             
-            client = openai.OpenAI(api_key=self.api_key)
-            response = client.chat.completions.create(
-                model=self.model,
-                messages=[
-                    {"role": "system", "content": system_prompt + "\n\n" + language_instruction},
-                    {"role": "user", "content": prompt}
-                ],
-                temperature=0.3,
-                max_tokens=300
-            )
-            
-            answer = response.choices[0].message.content.strip()
+            messages = [
+                {"role": "system", "content": system_prompt + "\n\n" + language_instruction},
+                {"role": "user", "content": prompt}
+            ]
+            
+            # Reuse a stored completion for an identical request
+            cache_key = CompletionCache.make_key(self.model, messages, 0.3, 300)
+            answer = self.completion_cache.get(cache_key) if self.completion_cache else None
+            
+            if answer is None:
+                client = openai.OpenAI(api_key=self.api_key)
+                response = client.chat.completions.create(
+                    model=self.model,
+                    messages=messages,
+                    temperature=0.3,
+                    max_tokens=300
+                )
+                
+                answer = response.choices[0].message.content.strip()
+                if self.completion_cache:
+                    self.completion_cache.set(cache_key, answer, self.model)
             
             return {
                 "answer": answer,
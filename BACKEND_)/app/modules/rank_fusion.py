@@ -0,0 +1,30 @@
+"""
+Rank fusion module for combining the results of several retrievers.
+"""
+
+def reciprocal_rank_fusion(rankings, weights=None, k=60):
+    """
+    Combine rankings with weighted reciprocal rank fusion.
+
+    Each ranking adds weight * (k + 1) / (k + rank) for every item it contains, with
+    ranks starting at 1. The first item of a ranking therefore gets exactly its
+    weight, so fused scores lie between 0 and the sum of the weights.
+
+    Args:
+        rankings (list): Lists of item IDs, best first
+        weights (list, optional): Weight of each ranking. Defaults to 1 for all
+        k (int): Smoothing constant; larger values flatten the difference between ranks
+
+    Returns:
+        dict: Map of item IDs to fused scores
+    """
+    if weights is None:
+        weights = [1.0] * len(rankings)
+
+    scores = {}
+    for ranking, weight in zip(rankings, weights):
+        if not weight:
+            continue
+        for rank, item in enumerate(ranking, start=1):
+            scores[item] = scores.get(item, 0.0) + weight * (k + 1) / (k + rank)
+    return scores
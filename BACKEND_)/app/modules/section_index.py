@@ -0,0 +1,165 @@
+"""
+Section index module for fast lookups of section IDs across files.
+"""
+import bisect
+import re
+
+# Canonical section IDs are a number followed by optional letters (e.g., "3", "3A", "9AB")
+SECTION_ID_PATTERN = re.compile(r'^(\d+)([A-Z]*)$')
+
+class SectionIndex:
+    """
+    Class that keeps the section IDs of each file in natural sort order.
+
+    IDs are ordered by number first and letter suffix second, so "3" < "3A" < "3B" < "11".
+    Lookups return the IDs as they were added, so a non-canonical ID such as "03A"
+    can still be found in sections_map.
+    """
+
+    def __init__(self):
+        """
+        Initialize an empty section index.
+        """
+        self.file_keys = {}  # Map of file IDs to sorted lists of (number, suffix) keys
+        self.file_section_ids = {}  # Map of file IDs to the section IDs of their keys, in the same order
+        self.section_files = {}  # Map of section IDs to the files containing them
+
+    @staticmethod
+    def sort_key(section_id):
+        """
+        Get the natural sort key of a canonical section ID.
+
+        Args:
+            section_id (str): Canonical section ID (e.g., "3A")
+
+        Returns:
+            tuple: (number, suffix), or None if the ID is not a section number
+        """
+        match = SECTION_ID_PATTERN.match(section_id)
+        if not match:
+            return None
+        return int(match.group(1)), match.group(2)
+
+    def add_file(self, file_id, section_ids):
+        """
+        Index the section IDs of a file, replacing any previous entries for it.
+
+        Args:
+            file_id (str): Identifier for the source file
+            section_ids (iterable): Canonical section IDs found in the file
+        """
+        self.remove_file(file_id)
+
+        keyed = ((self.sort_key(section_id), section_id) for section_id in set(section_ids))
+        entries = sorted((key, section_id) for key, section_id in keyed if key is not None)
+        self.file_keys[file_id] = [key for key, _ in entries]
+        self.file_section_ids[file_id] = [section_id for _, section_id in entries]
+        for _, section_id in entries:
+            self.section_files.setdefault(section_id, []).append(file_id)
+
+    def remove_file(self, file_id):
+        """
+        Remove all section IDs of a file from the index.
+
+        Args:
+            file_id (str): Identifier for the source file
+        """
+        self.file_keys.pop(file_id, None)
+        for section_id in self.file_section_ids.pop(file_id, []):
+            files = self.section_files.get(section_id, [])
+            if file_id in files:
+                files.remove(file_id)
+            if not files:
+                self.section_files.pop(section_id, None)
+
+    def copy(self):
+        """
+        Create a copy of the index that can be changed without affecting this one.
+
+        Returns:
+            SectionIndex: The copy
+        """
+        index = SectionIndex()
+        index.file_keys = dict(self.file_keys)
+        index.file_section_ids = dict(self.file_section_ids)
+        index.section_files = {section_id: list(files) for section_id, files in self.section_files.items()}
+        return index
+
+    def has_section(self, file_id, section_id):
+        """
+        Check whether a file contains a section.
+
+        Args:
+            file_id (str): Identifier for the source file
+            section_id (str): Canonical section ID
+
+        Returns:
+            bool: True if the file contains exactly this section
+        """
+        return file_id in self.section_files.get(section_id, ())
+
+    def files_with_section(self, section_id):
+        """
+        Get every file that contains a section.
+
+        Args:
+            section_id (str): Canonical section ID
+
+        Returns:
+            list: File IDs in load order
+        """
+        return list(self.section_files.get(section_id, ()))
+
+    def find_prefix(self, file_id, section_id):
+        """
+        Find the sections of a file that extend the given ID with more letters.
+
+        For example "3" matches "3", "3A" and "3AB", but not "31".
+
+        Args:
+            file_id (str): Identifier for the source file
+            section_id (str): Canonical section ID
+
+        Returns:
+            list: Matching section IDs as they were added, in natural order
+        """
+        query = self.sort_key(section_id)
+        keys = self.file_keys.get(file_id)
+        section_ids = self.file_section_ids.get(file_id)
+        if query is None or not keys:
+            return []
+
+        number, suffix = query
+        position = bisect.bisect_left(keys, query)
+        matches = []
+        while position < len(keys) and keys[position][0] == number and keys[position][1].startswith(suffix):
+            matches.append(section_ids[position])
+            position += 1
+        return matches
+
+    def find_closest(self, file_id, section_id):
+        """
+        Find the nearest section of a file with the same number.
+
+        The closest section is the last one that sorts before the requested ID
+        (e.g., "3B" for "3C"), or the first one after it when there is none.
+
+        Args:
+            file_id (str): Identifier for the source file
+            section_id (str): Canonical section ID
+
+        Returns:
+            str: Section ID as it was added, or None if the file has no section with this number
+        """
+        query = self.sort_key(section_id)
+        keys = self.file_keys.get(file_id)
+        section_ids = self.file_section_ids.get(file_id)
+        if query is None or not keys:
+            return None
+
+        position = bisect.bisect_right(keys, query)
+        if position > 0 and keys[position - 1][0] == query[0]:
+            return section_ids[position - 1]
+        if position < len(keys) and keys[position][0] == query[0]:
+            return section_ids[position]
+        return None
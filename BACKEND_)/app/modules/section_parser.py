@@ -0,0 +1,179 @@
+"""
+Section parsing module for splitting rulebooks into numbered sections.
+"""
+import re
+
+# A line starting with a section number like "3." or "9AB." is a possible section heading
+# when whitespace follows the period. The number may follow indentation and markers: markdown
+# ("### **12."), amendment signs ("↔ 9A.", "@ 15A.", "[3B.") or runs of X ("XX 16D."), and
+# headings may also be written as "Rule 9:".
+SECTION_HEADING = re.compile(
+    r'^(?P<markers>(?:[^\w\n]|X(?=[X\s"]))*)'
+    r'(?:Rule[^\S\n]+(?P<rule_id>\d+[A-Z]*)[.:]|(?P<section_id>\d+[A-Z]*)\.)(?=[^\S\n]|$)',
+    re.MULTILINE
+)
+
+class Section:
+    """
+    A numbered section of a source document, stored as offsets into the text.
+    """
+    __slots__ = ("section_id", "title", "file_id", "start", "end")
+
+    def __init__(self, section_id, title, file_id, start, end):
+        """
+        Initialize a section.
+
+        Args:
+            section_id (str): Section number as written in the document (e.g., "3A")
+            title (str): Rest of the heading line
+            file_id (str): Identifier of the source file
+            start (int): Offset of the heading in the source text
+            end (int): Offset where the next section boundary starts
+        """
+        self.section_id = section_id
+        self.title = title
+        self.file_id = file_id
+        self.start = start
+        self.end = end
+
+    def get_text(self, text):
+        """
+        Get the content of the section from its source text.
+
+        Args:
+            text (str): Full text of the source file
+
+        Returns:
+            str: Section content including the heading
+        """
+        return text[self.start:self.end].strip()
+
+class SectionParser:
+    """
+    Class that extracts numbered sections from a document in a single pass.
+    """
+
+    @staticmethod
+    def normalize_section_id(section_id):
+        """
+        Get the canonical form of a section ID used for lookups.
+
+        Args:
+            section_id (str): The section identifier (e.g., "3A", "3a", "3A.")
+
+        Returns:
+            str: Canonical section ID (e.g., "3A")
+        """
+        return section_id.strip().strip('.').upper()
+
+    @staticmethod
+    def make_key(file_id, section_id):
+        """
+        Build the sections_map key for a section of a file.
+
+        Args:
+            file_id (str): Identifier for the source file
+            section_id (str): The section identifier in any supported format
+
+        Returns:
+            str: Key of the form "file_id:SECTION_ID"
+        """
+        return f"{file_id}:{SectionParser.normalize_section_id(section_id)}"
+
+    @staticmethod
+    def section_order(section_id):
+        """
+        Get the position of a section ID in document order.
+
+        Args:
+            section_id (str): Canonical section ID (e.g., "9AB")
+
+        Returns:
+            tuple: (number, letters), so "9" < "9A" < "9AA" < "9AB" < "9B" < "10"
+        """
+        digits = len(section_id) - len(section_id.lstrip("0123456789"))
+        return int(section_id[:digits]), section_id[digits:]
+
+    def parse(self, text, file_id):
+        """
+        Extract all sections from the text.
+
+        Each section runs from its heading to the next accepted heading. Headings
+        behind markers or written as "Rule N:" are always accepted. Plain numbered
+        lines are only accepted when they continue the section order, are not part
+        of a block of numbered lines (a table of contents, footnotes or a list) and
+        the ID has no marked heading elsewhere, so nested list items stay inside
+        their section. When an ID is accepted more than once, a heading that
+        continues the section order replaces one that does not, and otherwise the
+        last one is kept.
+
+        Args:
+            text (str): Full text content
+            file_id (str): Identifier for the source file
+
+        Returns:
+            dict: Dictionary mapping canonical section keys to Section objects
+        """
+        headings = list(SECTION_HEADING.finditer(text))
+        marked_ids = {self.normalize_section_id(heading.group("rule_id") or heading.group("section_id"))
+                      for heading in headings if self._is_marked(heading)}
+
+        sections = {}
+        in_order = {}
+        current = None
+        current_order = None
+        for position, heading in enumerate(headings):
+            section_id = heading.group("rule_id") or heading.group("section_id")
+            order = self.section_order(self.normalize_section_id(section_id))
+            follows_order = current_order is None or order > current_order
+            if not self._is_marked(heading):
+                if (not follows_order or self.normalize_section_id(section_id) in marked_ids
+                        or self._in_numbered_block(text, headings, position)):
+                    continue
+
+            if current is not None:
+                current.end = heading.start()
+                self._keep(sections, in_order, current, current_in_order)
+
+            title_end = text.find('\n', heading.end())
+            title = text[heading.end():title_end if title_end != -1 else len(text)].strip(' \t*:')
+            current = Section(section_id, title, file_id, heading.start(), len(text))
+            current_in_order = follows_order
+            current_order = order
+
+        if current is not None:
+            self._keep(sections, in_order, current, current_in_order)
+
+        return sections
+
+    @staticmethod
+    def _is_marked(heading):
+        """
+        Check if a heading is set apart by markers or the word "Rule" rather than being a plain numbered line.
+        """
+        return bool(heading.group("markers").strip()) or heading.group("rule_id") is not None
+
+    @staticmethod
+    def _in_numbered_block(text, headings, position):
+        """
+        Check if a numbered line directly follows or precedes another numbered line.
+        """
+        heading = headings[position]
+        if position > 0:
+            previous_end = text.find('\n', headings[position - 1].end())
+            if previous_end != -1 and previous_end + 1 == heading.start():
+                return True
+        if position + 1 < len(headings):
+            line_end = text.find('\n', heading.end())
+            if line_end != -1 and line_end + 1 == headings[position + 1].start():
+                return True
+        return False
+
+    def _keep(self, sections, in_order, section, follows_order):
+        """
+        Store a section unless an occurrence of the same ID that follows the section order is already stored.
+        """
+        key = self.make_key(section.file_id, section.section_id)
+        if key not in sections or follows_order or not in_order[key]:
+            sections[key] = section
+            in_order[key] = follows_order
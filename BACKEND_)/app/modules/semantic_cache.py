@@ -0,0 +1,141 @@
+"""
+Semantic cache module for reusing answers to paraphrased queries.
+"""
+import threading
+from collections import OrderedDict
+import faiss
+import numpy as np
+
+class SemanticCache:
+    """
+    Class that matches incoming queries against recently answered ones by embedding similarity.
+
+    Query embeddings come from a VectorRetriever and are kept in a small FAISS inner
+    product index, so with unit-length embeddings the score is the cosine similarity.
+    """
+
+    def __init__(self, vector_retriever, threshold=0.92, max_size=512):
+        """
+        Initialize the semantic cache.
+
+        Args:
+            vector_retriever (VectorRetriever): Retriever whose model embeds the queries
+            threshold (float): Minimum cosine similarity for a cached answer to be reused
+            max_size (int): Maximum number of cached queries before the least recently used is evicted
+        """
+        self.vector_retriever = vector_retriever
+        self.threshold = threshold
+        self.max_size = max_size
+        self.index = None
+        self._entries = OrderedDict()  # Map of FAISS IDs to (scope, value), oldest first
+        self._next_id = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def is_available(self):
+        """
+        Check if the embedding model is available.
+
+        Returns:
+            bool: True if queries can be embedded
+        """
+        return self.vector_retriever is not None and self.vector_retriever.is_available()
+
+    def embed(self, query):
+        """
+        Embed a query.
+
+        Args:
+            query (str): User query
+
+        Returns:
+            numpy.ndarray: Unit-length embedding of shape (1, dimension), or None if unavailable
+        """
+        if not self.is_available():
+            return None
+        return self.vector_retriever.encode_queries([query])
+
+    def lookup(self, embedding, scope, candidates=8):
+        """
+        Find a cached answer for a similar query with the same scope.
+
+        Args:
+            embedding (numpy.ndarray): Query embedding from embed()
+            scope (tuple): Values that must match exactly (e.g., selected file, response mode)
+            candidates (int): Number of nearest cached queries to check
+
+        Returns:
+            The cached value, or None if no similar enough query was found
+        """
+        with self._lock:
+            if embedding is None or self.index is None or self.index.ntotal == 0:
+                self.misses += 1
+                return None
+
+            similarities, ids = self.index.search(embedding, min(candidates, self.index.ntotal))
+            for similarity, entry_id in zip(similarities[0], ids[0]):
+                if similarity < self.threshold:
+                    break
+                entry = self._entries.get(int(entry_id))
+                if entry is not None and entry[0] == scope:
+                    self._entries.move_to_end(int(entry_id))
+                    self.hits += 1
+                    return entry[1]
+
+            self.misses += 1
+            return None
+
+    def add(self, embedding, scope, value):
+        """
+        Cache an answer under a query embedding.
+
+        Args:
+            embedding (numpy.ndarray): Query embedding from embed()
+            scope (tuple): Values that must match for the answer to be reused
+            value: Answer to cache
+        """
+        if embedding is None or self.max_size <= 0:
+            return
+
+        with self._lock:
+            if self.index is None:
+                self.index = faiss.IndexIDMap2(faiss.IndexFlatIP(embedding.shape[1]))
+
+            entry_id = self._next_id
+            self._next_id += 1
+            self.index.add_with_ids(embedding, np.array([entry_id], dtype='int64'))
+            self._entries[entry_id] = (scope, value)
+
+            while len(self._entries) > self.max_size:
+                evicted_id, _ = self._entries.popitem(last=False)
+                self.index.remove_ids(np.array([evicted_id], dtype='int64'))
+                self.evictions += 1
+
+    def clear(self):
+        """
+        Remove all cached answers, keeping the hit and miss counters.
+        """
+        with self._lock:
+            self._entries.clear()
+            if self.index is not None:
+                self.index.reset()
+
+    def stats(self):
+        """
+        Get cache statistics.
+
+        Returns:
+            dict: Size, capacity, threshold, hit, miss and eviction counts and the hit rate
+        """
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "threshold": self.threshold,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": self.hits / lookups if lookups else 0.0
+        }
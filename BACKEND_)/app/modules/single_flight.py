@@ -0,0 +1,71 @@
+"""
+Single-flight module for coalescing identical concurrent requests.
+"""
+import asyncio
+
+class SingleFlight:
+    """
+    Class that runs at most one computation per key at a time.
+
+    Callers asking for a key that is already being computed await the running
+    computation and share its result instead of starting their own.
+    """
+
+    def __init__(self):
+        """
+        Initialize an empty single-flight group.
+        """
+        self._calls = {}  # Map of keys to the tasks computing them
+        self.executions = 0
+        self.coalesced = 0
+
+    async def run(self, key, func, *args):
+        """
+        Run a coroutine function for a key, or join the computation already running for it.
+
+        The computation runs in its own task, so a caller that is cancelled (e.g., a
+        client disconnecting) does not cancel it for the other callers waiting on it.
+
+        Args:
+            key: Hashable key identifying identical requests
+            func (callable): Coroutine function computing the result
+            *args: Positional arguments for the function
+
+        Returns:
+            The result of the computation, shared by all callers of the same key
+        """
+        task = self._calls.get(key)
+        if task is None:
+            task = asyncio.ensure_future(func(*args))
+            self._calls[key] = task
+            task.add_done_callback(lambda finished: self._finish(key, finished))
+            self.executions += 1
+        else:
+            self.coalesced += 1
+        return await asyncio.shield(task)
+
+    def _finish(self, key, task):
+        """
+        Forget a finished computation so the next request for its key starts a new one.
+        """
+        if self._calls.get(key) is task:
+            del self._calls[key]
+        if not task.cancelled():
+            # Mark the exception as retrieved in case every caller was cancelled
+            task.exception()
+
+    def stats(self):
+        """
+        Get coalescing statistics.
+
+        Returns:
+            dict: Number of computations in flight, started and joined by other callers
+        """
+        return {
+            "in_flight": len(self._calls),
+            "executions": self.executions,
+            "coalesced": self.coalesced
+        }
+
+    def __len__(self):
+        return len(self._calls)
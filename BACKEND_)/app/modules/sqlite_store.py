@@ -0,0 +1,49 @@
+"""
+SQLite store module with the database setup shared by the SQLite caches.
+"""
+import os
+import sqlite3
+from contextlib import contextmanager
+
+@contextmanager
+def connect(path, timeout):
+    """
+    Open a connection to a database for one transaction and close it afterwards.
+
+    Args:
+        path (str): Path of the SQLite database file
+        timeout (float): Seconds to wait for a lock held by another process
+
+    Yields:
+        sqlite3.Connection: The connection, committed on success and rolled back on error
+    """
+    connection = sqlite3.connect(path, timeout=timeout)
+    try:
+        with connection:
+            yield connection
+    finally:
+        connection.close()
+
+def create_database(path, statements, timeout):
+    """
+    Create a database with its directory and tables if needed, and switch it to WAL mode.
+
+    WAL mode lets several uvicorn workers and threads read and write the same file,
+    with each operation opening its own connection.
+
+    Args:
+        path (str): Path of the SQLite database file; a bare file name is in the working directory
+        statements (list): CREATE ... IF NOT EXISTS statements of the schema
+        timeout (float): Seconds to wait for a lock held by another process
+
+    Raises:
+        sqlite3.Error: If the database cannot be opened or the schema cannot be created
+        OSError: If the directory cannot be created
+    """
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with connect(path, timeout) as connection:
+        connection.execute("PRAGMA journal_mode=WAL")
+        for statement in statements:
+            connection.execute(statement)
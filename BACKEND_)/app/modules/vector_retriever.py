@@ -1,56 +1,535 @@
 """
 Vector retriever module for embedding and retrieving text chunks.
 """
-from sentence_transformers import SentenceTransformer
 import faiss
 import numpy as np
+import hashlib
 import os
+import json
+import math
+import threading
+import time
+from app.modules.chunk_store import ChunkStore
+from app.modules.answer_cache import AnswerCache
+
+# The embedding model is optional: without it, retrievers built with model_name=None still
+# index and search precomputed embeddings, e.g. in benchmark_vector_retriever.py --synthetic
+try:
+    from sentence_transformers import SentenceTransformer
+    SENTENCE_TRANSFORMERS_AVAILABLE = True
+except ImportError:
+    SentenceTransformer = None
+    SENTENCE_TRANSFORMERS_AVAILABLE = False
+
+# Supported FAISS index types. All use inner product on unit-length embeddings, i.e. cosine similarity:
+#   flat     - exact brute-force search
+#   ivf_flat - inverted file; searches the nprobe closest of nlist clusters
+#   hnsw     - hierarchical navigable small world graph; efSearch trades speed for recall
+#   ivf_pq   - inverted file with product-quantized vectors; smallest and fastest, least exact
+#   sq8      - exact search over vectors stored as 8-bit scalar-quantized codes; 4x smaller than flat
+#   pq       - exact search over product-quantized codes of dimension / 8 bytes; 32x smaller than flat.
+#              Stored as an inverted file with a single list, as plain PQ indexes cannot filter by chunk ID
+INDEX_TYPES = ("flat", "ivf_flat", "hnsw", "ivf_pq", "sq8", "pq")
+
+# Minimum number of training vectors per k-means centroid, for IVF clusters and the 256 centroids of PQ codebooks
+MIN_POINTS_PER_CLUSTER = 39
+PQ_TRAINING_POINTS = MIN_POINTS_PER_CLUSTER * 256
+
+# Guards query embedding caches, which may be shared by retrievers used from several threads
+_query_cache_lock = threading.Lock()
+
+# Minimum cosine similarity of chunks returned by retrieve, equivalent to the former
+# maximum squared L2 distance of 1.8 between unit vectors; larger values make matching stricter
+MIN_RETRIEVE_SIMILARITY = 0.1
+
+# FAISS read flag that maps the vector codes of flat, scalar/product quantized and IVF indexes
+# from the index file instead of copying them to the heap. Added in FAISS 1.11; with older
+# versions load_index(mmap=True) logs that it reads the index into memory instead
+INDEX_MMAP_FLAG = getattr(faiss, "IO_FLAG_MMAP_IFC", None)
+
+# Maximum number of distinct filters whose FAISS ID selectors are kept for reuse
+MAX_CACHED_SELECTORS = 256
+
+def build_faiss_index(embeddings, index_type="flat", nlist=None, hnsw_m=32, pq_m=None, ids=None):
+    """
+    Build a FAISS inner product index over unit-length embeddings.
+
+    Index types that need training fall back to a simpler index when there are too
+    few embeddings to train them: ivf_pq to ivf_flat, ivf_flat to flat and pq to sq8.
+
+    Vectors are stored under explicit IDs so they can be added and removed later
+    without renumbering the rest. IVF indexes, including pq, keep IDs themselves; the
+    other index types are wrapped in an IndexIDMap.
+
+    Args:
+        embeddings (numpy.ndarray): float32 array of shape (count, dimension)
+        index_type (str): One of INDEX_TYPES
+        nlist (int, optional): Number of IVF clusters. Defaults to 4 * sqrt(count), limited by the training data
+        hnsw_m (int): Number of neighbours per node of an HNSW graph
+        pq_m (int, optional): Number of PQ sub-quantizers; must divide the dimension. Defaults to dimension / 8
+        ids (numpy.ndarray, optional): int64 ID of each embedding. Defaults to the row numbers
+
+    Returns:
+        faiss.Index: The trained index containing the embeddings
+    """
+    count, dimension = embeddings.shape
+    if index_type not in INDEX_TYPES:
+        print(f"Unknown vector index type '{index_type}', using flat")
+        index_type = "flat"
+
+    if index_type == "ivf_pq" and count < PQ_TRAINING_POINTS:
+        print(f"Too few vectors ({count}) to train an ivf_pq index, using ivf_flat")
+        index_type = "ivf_flat"
+    if index_type == "pq" and count < PQ_TRAINING_POINTS:
+        print(f"Too few vectors ({count}) to train a pq index, using sq8")
+        index_type = "sq8"
+    if index_type == "sq8" and count < 1:
+        index_type = "flat"
+    if index_type in ("ivf_flat", "ivf_pq"):
+        nlist = min(nlist or int(4 * math.sqrt(count)), count // MIN_POINTS_PER_CLUSTER)
+        if nlist < 1:
+            print(f"Too few vectors ({count}) to train an {index_type} index, using flat")
+            index_type = "flat"
+
+    if index_type in ("ivf_pq", "pq"):
+        # Each sub-quantizer encodes an equal share of the dimensions in 8 bits
+        pq_m = pq_m or max(1, dimension // 8)
+        while dimension % pq_m:
+            pq_m -= 1
+
+    if index_type == "flat":
+        index = faiss.IndexFlatIP(dimension)
+    elif index_type == "hnsw":
+        index = faiss.IndexHNSWFlat(dimension, hnsw_m, faiss.METRIC_INNER_PRODUCT)
+    elif index_type == "sq8":
+        index = faiss.IndexScalarQuantizer(dimension, faiss.ScalarQuantizer.QT_8bit, faiss.METRIC_INNER_PRODUCT)
+        index.train(embeddings)
+    else:
+        quantizer = faiss.IndexFlatIP(dimension)
+        if index_type == "ivf_flat":
+            index = faiss.IndexIVFFlat(quantizer, dimension, nlist, faiss.METRIC_INNER_PRODUCT)
+        else:
+            # A single list makes pq searches scan every code, like an exact search
+            index = faiss.IndexIVFPQ(quantizer, dimension, 1 if index_type == "pq" else nlist, pq_m, 8,
+                                     faiss.METRIC_INNER_PRODUCT)
+        index.train(embeddings)
+
+    if faiss.try_extract_index_ivf(index) is None:
+        index = faiss.IndexIDMap(index)
+    if ids is None:
+        ids = np.arange(count, dtype='int64')
+    index.add_with_ids(embeddings, np.ascontiguousarray(ids, dtype='int64'))
+    return index
+
+def dedup_signature(chunk):
+    """
+    Compute the signature used to detect nearly identical chunks.
+    
+    Chunks whose first 20 words in sorted lowercase order are the same share a signature.
+    
+    Args:
+        chunk (str): Chunk text, or None for a removed chunk
+        
+    Returns:
+        int: 64-bit hash of the chunk's words; 0 for a removed chunk
+    """
+    if chunk is None:
+        return 0
+    words = ' '.join(sorted(chunk.lower().split())[:20])
+    return int.from_bytes(hashlib.blake2b(words.encode("utf-8"), digest_size=8).digest(), "little")
+
+def dedup_signatures(chunks):
+    """
+    Compute the dedup signatures of chunks.
+    
+    Args:
+        chunks (iterable): Chunk texts, None for removed chunks
+        
+    Returns:
+        numpy.ndarray: uint64 signature of each chunk
+    """
+    return np.fromiter((dedup_signature(chunk) for chunk in chunks), dtype='uint64')
+
+def unwrap_index(index):
+    """
+    Get the index holding the vectors of an ID-mapped index.
+
+    Args:
+        index (faiss.Index): Index, possibly wrapped in an IndexIDMap or IndexIDMap2
+
+    Returns:
+        faiss.Index: The wrapped index, or the index itself if it is not wrapped
+    """
+    if isinstance(index, (faiss.IndexIDMap, faiss.IndexIDMap2)):
+        return faiss.downcast_index(index.index)
+    return index
 
 class VectorRetriever:
     """
     Class for embedding text chunks and retrieving the most similar chunks for a query.
     """
     
-    def __init__(self, model_name='all-MiniLM-L6-v2'):
+    def __init__(self, model_name='all-MiniLM-L6-v2', model=None, index_type="flat", nprobe=8, ef_search=64,
+                 embedding_cache=None, query_cache=None, query_cache_size=1024, pq_m=None):
         """
         Initialize the vector retriever with a sentence transformer model.
         
+        The model is loaded on first use; call warmup() to load it ahead of the first query.
+        
         Args:
-            model_name (str): Name of the sentence-transformers model to use
+            model_name (str): Name of the sentence-transformers model to use, or None for a retriever
+                without a model that only searches precomputed embeddings
+            model (SentenceTransformer, optional): Already loaded model to share instead of loading model_name
+            index_type (str): FAISS index type to build, one of INDEX_TYPES
+            nprobe (int): Number of clusters searched by IVF indexes
+            ef_search (int): Size of the candidate list searched by HNSW indexes
+            embedding_cache (EmbeddingCache, optional): Store of chunk embeddings by content, so
+                unchanged chunks are not encoded again
+            query_cache (AnswerCache, optional): Cache of query embeddings to share with other retrievers
+                using the same model. A new one holding query_cache_size queries is created if not given
+            query_cache_size (int): Maximum number of query embeddings kept by a new query cache
+            pq_m (int, optional): Bytes per vector of pq and ivf_pq indexes. Defaults to dimension / 8
         """
-        try:
-            self.model = SentenceTransformer(model_name)
-            self.chunks = []
-            self.index = None
-            self.dimension = None
-        except Exception as e:
-            print(f"Error initializing vector retriever: {e}")
-            # Set up a fallback to keyword-based matching if model loading fails
-            self.model = None
+        self.chunks = []  # Chunk texts by chunk ID; removed chunks leave None so IDs stay stable
+        self.metadata = []  # Metadata of each chunk (e.g., source file and paragraph), parallel to chunks
+        self.signatures = np.empty(0, dtype='uint64')  # Dedup signature of each chunk, parallel to chunks
+        self.index = None
+        self.mapped = False  # True while the index codes are memory-mapped from the saved index file
+        self._filter_cache = None  # Chunk IDs and ID selectors by file and section, built on first filtered search
+        self.dimension = None
+        self.model_name = model_name
+        self.index_type = index_type
+        self.nprobe = nprobe
+        self.ef_search = ef_search
+        self.pq_m = pq_m
+        self.embedding_cache = embedding_cache
+        self.query_cache = query_cache if query_cache is not None else AnswerCache(max_size=query_cache_size, ttl_seconds=0)
+        self._model = model
+        self._model_loaded = model is not None or model_name is None
+        self._model_lock = threading.Lock()
+        
+    @property
+    def model(self):
+        """
+        The sentence transformer model, loaded on first access; None if it cannot be loaded.
+        """
+        if not self._model_loaded:
+            with self._model_lock:
+                if not self._model_loaded:
+                    try:
+                        if not SENTENCE_TRANSFORMERS_AVAILABLE:
+                            raise ImportError("sentence-transformers is not installed")
+                        self._model = SentenceTransformer(self.model_name)
+                    except Exception as e:
+                        print(f"Error initializing vector retriever: {e}")
+                        # Set up a fallback to keyword-based matching if model loading fails
+                        self._model = None
+                    self._model_loaded = True
+        return self._model
+        
+    @model.setter
+    def model(self, model):
+        self._model = model
+        self._model_loaded = True
             
     def is_available(self):
         """
-        Check if the vector retriever model is available.
+        Check if the vector retriever model is available, loading it if needed.
         
         Returns:
             bool: True if the model is available, False otherwise
         """
         return self.model is not None
+        
+    def warmup(self):
+        """
+        Load the model and encode a sample query, so the first real query does not pay
+        for loading the model and initializing torch.
+        
+        Returns:
+            float: Seconds the warmup took, or None if the model is not available
+        """
+        start = time.perf_counter()
+        if self.encode(["warmup query"]) is None:
+            return None
+        return time.perf_counter() - start
+            
+    def encode(self, texts):
+        """
+        Encode texts to unit-length float32 embeddings.
+        
+        Args:
+            texts (list): List of texts to encode
+            
+        Returns:
+            numpy.ndarray: Array of shape (len(texts), dimension), or None if the model is not available
+        """
+        if not self.model:
+            print("Vector retriever model not available, cannot encode")
+            return None
+            
+        embeddings = np.array(self.model.encode(texts)).astype('float32')
+        faiss.normalize_L2(embeddings)
+        return embeddings
+        
+    def encode_queries(self, queries):
+        """
+        Encode queries, reusing the embeddings of recently seen queries.
+        
+        Queries are lowercased and their whitespace collapsed before encoding, so
+        trivial variations share a cache entry.
+        
+        Args:
+            queries (list): List of query texts
             
-    def add_chunks(self, chunks):
+        Returns:
+            numpy.ndarray: Unit-length float32 embeddings, or None if the model is not available
         """
-        Add text chunks to the retriever and build the FAISS index.
+        normalized = [' '.join(query.lower().split()) for query in queries]
+        with _query_cache_lock:
+            embeddings = [self.query_cache.get((self.model_name, query)) for query in normalized]
+        missing = list(dict.fromkeys(query for query, embedding in zip(normalized, embeddings) if embedding is None))
+        if missing:
+            encoded = self.encode(missing)
+            if encoded is None:
+                return None
+            encoded_by_query = dict(zip(missing, encoded))
+            with _query_cache_lock:
+                for query, embedding in encoded_by_query.items():
+                    self.query_cache.set((self.model_name, query), embedding)
+            embeddings = [embedding if embedding is not None else encoded_by_query[query]
+                          for query, embedding in zip(normalized, embeddings)]
+        if not embeddings:
+            return np.empty((0, self.dimension or 0), dtype='float32')
+        return np.vstack(embeddings).astype('float32')
+        
+    def embed_chunks(self, chunks):
+        """
+        Get the embeddings of chunks, encoding only those not found in the embedding cache.
+        
+        Args:
+            chunks (list): List of chunk texts
+            
+        Returns:
+            numpy.ndarray: Unit-length float32 embeddings, or None if the model is not available
+        """
+        if not chunks:
+            return np.empty((0, self.dimension or 0), dtype='float32')
+        cached = self.embedding_cache.get_many(self.model_name, chunks) if self.embedding_cache is not None else [None] * len(chunks)
+        missing = [position for position, embedding in enumerate(cached) if embedding is None]
+        if missing:
+            encoded = self.encode([chunks[position] for position in missing])
+            if encoded is None:
+                return None
+            for position, embedding in zip(missing, encoded):
+                cached[position] = embedding
+            if self.embedding_cache is not None:
+                self.embedding_cache.set_many(self.model_name, [chunks[position] for position in missing], encoded)
+        return np.vstack(cached).astype('float32')
+        
+    def add_chunks(self, chunks, metadata=None):
+        """
+        Replace the chunks of the retriever and build the FAISS index.
+        
+        Args:
+            chunks (list): List of text chunks to add
+            metadata (list, optional): Dictionary for each chunk (e.g., {"file_id": ...}), kept
+                for every segment a long chunk is split into
+        """
+        if not self.model:
+            print("Vector retriever model not available, cannot add chunks")
+            return
+            
+        self.chunks = []
+        self.metadata = []
+        self.signatures = np.empty(0, dtype='uint64')
+        self.index = None
+        self.mapped = False
+        self._filter_cache = None
+        chunk_ids = self.insert_chunks(chunks, metadata)
+        
+        print(f"Added {len(chunk_ids)} chunks to vector retriever")
+        
+    def insert_chunks(self, chunks, metadata=None):
+        """
+        Add text chunks to the existing index, keeping the chunks already in it.
+        
+        Only chunks whose embeddings are not cached are encoded. The first call builds
+        the index; later calls add to it in place, so IVF indexes keep the clusters
+        they were trained with.
         
         Args:
             chunks (list): List of text chunks to add
+            metadata (list, optional): Dictionary for each chunk, as for add_chunks
+            
+        Returns:
+            list: IDs of the added chunks, one per segment
         """
         if not self.model:
             print("Vector retriever model not available, cannot add chunks")
+            return []
+            
+        segments, segment_metadata = self._split_chunks(chunks, metadata)
+        if not segments:
+            return []
+        embeddings = self.embed_chunks(segments)
+        chunk_ids = np.arange(len(self.chunks), len(self.chunks) + len(segments), dtype='int64')
+        self.chunks.extend(segments)
+        self.metadata.extend(segment_metadata)
+        self.signatures = np.concatenate([self.signatures, dedup_signatures(segments)])
+        self._filter_cache = None
+        
+        if self.index is None:
+            self.build_index(embeddings, chunk_ids)
+        else:
+            self._ensure_writable()
+            self._ensure_id_map()
+            self.index.add_with_ids(embeddings, chunk_ids)
+        return chunk_ids.tolist()
+        
+    def remove_chunks(self, chunk_ids):
+        """
+        Remove chunks from the index.
+        
+        Chunk IDs are never reused. Flat and IVF indexes remove the vectors in place;
+        HNSW graphs cannot drop nodes, so they are rebuilt from the stored vectors of
+        the remaining chunks without encoding anything again.
+        
+        Args:
+            chunk_ids (iterable): IDs of the chunks to remove
+            
+        Returns:
+            int: Number of chunks removed
+        """
+        removed = sorted({int(chunk_id) for chunk_id in chunk_ids
+                          if 0 <= chunk_id < len(self.metadata) and self.metadata[chunk_id] is not None})
+        if not removed or self.index is None:
+            return 0
+            
+        self._ensure_writable()
+        self._ensure_id_map()
+        if isinstance(unwrap_index(self.index), faiss.IndexHNSW):
+            ids, vectors = self._stored_vectors()
+            keep = ~np.isin(ids, removed)
+            self.build_index(vectors[keep], ids[keep])
+        else:
+            self.index.remove_ids(np.array(removed, dtype='int64'))
+            
+        for chunk_id in removed:
+            self.chunks[chunk_id] = None
+            self.metadata[chunk_id] = None
+        self._filter_cache = None
+        return len(removed)
+        
+    def remove_file(self, file_id):
+        """
+        Remove all chunks whose metadata "file_id" matches a file.
+        
+        Args:
+            file_id (str): Identifier of the source file
+            
+        Returns:
+            int: Number of chunks removed
+        """
+        return self.remove_chunks([chunk_id for chunk_id, chunk_metadata in enumerate(self.metadata)
+                                   if chunk_metadata is not None and chunk_metadata.get("file_id") == file_id])
+        
+    def copy(self):
+        """
+        Create a copy of the retriever that can be changed without affecting this one.
+        
+        The model, embedding cache and query cache are shared; the index is cloned,
+        and a memory-mapped index is copied into memory.
+        
+        Returns:
+            VectorRetriever: The copy
+        """
+        retriever = VectorRetriever(model_name=None, index_type=self.index_type, nprobe=self.nprobe,
+                                    ef_search=self.ef_search, embedding_cache=self.embedding_cache,
+                                    query_cache=self.query_cache, pq_m=self.pq_m)
+        retriever.model = self.model
+        retriever.model_name = self.model_name
+        retriever.chunks = self.chunks.copy()
+        retriever.metadata = list(self.metadata)
+        retriever.signatures = self.signatures  # Never modified in place
+        retriever.dimension = self.dimension
+        if self.index is not None:
+            retriever.index = self._clone_index()
+            retriever.set_search_parameters()
+        return retriever
+        
+    def _clone_index(self):
+        """
+        Copy the index into memory that can be changed.
+        
+        Clones of a memory-mapped index still read the mapped codes, and FAISS aborts
+        the process when codes it does not own are resized, so mapped indexes are copied
+        by serializing them instead.
+        
+        Returns:
+            faiss.Index: The copy
+        """
+        if self.mapped:
+            return faiss.deserialize_index(faiss.serialize_index(self.index))
+        return faiss.clone_index(self.index)
+        
+    def _ensure_writable(self):
+        """
+        Replace a memory-mapped index by a copy in memory before it is changed.
+        """
+        if self.mapped:
+            self.index = self._clone_index()
+            self.mapped = False
+            self.set_search_parameters()
+        
+    def _stored_vectors(self):
+        """
+        Read the IDs and vectors of a flat or HNSW index back from it.
+        
+        Returns:
+            tuple: (ids, vectors) arrays
+        """
+        base = unwrap_index(self.index)
+        vectors = base.reconstruct_n(0, base.ntotal) if base.ntotal else np.empty((0, self.index.d), dtype='float32')
+        if base is self.index:
+            ids = np.arange(base.ntotal, dtype='int64')
+        else:
+            ids = faiss.vector_to_array(self.index.id_map).astype('int64')
+        return ids, vectors
+        
+    def _ensure_id_map(self):
+        """
+        Convert an index saved without chunk IDs, so chunks can be added and removed by ID.
+        
+        Indexes from before chunk IDs use row numbers, which equal the chunk IDs, and
+        flat L2 ones are rebuilt with inner product like new indexes.
+        """
+        if isinstance(self.index, (faiss.IndexIDMap, faiss.IndexIDMap2)) or faiss.try_extract_index_ivf(self.index) is not None:
             return
+        ids, vectors = self._stored_vectors()
+        vectors = np.ascontiguousarray(vectors, dtype='float32')
+        faiss.normalize_L2(vectors)
+        self.build_index(vectors, ids)
+        
+    def _split_chunks(self, chunks, metadata=None):
+        """
+        Split very long chunks into segments of about 500 characters at sentence ends.
+        
+        Args:
+            chunks (list): List of text chunks
+            metadata (list, optional): Dictionary for each chunk, copied to each of its segments
+            
+        Returns:
+            tuple: (segments, segment metadata) lists
+        """
+        if metadata is None:
+            metadata = [{} for _ in chunks]
             
         # Remove any extremely long chunks (likely full documents)
         filtered_chunks = []
-        for chunk in chunks:
+        filtered_metadata = []
+        for chunk, chunk_metadata in zip(chunks, metadata):
+            segment_count = len(filtered_chunks)
             # Split very long chunks into smaller ones if needed
             if len(chunk) > 1000:
                 # Try to find natural break points at sentence endings
@@ -69,93 +548,318 @@ class VectorRetriever:
                     filtered_chunks.append(current_segment.strip())
             else:
                 filtered_chunks.append(chunk)
+            filtered_metadata.extend([chunk_metadata] * (len(filtered_chunks) - segment_count))
                 
-        self.chunks = filtered_chunks
+        return filtered_chunks, filtered_metadata
+        
+    def build_index(self, embeddings, ids=None):
+        """
+        Build the FAISS index of the configured type over chunk embeddings.
         
-        # Encode all chunks to vector embeddings
-        embeddings = self.model.encode(filtered_chunks)
+        Args:
+            embeddings (numpy.ndarray): Unit-length float32 embeddings, one row per chunk
+            ids (numpy.ndarray, optional): Chunk ID of each row. Defaults to the row numbers
+        """
         self.dimension = embeddings.shape[1]
+        self.mapped = False
+        self.index = build_faiss_index(embeddings, self.index_type, pq_m=self.pq_m, ids=ids)
+        self.set_search_parameters(self.nprobe, self.ef_search)
+        
+    def set_search_parameters(self, nprobe=None, ef_search=None):
+        """
+        Tune the speed/recall trade-off of approximate indexes.
+        
+        Args:
+            nprobe (int, optional): Number of clusters searched by IVF indexes
+            ef_search (int, optional): Size of the candidate list searched by HNSW indexes
+        """
+        if nprobe is not None:
+            self.nprobe = nprobe
+        if ef_search is not None:
+            self.ef_search = ef_search
+        if self.index is None:
+            return
+            
+        ivf_index = faiss.try_extract_index_ivf(self.index)
+        if ivf_index is not None:
+            ivf_index.nprobe = self.nprobe
+        base = unwrap_index(self.index)
+        if isinstance(base, faiss.IndexHNSW):
+            base.hnsw.efSearch = self.ef_search
+            
+    def memory_report(self):
+        """
+        Report the memory taken by the index compared with storing the embeddings as float32.
         
-        # Create a FAISS index for fast similarity search
-        self.index = faiss.IndexFlatL2(self.dimension)
-        self.index.add(np.array(embeddings).astype('float32'))
+        Index sizes are measured as the serialized size of the index, which includes
+        codebooks, graph links and chunk IDs.
         
-        print(f"Added {len(filtered_chunks)} chunks to vector retriever")
+        Returns:
+            dict: Configured index type, class of the built index, whether it is memory-mapped,
+                vector count, dimension, index bytes, bytes per vector, float32 bytes and the
+                compression ratio
+        """
+        report = {
+            "index_type": self.index_type,
+            "index_class": None,
+            "mapped": self.mapped,
+            "vectors": 0,
+            "dimension": self.dimension,
+            "index_bytes": 0,
+            "bytes_per_vector": 0.0,
+            "float32_bytes": 0,
+            "compression": None,
+            "signature_bytes": int(self.signatures.nbytes)
+        }
+        if self.index is None:
+            return report
+            
+        index_bytes = int(faiss.serialize_index(self.index).nbytes)
+        float32_bytes = self.index.ntotal * self.index.d * 4
+        report.update({
+            "index_class": type(unwrap_index(self.index)).__name__,
+            "vectors": int(self.index.ntotal),
+            "dimension": int(self.index.d),
+            "index_bytes": index_bytes,
+            "bytes_per_vector": index_bytes / self.index.ntotal if self.index.ntotal else 0.0,
+            "float32_bytes": float32_bytes,
+            "compression": float32_bytes / index_bytes if index_bytes else None
+        })
+        return report
         
-    def retrieve(self, query, top_k=3):
+    def search_embeddings(self, query_embeddings, top_k, selector=None):
         """
-        Retrieve the most relevant chunks for a query.
+        Search the index with precomputed query embeddings.
         
         Args:
-            query (str): The query text
-            top_k (int): Number of top chunks to retrieve
+            query_embeddings (numpy.ndarray): Unit-length float32 embeddings, one row per query
+            top_k (int): Number of chunks to return per query
+            selector (faiss.IDSelector, optional): Only return chunks whose IDs it selects, see id_selector()
             
         Returns:
-            list: List of most relevant text chunks
+            tuple: (similarities, indices) arrays of shape (queries, top_k); missing results have index -1
         """
-        if not self.model or not self.index:
-            print("Vector retriever model or index not available, cannot retrieve")
-            return []
-            
-        # Extract key terms from the query for additional filtering
-        query_terms = set([term.lower() for term in query.split() if len(term) > 2])  # Reduced minimum term length
+        if selector is None:
+            scores, indices = self.index.search(query_embeddings, top_k)
+        else:
+            scores, indices = self.index.search(query_embeddings, top_k, params=self._search_parameters(selector))
+        return self.to_similarities(scores), indices
         
-        # Encode the query to a vector embedding
-        query_embedding = self.model.encode([query])
+    def _search_parameters(self, selector):
+        """
+        Create FAISS search parameters that apply an ID selector with the configured nprobe and efSearch.
         
-        # Search the FAISS index for similar chunks - get more than we need for post-filtering
-        initial_k = min(top_k * 3, len(self.chunks))  # Increased initial retrieval
-        distances, indices = self.index.search(
-            np.array(query_embedding).astype('float32'), 
-            initial_k
-        )
+        Search parameters replace the values set on the index, so they are passed again.
         
-        # Define a maximum distance (L2 distance) threshold
-        # Higher L2 distance means less similar, so we want to reject those above the threshold
-        max_distance_threshold = 1.8  # Adjust based on testing - smaller values make matching stricter
+        Args:
+            selector (faiss.IDSelector): Selector of the chunk IDs to search
+            
+        Returns:
+            faiss.SearchParameters: Parameters for index.search
+        """
+        if faiss.try_extract_index_ivf(self.index) is not None:
+            return faiss.SearchParametersIVF(sel=selector, nprobe=self.nprobe)
+        if isinstance(unwrap_index(self.index), faiss.IndexHNSW):
+            return faiss.SearchParametersHNSW(sel=selector, efSearch=self.ef_search)
+        return faiss.SearchParameters(sel=selector)
         
-        # Post-process results by checking term overlap and deduplicating similar content
-        filtered_chunks = []
-        seen_content = set()
+    def _build_filter_cache(self):
+        """
+        Group the IDs of the indexed chunks by file and by section.
         
-        for i, dist in zip(indices[0], distances[0]):
-            # Skip chunks with distance above threshold
-            if dist > max_distance_threshold:
+        Returns:
+            dict: "files" maps file IDs and "sections" maps (file ID, section ID) pairs to
+                sorted int64 arrays of chunk IDs, "untagged" tells if some chunks have no file ID
+                and "selectors" holds ID selectors built from the arrays
+        """
+        files = {}
+        sections = {}
+        untagged = False
+        for chunk_id, chunk_metadata in enumerate(self.metadata):
+            if chunk_metadata is None:
                 continue
-                
-            chunk = self.chunks[i]
+            file_id = chunk_metadata.get("file_id")
+            if file_id is None:
+                untagged = True
+                continue
+            files.setdefault(file_id, []).append(chunk_id)
+            # Indexes saved before chunks were tagged with sections have no section IDs
+            section_id = chunk_metadata.get("section_id")
+            if section_id is not None:
+                sections.setdefault((file_id, section_id), []).append(chunk_id)
+        return {
+            "files": {key: np.array(ids, dtype='int64') for key, ids in files.items()},
+            "sections": {key: np.array(ids, dtype='int64') for key, ids in sections.items()},
+            "untagged": untagged,
+            "selectors": {}
+        }
+        
+    def id_selector(self, file_ids=None, section_ids=None):
+        """
+        Get a FAISS ID selector for the chunks of some files or sections.
+        
+        Chunk IDs are grouped by file and section once per change of the chunks, and
+        selectors are cached per filter, so repeated filtered searches only pay for
+        the search itself.
+        
+        Args:
+            file_ids (iterable, optional): Only select chunks whose metadata "file_id" is in this set
+            section_ids (iterable, optional): Only select chunks in these (file ID, section ID) pairs
             
-            # Create a simple hash of content to avoid nearly identical chunks
-            content_hash = ' '.join(sorted(chunk.lower().split())[:20])
+        Returns:
+            tuple: (selector, number of selected chunks); the selector is None if all or no chunks are selected
+        """
+        if file_ids is None and section_ids is None:
+            return None, self.index.ntotal
             
-            # Skip if we've seen very similar content
-            if content_hash in seen_content:
-                continue
+        cache = self._filter_cache
+        if cache is None:
+            cache = self._build_filter_cache()
+            self._filter_cache = cache
+        file_key = frozenset(file_ids) if file_ids is not None else None
+        section_key = frozenset(tuple(section) for section in section_ids) if section_ids is not None else None
+        # Filtering by every indexed file selects everything
+        if section_key is None and not cache["untagged"] and file_key.issuperset(cache["files"]):
+            return None, self.index.ntotal
             
-            # Calculate overlap with query terms
-            chunk_terms = set([term.lower() for term in chunk.split() if len(term) > 2])  # Reduced minimum term length
-            term_overlap = len(query_terms.intersection(chunk_terms))
+        cached = cache["selectors"].get((file_key, section_key))
+        if cached is not None:
+            return cached
             
-            # Prioritize chunks with term overlap but don't exclude chunks without overlap
-            if term_overlap > 0 or len(filtered_chunks) < top_k:
-                filtered_chunks.append(chunk)
-                seen_content.add(content_hash)
-                
-                if len(filtered_chunks) >= top_k:
-                    break
+        empty = np.empty(0, dtype='int64')
+        ids = None
+        if file_key is not None:
+            ids = np.concatenate([empty] + [cache["files"][file_id] for file_id in file_key if file_id in cache["files"]])
+        if section_key is not None:
+            section_chunk_ids = np.concatenate([empty] + [cache["sections"][section] for section in section_key
+                                                          if section in cache["sections"]])
+            ids = section_chunk_ids if ids is None else np.intersect1d(ids, section_chunk_ids)
+        selected = (faiss.IDSelectorBatch(ids) if len(ids) else None, len(ids))
+        
+        if len(cache["selectors"]) >= MAX_CACHED_SELECTORS:
+            cache["selectors"].clear()
+        cache["selectors"][(file_key, section_key)] = selected
+        return selected
+        
+    def to_similarities(self, scores):
+        """
+        Convert FAISS search scores to cosine similarities.
         
-        # If we didn't get enough chunks, fall back to original order but still respect distance threshold
-        if not filtered_chunks and indices.size > 0:
-            for i, dist in zip(indices[0], distances[0]):
-                if dist <= max_distance_threshold and len(filtered_chunks) < top_k:
-                    filtered_chunks.append(self.chunks[i])
+        Indexes saved before the switch to inner product use squared L2 distance,
+        which for unit vectors is 2 - 2 * cosine similarity.
+        
+        Args:
+            scores (numpy.ndarray): Scores returned by index.search
             
-        return filtered_chunks
-    
+        Returns:
+            numpy.ndarray: Cosine similarities
+        """
+        if self.index is not None and self.index.metric_type == faiss.METRIC_L2:
+            return 1.0 - scores / 2.0
+        return scores
+        
+    def search(self, query, top_k=10, file_ids=None, query_embedding=None, section_ids=None):
+        """
+        Rank chunks by similarity to a query, optionally only those from some files or sections.
+        
+        Filters are applied by FAISS during the search, so chunks of other files are never
+        returned as candidates. IVF and HNSW indexes only visit nprobe clusters or efSearch
+        nodes, so they may return fewer than top_k chunks of a small filter.
+        
+        Args:
+            query (str): The query text
+            top_k (int): Number of chunks to return
+            file_ids (iterable, optional): Only return chunks whose metadata "file_id" is in this set
+            query_embedding (numpy.ndarray, optional): Embedding of the query from encode(), e.g. one row
+                of a batch encoded for several queries; the query is encoded if not given
+            section_ids (iterable, optional): Only return chunks in these (file ID, section ID) pairs
+            
+        Returns:
+            list: List of (cosine similarity, chunk index) tuples, most similar first
+        """
+        if not self.model or not self.index or not self.index.ntotal:
+            return []
+            
+        selector, selected_count = self.id_selector(file_ids, section_ids)
+        fetch_k = min(top_k, selected_count)
+        if fetch_k <= 0:
+            return []
+        if query_embedding is None:
+            query_embedding = self.encode_queries([query])
+        query_embedding = np.ascontiguousarray(query_embedding, dtype='float32').reshape(1, -1)
+        similarities, indices = self.search_embeddings(query_embedding, fetch_k, selector)
+        return [(float(similarity), int(chunk_index)) for similarity, chunk_index in zip(similarities[0], indices[0])
+                if chunk_index >= 0]
+        
+    def retrieve(self, query, top_k=3, file_ids=None, section_ids=None):
+        """
+        Retrieve the most relevant chunks for a query.
+        
+        Args:
+            query (str): The query text
+            top_k (int): Number of top chunks to retrieve
+            file_ids (iterable, optional): Only retrieve chunks whose metadata "file_id" is in this set
+            section_ids (iterable, optional): Only retrieve chunks in these (file ID, section ID) pairs
+            
+        Returns:
+            list: List of most relevant text chunks
+        """
+        return self.retrieve_many([query], top_k, file_ids, section_ids)[0]
+        
+    def retrieve_many(self, queries, top_k=3, file_ids=None, section_ids=None):
+        """
+        Retrieve the most relevant chunks for several queries at once.
+        
+        All queries are encoded in one batch and searched with one index search.
+        Each query keeps its hits above the similarity threshold, skips chunks whose
+        content signature was already returned for it, and stops at top_k.
+        
+        Args:
+            queries (list): List of query texts
+            top_k (int): Number of top chunks to retrieve per query
+            file_ids (iterable, optional): Only retrieve chunks whose metadata "file_id" is in this set
+            section_ids (iterable, optional): Only retrieve chunks in these (file ID, section ID) pairs
+            
+        Returns:
+            list: List of most relevant text chunks for each query, in query order
+        """
+        if not self.model or not self.index:
+            print("Vector retriever model or index not available, cannot retrieve")
+            return [[] for _ in queries]
+            
+        # Get more hits than we need for post-filtering
+        selector, selected_count = self.id_selector(file_ids, section_ids)
+        initial_k = min(top_k * 3, self.index.ntotal, selected_count)
+        if not queries or initial_k <= 0:
+            return [[] for _ in queries]
+        similarities, indices = self.search_embeddings(self.encode_queries(queries), initial_k, selector)
+        
+        # Skip chunks below the similarity threshold and missing results of approximate indexes
+        keep = (indices >= 0) & (similarities >= MIN_RETRIEVE_SIMILARITY)
+        
+        # Keep the first hit of each content signature per query to avoid nearly identical chunks:
+        # sorted by query, signature and position, the first hit of each group is the most similar one
+        positions = np.flatnonzero(keep)
+        rows = positions // initial_k
+        signatures = self.signatures[indices.ravel()[positions]]
+        order = np.lexsort((positions, signatures, rows))
+        first = np.ones(len(order), dtype=bool)
+        first[1:] = (rows[order][1:] != rows[order][:-1]) | (signatures[order][1:] != signatures[order][:-1])
+        keep = np.zeros(indices.size, dtype=bool)
+        keep[positions[order[first]]] = True
+        keep = keep.reshape(indices.shape)
+        keep &= np.cumsum(keep, axis=1) <= top_k
+        
+        return [[self.chunks[chunk_id] for chunk_id in row_indices[row_keep]]
+                for row_indices, row_keep in zip(indices, keep)]
+        
     def save_index(self, directory):
         """
         Save the FAISS index and chunks to disk.
         
+        Chunks are written to a ChunkStore, which replaces the chunks.txt and
+        metadata.json files of older saved indexes.
+        
         Args:
             directory (str): Directory to save the index and chunks
         """
@@ -165,41 +869,121 @@ class VectorRetriever:
             
         os.makedirs(directory, exist_ok=True)
         
-        # Save the FAISS index
-        faiss.write_index(self.index, os.path.join(directory, "index.faiss"))
-        
-        # Save the chunks
-        with open(os.path.join(directory, "chunks.txt"), "w", encoding="utf-8") as f:
-            for chunk in self.chunks:
-                f.write(chunk + "\n===CHUNK_SEPARATOR===\n")
+        # Save the FAISS index and the configuration it was built with
+        # Replace the index file instead of overwriting it, as processes may have it memory-mapped
+        index_path = os.path.join(directory, "index.faiss")
+        temporary_path = f"{index_path}.{os.getpid()}.tmp"
+        faiss.write_index(self.index, temporary_path)
+        os.replace(temporary_path, index_path)
+        with open(os.path.join(directory, "config.json"), "w", encoding="utf-8") as f:
+            json.dump({"index_type": self.index_type, "dimension": self.dimension}, f)
+            
+        # Save the chunks and their metadata, tied to the index by its checksum
+        ChunkStore(directory).save(self.chunks, self.metadata, index_path, self.signatures)
+        for legacy_file in ("chunks.txt", "metadata.json"):
+            if os.path.exists(os.path.join(directory, legacy_file)):
+                os.remove(os.path.join(directory, legacy_file))
                 
-        print(f"Saved vector index and {len(self.chunks)} chunks to {directory}")
+        print(f"Saved vector index and {self.index.ntotal} chunks to {directory}")
         
-    def load_index(self, directory):
+    def load_index(self, directory, mmap=False):
         """
         Load the FAISS index and chunks from disk.
         
+        Chunk texts stay in a memory map and are decoded when a chunk is read.
+        Indexes saved in the older chunks.txt format are still loaded.
+        
+        With mmap the vector codes of the index are memory-mapped from index.faiss too,
+        so workers loading the same index share its pages through the page cache and
+        only the pages searches touch are read. HNSW graph links are still read into
+        memory. The index is copied into memory the first time chunks are added or removed.
+        
         Args:
             directory (str): Directory containing the saved index and chunks
+            mmap (bool): Memory-map the index instead of reading it into memory, if FAISS supports it
+            
+        Returns:
+            bool: True if the index was loaded
         """
         if not self.model:
             print("Vector retriever model not available, cannot load index")
-            return
+            return False
             
         index_path = os.path.join(directory, "index.faiss")
         chunks_path = os.path.join(directory, "chunks.txt")
+        chunk_store = ChunkStore(directory)
         
-        if os.path.exists(index_path) and os.path.exists(chunks_path):
-            # Load the FAISS index
-            self.index = faiss.read_index(index_path)
+        if not os.path.exists(index_path) or not (chunk_store.exists() or os.path.exists(chunks_path)):
+            print(f"Index or chunks file not found in {directory}")
+            return False
             
-            # Load the chunks
-            with open(chunks_path, "r", encoding="utf-8") as f:
-                content = f.read()
-                self.chunks = content.split("\n===CHUNK_SEPARATOR===\n")[:-1]  # Remove the last empty chunk
-                
-            print(f"Loaded vector index and {len(self.chunks)} chunks from {directory}")
-            return True
+        if chunk_store.exists():
+            loaded = chunk_store.load(index_path)
+            if loaded is None:
+                return False
+            chunks, metadata, signatures = loaded
         else:
-            print(f"Index or chunks file not found in {directory}")
-            return False 
\ No newline at end of file
+            chunks, metadata = self._load_legacy_chunks(directory)
+            signatures = None
+        if signatures is None:
+            signatures = dedup_signatures(chunks)
+            
+        # Load the FAISS index and the configuration it was built with
+        index = None
+        mapped = False
+        if mmap and INDEX_MMAP_FLAG is None:
+            print(f"FAISS {faiss.__version__} cannot memory-map indexes, reading {index_path} into memory")
+        elif mmap:
+            try:
+                index = faiss.read_index(index_path, INDEX_MMAP_FLAG)
+                mapped = True
+            except RuntimeError as e:
+                print(f"Error memory-mapping {index_path}, reading it into memory: {e}")
+        if index is None:
+            index = faiss.read_index(index_path)
+        if isinstance(unwrap_index(index), faiss.IndexPQ):
+            print(f"Vector index in {directory} cannot be searched by file or section, it needs to be rebuilt")
+            return False
+        self.index = index
+        self.mapped = mapped
+        self.dimension = self.index.d
+        config_path = os.path.join(directory, "config.json")
+        if os.path.exists(config_path):
+            with open(config_path, "r", encoding="utf-8") as f:
+                self.index_type = json.load(f).get("index_type", "flat")
+        else:
+            self.index_type = "flat"
+        self.set_search_parameters()
+        self.chunks = chunks
+        self.metadata = metadata
+        self.signatures = signatures
+        self._filter_cache = None
+        
+        print(f"Loaded {'memory-mapped ' if self.mapped else ''}vector index and {self.index.ntotal} chunks from {directory}")
+        return True
+        
+    @staticmethod
+    def _load_legacy_chunks(directory):
+        """
+        Read chunks saved as chunks.txt with separator lines, and the optional metadata.json.
+        
+        Args:
+            directory (str): Directory containing the saved chunks
+            
+        Returns:
+            tuple: (chunks, metadata) lists
+        """
+        with open(os.path.join(directory, "chunks.txt"), "r", encoding="utf-8") as f:
+            content = f.read()
+            chunks = content.split("\n===CHUNK_SEPARATOR===\n")[:-1]  # Remove the last empty chunk
+            
+        # Load the chunk metadata, which older saved indexes do not have
+        metadata_path = os.path.join(directory, "metadata.json")
+        if os.path.exists(metadata_path):
+            with open(metadata_path, "r", encoding="utf-8") as f:
+                metadata = json.load(f)
+            chunks = [chunk if chunk_metadata is not None else None
+                      for chunk, chunk_metadata in zip(chunks, metadata)]
+        else:
+            metadata = [{} for _ in chunks]
+        return chunks, metadata
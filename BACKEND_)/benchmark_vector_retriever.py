@@ -0,0 +1,145 @@
+"""
+Benchmark script for the vector index types of VectorRetriever.
+
+Reports recall@k against exact (flat) search, query latency, build time and index
+memory for each index type and search parameter. By default the paragraphs of the data
+files are embedded with the retriever's model; --synthetic benchmarks random
+clustered embeddings instead, to see how the index types behave at scale.
+
+Usage:
+    python benchmark_vector_retriever.py
+    python benchmark_vector_retriever.py --synthetic 100000 --queries 500 --k 10
+"""
+import argparse
+import os
+import time
+import numpy as np
+from app.modules.text_extractor import TextExtractor
+from app.modules.paragraph_store import ParagraphStore
+from app.modules.vector_retriever import VectorRetriever
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "app", "data")
+
+def load_corpus_embeddings():
+    """
+    Embed the paragraphs of all data files.
+
+    Returns:
+        numpy.ndarray: Unit-length embeddings of the paragraphs
+    """
+    extractor = TextExtractor()
+    store = ParagraphStore()
+    for file_name in sorted(os.listdir(DATA_DIR)):
+        if file_name.endswith('.txt'):
+            store.add_document(file_name, extractor.extract_from_text_file(os.path.join(DATA_DIR, file_name)))
+
+    retriever = VectorRetriever()
+    if not retriever.is_available():
+        raise SystemExit("The embedding model is not available; use --synthetic")
+    print(f"Embedding {len(store)} paragraphs...")
+    return retriever.encode([paragraph.text for paragraph in store.iter_paragraphs()])
+
+def make_synthetic_embeddings(count, dimension, seed=0):
+    """
+    Create clustered random unit-length embeddings, resembling sentence embeddings of a corpus.
+
+    Args:
+        count (int): Number of embeddings
+        dimension (int): Embedding dimension
+        seed (int): Random seed
+
+    Returns:
+        numpy.ndarray: Unit-length float32 embeddings
+    """
+    rng = np.random.default_rng(seed)
+    centers = rng.standard_normal((max(1, count // 100), dimension)).astype('float32')
+    embeddings = centers[rng.integers(0, len(centers), count)] + 0.6 * rng.standard_normal((count, dimension)).astype('float32')
+    return normalize(embeddings)
+
+def make_queries(embeddings, count, seed=1):
+    """
+    Create queries near random corpus embeddings.
+
+    Args:
+        embeddings (numpy.ndarray): Corpus embeddings
+        count (int): Number of queries
+        seed (int): Random seed
+
+    Returns:
+        numpy.ndarray: Unit-length float32 query embeddings
+    """
+    rng = np.random.default_rng(seed)
+    queries = embeddings[rng.integers(0, len(embeddings), count)]
+    return normalize(queries + 0.05 * rng.standard_normal(queries.shape).astype('float32'))
+
+def normalize(embeddings):
+    """
+    Scale embeddings to unit length.
+    """
+    embeddings = np.ascontiguousarray(embeddings, dtype='float32')
+    return embeddings / np.linalg.norm(embeddings, axis=1, keepdims=True)
+
+def measure(retriever, queries, k, exact_indices):
+    """
+    Measure recall and latency of single-query searches.
+
+    Args:
+        retriever (VectorRetriever): Retriever with a built index
+        queries (numpy.ndarray): Query embeddings
+        k (int): Number of results per query
+        exact_indices (numpy.ndarray): Results of exact search, shape (queries, k)
+
+    Returns:
+        tuple: (recall@k, mean latency in ms, 95th percentile latency in ms)
+    """
+    latencies = []
+    hits = 0
+    for query, exact in zip(queries, exact_indices):
+        start = time.perf_counter()
+        _, indices = retriever.search_embeddings(query.reshape(1, -1), k)
+        latencies.append((time.perf_counter() - start) * 1000)
+        hits += len(set(indices[0][indices[0] >= 0]) & set(exact))
+    return hits / exact_indices.size, float(np.mean(latencies)), float(np.percentile(latencies, 95))
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark VectorRetriever index types")
+    parser.add_argument("--synthetic", type=int, default=0, help="Number of synthetic embeddings instead of the data files")
+    parser.add_argument("--dimension", type=int, default=384, help="Dimension of synthetic embeddings")
+    parser.add_argument("--queries", type=int, default=200, help="Number of queries")
+    parser.add_argument("--k", type=int, default=10, help="Number of results per query")
+    args = parser.parse_args()
+
+    embeddings = make_synthetic_embeddings(args.synthetic, args.dimension) if args.synthetic else load_corpus_embeddings()
+    queries = make_queries(embeddings, args.queries)
+    k = min(args.k, len(embeddings))
+    print(f"{len(embeddings)} vectors of dimension {embeddings.shape[1]}, {len(queries)} queries, k={k}\n")
+
+    configurations = [("flat", {})]
+    configurations += [("ivf_flat", {"nprobe": nprobe}) for nprobe in (1, 4, 16, 64)]
+    configurations += [("hnsw", {"ef_search": ef_search}) for ef_search in (16, 64, 256)]
+    configurations += [("ivf_pq", {"nprobe": nprobe}) for nprobe in (4, 16, 64)]
+    configurations += [("sq8", {}), ("pq", {})]
+
+    exact_indices = None
+    built = {}
+    print(f"{'index':<10} {'parameters':<16} {'build s':>8} {'recall@' + str(k):>10} {'mean ms':>9} {'p95 ms':>8} "
+          f"{'index MB':>9} {'vs f32':>7}")
+    for index_type, parameters in configurations:
+        if index_type not in built:
+            retriever = VectorRetriever(model_name=None, index_type=index_type)
+            start = time.perf_counter()
+            retriever.build_index(embeddings)
+            built[index_type] = (retriever, time.perf_counter() - start)
+        retriever, build_seconds = built[index_type]
+        retriever.set_search_parameters(**parameters)
+
+        if exact_indices is None:
+            _, exact_indices = retriever.search_embeddings(queries, k)
+        recall, mean_ms, p95_ms = measure(retriever, queries, k, exact_indices)
+        memory = retriever.memory_report()
+        described = " ".join(f"{name}={value}" for name, value in parameters.items()) or "-"
+        print(f"{index_type:<10} {described:<16} {build_seconds:>8.2f} {recall:>10.3f} {mean_ms:>9.3f} {p95_ms:>8.3f} "
+              f"{memory['index_bytes'] / 2 ** 20:>9.2f} {memory['compression']:>6.1f}x")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""
+Test configuration shared by the test modules.
+
+app.main reads its configuration when it is imported, so the environment is set up
+here, before any test module imports it: searches are keyword-only, so results do
+not depend on whether the embedding model is installed, and nothing is written to
+the snapshot and cache files under app/cache.
+"""
+import os
+import types
+import pytest
+
+os.environ["HYBRID_SEARCH_ENABLED"] = "0"
+os.environ["SEMANTIC_CACHE_ENABLED"] = "0"
+os.environ["CORPUS_SNAPSHOT_DIR"] = ""
+os.environ["EMBEDDING_CACHE_PATH"] = ""
+os.environ["COMPLETION_CACHE_PATH"] = ""
+os.environ["DATA_WATCH_INTERVAL"] = "0"
+os.environ["ADMIN_TOKEN"] = ""
+
+class FakeCompletions:
+    """
+    Stand-in for the chat completions API of the AsyncOpenAI client.
+
+    Each request takes the next queued reply: a string, an exception to raise, or for
+    streamed requests a list of content pieces that may end with an exception. Without
+    a queued reply the content is "Answer <request number>".
+    """
+
+    def __init__(self):
+        self.requests = []
+        self.replies = []
+
+    async def create(self, **kwargs):
+        self.requests.append(kwargs)
+        reply = self.replies.pop(0) if self.replies else f"Answer {len(self.requests)}"
+        if isinstance(reply, Exception):
+            raise reply
+        if kwargs.get("stream"):
+            return self._stream(reply if isinstance(reply, list) else [reply])
+        message = types.SimpleNamespace(content=reply)
+        return types.SimpleNamespace(choices=[types.SimpleNamespace(message=message)])
+
+    @staticmethod
+    async def _stream(pieces):
+        for piece in pieces:
+            if isinstance(piece, Exception):
+                raise piece
+            delta = types.SimpleNamespace(content=piece)
+            yield types.SimpleNamespace(choices=[types.SimpleNamespace(delta=delta)])
+
+@pytest.fixture(scope="session")
+def documents():
+    """
+    Load the data files into the application's corpus.
+    """
+    import app.main as main
+    main.documents = main.load_data_files()
+    return main.documents
+
+@pytest.fixture
+def completions(documents, monkeypatch):
+    """
+    Replace the OpenAI client with FakeCompletions and start with an empty answer cache.
+    """
+    import app.main as main
+    fake = FakeCompletions()
+    client = types.SimpleNamespace(chat=types.SimpleNamespace(completions=fake))
+    monkeypatch.setattr(main, "async_openai_client", client)
+    monkeypatch.setattr(main, "documents", documents)
+    main.answer_cache.clear()
+    return fake
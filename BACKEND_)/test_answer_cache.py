@@ -0,0 +1,76 @@
+"""
+Tests for evicting entries from the answer cache.
+"""
+import types
+from app.modules import answer_cache
+from app.modules.answer_cache import AnswerCache
+
+class Clock:
+    """
+    Monotonic clock that only moves when told to.
+    """
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self):
+        return self.now
+
+def test_lru_eviction():
+    """
+    When the cache is full, the least recently used entry is evicted.
+    """
+    cache = AnswerCache(max_size=2, ttl_seconds=0)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1  # "b" is now the least recently used
+    cache.set("c", 3)
+
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+    assert len(cache) == 2
+    assert cache.stats()["evictions"] == 1
+
+    # Storing an existing key refreshes it instead of adding an entry
+    cache.set("a", 10)
+    cache.set("d", 4)
+    assert cache.get("a") == 10
+    assert cache.get("c") is None
+
+def test_ttl_expiry(monkeypatch):
+    """
+    Entries expire once their time to live has passed, and 0 keeps them forever.
+    """
+    clock = Clock()
+    monkeypatch.setattr(answer_cache, "time", types.SimpleNamespace(monotonic=clock.monotonic))
+
+    cache = AnswerCache(max_size=10, ttl_seconds=60)
+    cache.set("a", 1)
+    clock.now += 59
+    assert cache.get("a") == 1
+    clock.now += 1
+    assert cache.get("a") is None
+    assert len(cache) == 0
+
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["evictions"]) == (1, 1, 1)
+    assert stats["hit_rate"] == 0.5
+
+    forever = AnswerCache(max_size=10, ttl_seconds=0)
+    forever.set("a", 1)
+    clock.now += 10 ** 6
+    assert forever.get("a") == 1
+
+def test_keys_and_disabled_cache():
+    """
+    Trivial query variations share a key, and a cache without capacity stores nothing.
+    """
+    cache = AnswerCache()
+    assert cache.make_key("What is Rule 9?", "rules", "full") == cache.make_key("  what is   rule 9 ", "rules", "full")
+    assert cache.make_key("what is rule 9", "rules", "full") != cache.make_key("what is rule 9", None, "full")
+
+    disabled = AnswerCache(max_size=0)
+    disabled.set("a", 1)
+    assert disabled.get("a") is None
+    assert len(disabled) == 0
@@ -0,0 +1,91 @@
+"""
+Tests for answering many queries through /api/query/batch, with a stubbed OpenAI client.
+"""
+import json
+import pytest
+from fastapi.testclient import TestClient
+import app.main as main
+
+MINISTERS_ACT = "Gujarat_Ministers_Salaries_and_All"
+CIVIL_SERVICES_RULES = "Gujarat Civil Services Rules"
+
+@pytest.fixture
+def client(completions):
+    """
+    Client for the application, without running its startup handlers.
+    """
+    return TestClient(main.app)
+
+def test_results_in_order(client, completions, monkeypatch):
+    """
+    Results come back in request order, with per-query files and modes, and duplicate queries are searched once.
+    """
+    searched = []
+    find_relevant_text = main.find_relevant_text
+
+    def counting_search(query, *args):
+        searched.append(query)
+        return find_relevant_text(query, *args)
+
+    monkeypatch.setattr(main, "find_relevant_text", counting_search)
+    response = client.post("/api/query/batch", json={
+        "queries": ["minister salary", {"query": "leave", "selected_file": CIVIL_SERVICES_RULES}, "leave",
+                    {"query": "minister salary", "mode": "direct"}, "minister salary"],
+        "mode": "single",
+        "concurrency": 1
+    })
+    assert response.status_code == 200
+    results = response.json()["results"]
+
+    assert [result["index"] for result in results] == [0, 1, 2, 3, 4]
+    assert [result["query"] for result in results] == ["minister salary", "leave", "leave", "minister salary", "minister salary"]
+    assert [result["selected_file"] for result in results] == [None, CIVIL_SERVICES_RULES, None, None, None]
+    assert results[0]["response"] == "Answer 1"
+    assert results[1]["response"] == "Answer 2"
+    assert results[1]["exact_match"].startswith(f"Here's information from {CIVIL_SERVICES_RULES}:")
+    assert len(results[2]["file_options"]) == 2
+    assert results[3]["response"] == results[3]["exact_match"]
+    assert results[4] == dict(results[0], index=4)
+
+    assert sorted(searched) == ["leave", "leave", "minister salary"]
+    assert len(completions.requests) == 2
+
+def test_streamed_lines(client, completions):
+    """
+    A streamed batch sends one NDJSON line per query, and a failed model call only affects its own query.
+    """
+    completions.replies = ["Salary answer.", RuntimeError("model unavailable"), "Rules answer."]
+    response = client.post("/api/query/batch", json={
+        "queries": ["minister salary", "pension", {"query": "leave", "selected_file": CIVIL_SERVICES_RULES}],
+        "mode": "single",
+        "concurrency": 1,
+        "stream": True
+    })
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+
+    lines = response.text.splitlines()
+    assert len(lines) == 3
+    results = {result["index"]: result for result in map(json.loads, lines)}
+    assert sorted(results) == [0, 1, 2]
+    assert results[0]["response"] == "Salary answer."
+    assert results[1]["response"].startswith("I found this information from The Gujarat Civil Services (Discipl: ")
+    assert results[2]["response"] == "Rules answer."
+
+def test_invalid_requests(client, completions, monkeypatch):
+    """
+    Malformed batches are rejected before any query is answered.
+    """
+    monkeypatch.setattr(main, "BATCH_MAX_QUERIES", 2)
+    for body in [
+        {},
+        {"queries": []},
+        {"queries": "minister salary"},
+        {"queries": ["a", "b", "c"]},
+        {"queries": [42]},
+        {"queries": ["minister salary"], "mode": "fastest"},
+        {"queries": [{"query": "minister salary", "selected_file": 3}]},
+        {"queries": ["minister salary"], "concurrency": "many"}
+    ]:
+        assert client.post("/api/query/batch", json=body).status_code == 400, body
+    assert completions.requests == []
@@ -0,0 +1,92 @@
+"""
+Tests for ranking paragraphs with the BM25 index.
+"""
+from app.modules.bm25_index import BM25Index
+
+def build_index():
+    """
+    Index a few short paragraphs from two files.
+
+    Returns:
+        BM25Index: The index
+    """
+    index = BM25Index()
+    index.add_document(0, "rules", "Salary of ministers is paid monthly.")
+    index.add_document(1, "rules", "Leave rules for government servants and their leave accounts.")
+    index.add_document(2, "act", "The minister shall receive a salary and a sumptuary allowance.")
+    index.add_document(3, "act", "Repeal of the earlier act.")
+    return index
+
+def test_ranking():
+    """
+    Documents with more and rarer query terms rank higher, and plurals match singulars.
+    """
+    index = build_index()
+    results = index.search(index.tokenize("ministers salary allowance"), top_k=3)
+    assert [doc_id for _, doc_id in results] == [2, 0]
+    assert results[0][0] > results[1][0] > 0
+
+    # Repeating a term weighs it more
+    leave_once = index.score(index.tokenize("leave"))[1]
+    leave_twice = index.score(index.tokenize("leave leave"))[1]
+    assert leave_twice == 2 * leave_once
+
+    assert index.search(index.tokenize("pension")) == []
+
+def test_file_filter_and_best_per_file():
+    """
+    Scores can be restricted to some files, and the best document of each file is found.
+    """
+    index = build_index()
+    tokens = index.tokenize("salary minister")
+    assert set(index.score(tokens, file_ids=["rules"])) == {0}
+
+    best = index.best_per_file(index.score(tokens))
+    assert {file_id: doc_id for file_id, (_, doc_id) in best.items()} == {"rules": 0, "act": 2}
+
+def test_remove_file():
+    """
+    Removing a file drops its documents and terms, and matches scoring a freshly built index.
+    """
+    index = build_index()
+    copy = index.copy()
+    index.remove_file("act")
+
+    assert len(index) == 2
+    assert "sumptuary" not in index.postings
+    assert index.total_length == sum(index.doc_lengths.values())
+    assert set(index.score(index.tokenize("salary repeal"))) == {0}
+
+    fresh = BM25Index()
+    fresh.add_document(0, "rules", "Salary of ministers is paid monthly.")
+    fresh.add_document(1, "rules", "Leave rules for government servants and their leave accounts.")
+    tokens = index.tokenize("salary leave")
+    assert index.score(tokens) == fresh.score(tokens)
+
+    # The copy taken before is unaffected
+    assert len(copy) == 4
+    assert 2 in copy.score(copy.tokenize("sumptuary"))
+
+    index.remove_file("unknown")
+    assert len(index) == 2
+
+def test_short_and_partial_matches():
+    """
+    Headings get no bonus for being short, and matching every query term beats matching one rare term.
+    """
+    index = BM25Index()
+    index.add_document(0, "act", "Ministers' Salaries Act")
+    index.add_document(1, "act", "There shall be paid to each minister a salary of two thousand rupees per month, "
+                                 "payable from the date on which he takes the oath of office as minister.")
+    index.add_document(2, "rules", "Recruitment rules for posts in the services of the State.")
+    index.add_document(3, "rules", "A witness may not be re-examined without the leave of the inquiry authority.")
+    index.add_document(4, "rules", "Leave rules of the State apply to government servants on probation.")
+    for doc_id in range(5, 15):
+        index.add_document(doc_id, "rules", f"These rules apply to every service and post number {doc_id} under the State "
+                                            "Government, including temporary posts, except where the appointing authority "
+                                            "has made a different order.")
+
+    assert index.search(index.tokenize("minister salary"), top_k=1)[0][1] == 1
+
+    scores = index.score(index.tokenize("leave rules"))
+    assert scores[4] > 1.5 * scores[3]
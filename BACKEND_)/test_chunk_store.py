@@ -0,0 +1,82 @@
+"""
+Tests for saving vector index chunks to the chunk store and mapping them back.
+"""
+import os
+import numpy as np
+import pytest
+from app.modules.chunk_store import ChunkStore
+
+CHUNKS = ["Pay is fixed at ₹ 5,000.", None, "", "Leave rules apply."]
+METADATA = [{"file_id": "rules"}, None, {"file_id": "rules"}, {"file_id": "act"}]
+
+def save_store(directory):
+    """
+    Save CHUNKS for a stand-in index file.
+
+    Returns:
+        tuple: (chunk store, index path)
+    """
+    index_path = os.path.join(directory, "index.faiss")
+    with open(index_path, "wb") as file:
+        file.write(b"index")
+    store = ChunkStore(str(directory))
+    store.save(CHUNKS, METADATA, index_path, np.arange(len(CHUNKS), dtype="uint64"))
+    return store, index_path
+
+def test_round_trip(tmp_path):
+    """
+    Chunks, removed chunks, metadata and signatures come back as saved.
+    """
+    store, index_path = save_store(tmp_path)
+    assert store.exists()
+
+    chunks, metadata, signatures = store.load(index_path)
+    assert list(chunks) == CHUNKS
+    assert metadata == METADATA
+    assert signatures.tolist() == [0, 1, 2, 3]
+
+def test_mapped_chunks_changes(tmp_path):
+    """
+    Mapped chunks can be removed and appended in memory without touching the saved store.
+    """
+    store, index_path = save_store(tmp_path)
+    chunks = store.load(index_path)[0]
+    copy = chunks.copy()
+
+    chunks[0] = None
+    chunks.extend(["Added chunk."])
+    assert len(chunks) == 5
+    assert chunks[0] is None
+    assert chunks[-1] == "Added chunk."
+
+    assert copy[0] == CHUNKS[0]
+    assert len(copy) == 4
+    assert list(store.load(index_path)[0]) == CHUNKS
+
+    with pytest.raises(ValueError):
+        chunks[3] = "Replaced."
+
+def test_index_mismatch(tmp_path):
+    """
+    Chunks are not loaded with an index whose content differs from the one they were saved with.
+    """
+    store, index_path = save_store(tmp_path)
+
+    # Touching the index without changing it only costs a checksum
+    os.utime(index_path, ns=(10 ** 18, 10 ** 18))
+    assert store.load(index_path) is not None
+
+    with open(index_path, "wb") as file:
+        file.write(b"other")
+    assert store.load(index_path) is None
+
+def test_missing_signatures(tmp_path):
+    """
+    Stores saved without dedup signatures load with None for them.
+    """
+    index_path = os.path.join(tmp_path, "index.faiss")
+    with open(index_path, "wb") as file:
+        file.write(b"index")
+    store = ChunkStore(str(tmp_path))
+    store.save(["only"], [{}], index_path)
+    assert store.load(index_path)[2] is None
@@ -0,0 +1,88 @@
+"""
+Tests for persisting completions in the SQLite completion cache.
+"""
+import os
+import types
+from app.modules import completion_cache
+from app.modules.completion_cache import CompletionCache, get_completion_cache
+
+class Clock:
+    """
+    Wall clock that advances by one second on every reading, so accesses never tie.
+    """
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def time(self):
+        self.now += 1
+        return self.now
+
+def test_store_and_share(tmp_path):
+    """
+    Completions are found by the request they were made with, also by another cache on the same file.
+    """
+    path = str(tmp_path / "cache" / "completions.sqlite3")
+    cache = CompletionCache(path)
+    messages = [{"role": "user", "content": "What is rule 9?"}]
+    key = CompletionCache.make_key("gpt-4", messages, 0.2, 1000)
+    assert key != CompletionCache.make_key("gpt-4", messages, 0.3, 1000)
+
+    assert cache.get(key) is None
+    cache.set(key, "Rule 9 sets out the procedure.", "gpt-4")
+    assert cache.get(key) == "Rule 9 sets out the procedure."
+    assert CompletionCache(path).get(key) == "Rule 9 sets out the procedure."
+
+    stats = cache.stats()
+    assert (stats["size"], stats["hits"], stats["misses"]) == (1, 1, 1)
+
+    cache.clear()
+    assert cache.get(key) is None
+
+def test_least_recently_used_eviction(tmp_path, monkeypatch):
+    """
+    Beyond max_entries the completions read or written longest ago are evicted.
+    """
+    monkeypatch.setattr(completion_cache, "time", types.SimpleNamespace(time=Clock().time))
+    cache = CompletionCache(str(tmp_path / "completions.sqlite3"), max_entries=2)
+    cache.set("a", "first")
+    cache.set("b", "second")
+    assert cache.get("a") == "first"  # "b" is now the least recently used
+    cache.set("c", "third")
+
+    assert cache.get("b") is None
+    assert cache.get("a") == "first"
+    assert cache.get("c") == "third"
+    assert cache.stats()["size"] == 2
+
+def test_configuration(tmp_path, monkeypatch):
+    """
+    The shared cache follows COMPLETION_CACHE_PATH, and an empty path disables it.
+    """
+    path = str(tmp_path / "shared.sqlite3")
+    monkeypatch.setenv("COMPLETION_CACHE_PATH", path)
+    monkeypatch.setattr(completion_cache, "_default_cache", None)
+    cache = get_completion_cache()
+    assert cache.path == path
+    assert get_completion_cache() is cache
+    assert os.path.exists(path)
+
+    monkeypatch.setenv("COMPLETION_CACHE_PATH", "")
+    assert get_completion_cache() is None
+
+def test_unusual_paths(tmp_path, monkeypatch):
+    """
+    A bare file name is created in the working directory, and an unusable directory disables the cache.
+    """
+    monkeypatch.chdir(tmp_path)
+    cache = CompletionCache("completions.sqlite3")
+    assert cache.available
+    cache.set("a", "first")
+    assert cache.get("a") == "first"
+    assert os.path.exists(tmp_path / "completions.sqlite3")
+
+    (tmp_path / "not_a_directory").write_text("")
+    cache = CompletionCache(str(tmp_path / "not_a_directory" / "cache" / "completions.sqlite3"))
+    assert not cache.available
+    cache.set("a", "first")
+    assert cache.get("a") is None
@@ -0,0 +1,126 @@
+"""
+Tests for saving the corpus to a snapshot and restoring it.
+"""
+import json
+import os
+from app.modules.bm25_index import BM25Index
+from app.modules.corpus_snapshot import CorpusSnapshot, MappedDocuments, MANIFEST_FILE, CORPUS_FILE
+from app.modules.paragraph_store import ParagraphStore
+from app.modules.section_index import SectionIndex
+from app.modules.section_parser import SectionParser
+
+DOCUMENTS = {
+    "rules": (
+        "1. Short title\n"
+        "These rules may be called the Service Rules.\n"
+        "\n"
+        "2. Pay\n"
+        "Pay is fixed at ₹ 5,000 — payable monthly.\n"
+        "\n"
+        "↔ 2A. Allowances\n"
+        "An allowance of ₹ 500 is payable.\n"
+    ),
+    "act": (
+        "1. Definitions\n"
+        "“Minister” means a member of the Council of Ministers.\n"
+        "\n"
+        "2. Salaries\n"
+        "Every minister shall receive a salary.\n"
+    )
+}
+
+def build_corpus():
+    """
+    Build the corpus structures of DOCUMENTS the way the application loads data files.
+
+    Returns:
+        tuple: (sections_map, section_index, paragraph_store, search_index)
+    """
+    parser = SectionParser()
+    sections_map = {}
+    section_index = SectionIndex()
+    paragraph_store = ParagraphStore()
+    search_index = BM25Index()
+    for file_id, text in DOCUMENTS.items():
+        sections = parser.parse(text, file_id)
+        sections_map.update(sections)
+        section_index.add_file(file_id, [section.section_id for section in sections.values()])
+        for paragraph in paragraph_store.add_document(file_id, text):
+            search_index.add_document(paragraph.paragraph_id, file_id, paragraph.text_lower)
+    return sections_map, section_index, paragraph_store, search_index
+
+def save_snapshot(directory):
+    """
+    Save a snapshot of DOCUMENTS.
+
+    Returns:
+        tuple: (snapshot store, paragraph store the snapshot was saved from)
+    """
+    snapshot = CorpusSnapshot(str(directory))
+    sections_map, section_index, paragraph_store, search_index = build_corpus()
+    fingerprints = {f"{file_id}.txt": (1, len(text), "hash") for file_id, text in DOCUMENTS.items()}
+    assert snapshot.save(fingerprints, DOCUMENTS, sections_map, section_index, paragraph_store, search_index)
+    return snapshot, paragraph_store
+
+def check_restored(restored, paragraph_store):
+    """
+    Check that a restored corpus matches DOCUMENTS and the structures built from them.
+    """
+    documents, sections_map, section_index, restored_paragraphs, search_index = restored
+    assert dict(documents) == DOCUMENTS
+    assert sorted(sections_map) == ["act:1", "act:2", "rules:1", "rules:2", "rules:2A"]
+    assert section_index.find_prefix("rules", "2") == ["2", "2A"]
+
+    for file_id in DOCUMENTS:
+        original = [paragraph.text for paragraph in paragraph_store.get_file_paragraphs(file_id)]
+        assert [paragraph.text for paragraph in restored_paragraphs.get_file_paragraphs(file_id)] == original
+    assert restored_paragraphs.paragraphs[4].text_lower == paragraph_store.paragraphs[4].text_lower
+
+    tokens = search_index.tokenize("minister salary")
+    assert search_index.search(tokens) == build_corpus()[3].search(tokens)
+
+def test_round_trip(tmp_path):
+    """
+    A snapshot restores the documents, sections, paragraphs and indexes it was saved from.
+    """
+    snapshot, paragraph_store = save_snapshot(tmp_path)
+    manifest = snapshot.load_manifest()
+    assert manifest["sources"]["rules.txt"] == [1, len(DOCUMENTS["rules"]), "hash"]
+
+    restored = snapshot.load(manifest)
+    assert isinstance(restored[0], dict)
+    check_restored(restored, paragraph_store)
+
+def test_mapped_round_trip(tmp_path):
+    """
+    A mapped snapshot decodes documents, paragraphs and single sections from the corpus file.
+    """
+    snapshot, paragraph_store = save_snapshot(tmp_path)
+    restored = snapshot.load(snapshot.load_manifest(), mapped=True)
+    documents, sections_map = restored[0], restored[1]
+    assert isinstance(documents, MappedDocuments)
+    check_restored(restored, paragraph_store)
+
+    # Sections are decoded by their byte offsets, past the multi-byte characters before them
+    for section in sections_map.values():
+        assert documents.get_section_text(section) == section.get_text(DOCUMENTS[section.file_id])
+    assert documents.get_section_text(sections_map["rules:2A"]).startswith("↔ 2A. Allowances")
+
+def test_unusable_snapshots(tmp_path):
+    """
+    Missing snapshots, other format versions and truncated corpus files are not loaded.
+    """
+    assert CorpusSnapshot(str(tmp_path / "missing")).load_manifest() is None
+
+    snapshot, _ = save_snapshot(tmp_path)
+    manifest = snapshot.load_manifest()
+
+    with open(os.path.join(tmp_path, MANIFEST_FILE), "w", encoding="utf-8") as file:
+        json.dump(dict(manifest, format_version=CorpusSnapshot.FORMAT_VERSION - 1), file)
+    assert snapshot.load_manifest() is None
+
+    with open(os.path.join(tmp_path, CORPUS_FILE), "ab") as file:
+        file.write(b"extra")
+    assert snapshot.load(manifest) is None
+
+    assert snapshot.load(dict(manifest, snapshot_id="other")) is None
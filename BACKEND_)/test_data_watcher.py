@@ -0,0 +1,149 @@
+"""
+Tests for detecting added, changed and removed data files.
+"""
+import asyncio
+import os
+import app.main as main
+from app.modules.bm25_index import BM25Index
+from app.modules.data_watcher import DataDirectoryWatcher
+from app.modules.paragraph_store import ParagraphStore
+from app.modules.section_index import SectionIndex
+
+def write(path, text, mtime_ns=None):
+    """
+    Write a file, optionally setting its modification time.
+    """
+    path.write_text(text, encoding="utf-8")
+    if mtime_ns is not None:
+        os.utime(path, ns=(mtime_ns, mtime_ns))
+
+def scan(watcher):
+    """
+    Scan a directory and commit the state found, as after indexing every file successfully.
+    """
+    changes = watcher.scan()
+    watcher.commit()
+    return changes
+
+def test_scan_reports_changes(tmp_path):
+    """
+    Each scan reports the differences to the committed one, and ignores other extensions.
+    """
+    write(tmp_path / "a.txt", "first")
+    write(tmp_path / "b.txt", "second")
+    write(tmp_path / "notes.md", "ignored")
+    watcher = DataDirectoryWatcher(str(tmp_path))
+
+    assert watcher.scan() == {"added": ["a.txt", "b.txt"], "changed": [], "removed": []}
+    assert scan(watcher) == {"added": ["a.txt", "b.txt"], "changed": [], "removed": []}
+    assert scan(watcher) == {"added": [], "changed": [], "removed": []}
+
+    write(tmp_path / "a.txt", "first, edited", mtime_ns=10 ** 18)
+    (tmp_path / "b.txt").unlink()
+    write(tmp_path / "c.txt", "third")
+    assert scan(watcher) == {"added": ["c.txt"], "changed": ["a.txt"], "removed": ["b.txt"]}
+
+def test_touched_file_is_not_changed(tmp_path):
+    """
+    A file with a new modification time but the same content is not reported, but its new time is kept.
+    """
+    write(tmp_path / "a.txt", "same", mtime_ns=10 ** 18)
+    watcher = DataDirectoryWatcher(str(tmp_path))
+    scan(watcher)
+
+    write(tmp_path / "a.txt", "same", mtime_ns=2 * 10 ** 18)
+    assert scan(watcher) == {"added": [], "changed": [], "removed": []}
+    assert watcher.fingerprints["a.txt"][0] == 2 * 10 ** 18
+
+def test_stale_fingerprints(tmp_path):
+    """
+    Fingerprints stored with a snapshot show whether the data files changed since it was written.
+    """
+    write(tmp_path / "a.txt", "first")
+    write(tmp_path / "b.txt", "second")
+    stored = DataDirectoryWatcher(str(tmp_path))
+    scan(stored)
+    fingerprints = {file_name: list(fingerprint) for file_name, fingerprint in stored.fingerprints.items()}
+
+    def changes_since_snapshot():
+        watcher = DataDirectoryWatcher(str(tmp_path))
+        watcher.fingerprints = {file_name: tuple(fingerprint) for file_name, fingerprint in fingerprints.items()}
+        return watcher.scan()
+
+    assert not any(changes_since_snapshot().values())
+
+    write(tmp_path / "b.txt", "second, edited", mtime_ns=10 ** 18)
+    assert changes_since_snapshot() == {"added": [], "changed": ["b.txt"], "removed": []}
+
+def test_missing_directory(tmp_path):
+    """
+    A directory that cannot be listed reports no changes.
+    """
+    watcher = DataDirectoryWatcher(str(tmp_path / "missing"))
+    assert watcher.scan() == {"added": [], "changed": [], "removed": []}
+
+def test_unreadable_file_is_not_removed(tmp_path, monkeypatch):
+    """
+    A file that cannot be read keeps its fingerprint instead of being reported as removed.
+    """
+    write(tmp_path / "a.txt", "first")
+    watcher = DataDirectoryWatcher(str(tmp_path))
+    scan(watcher)
+    fingerprint = watcher.fingerprints["a.txt"]
+
+    def failing_stat(path):
+        raise PermissionError(path)
+
+    with monkeypatch.context() as patch:
+        patch.setattr(os, "stat", failing_stat)
+        assert scan(watcher) == {"added": [], "changed": [], "removed": []}
+    assert watcher.fingerprints == {"a.txt": fingerprint}
+
+    write(tmp_path / "a.txt", "first, edited", mtime_ns=10 ** 18)
+    assert scan(watcher) == {"added": [], "changed": ["a.txt"], "removed": []}
+
+def test_failed_files_are_retried(tmp_path):
+    """
+    Files left out of a commit are reported as added by the next scan.
+    """
+    write(tmp_path / "a.txt", "first")
+    write(tmp_path / "b.txt", "second")
+    watcher = DataDirectoryWatcher(str(tmp_path))
+    watcher.scan()
+    watcher.commit(failed=["b.txt"])
+    assert sorted(watcher.fingerprints) == ["a.txt"]
+
+    write(tmp_path / "a.txt", "first, edited", mtime_ns=10 ** 18)
+    assert watcher.scan() == {"added": ["b.txt"], "changed": ["a.txt"], "removed": []}
+    watcher.commit(failed=["a.txt"])
+    assert scan(watcher) == {"added": ["a.txt"], "changed": [], "removed": []}
+    assert scan(watcher) == {"added": [], "changed": [], "removed": []}
+
+def test_reload_retries_failed_files(tmp_path, monkeypatch):
+    """
+    A data file that cannot be extracted is reported as failed and loaded by a later reload.
+    """
+    monkeypatch.setattr(main, "DATA_DIR", str(tmp_path))
+    monkeypatch.setattr(main, "data_watcher", DataDirectoryWatcher(str(tmp_path)))
+    monkeypatch.setattr(main, "documents", {})
+    monkeypatch.setattr(main, "sections_map", {})
+    monkeypatch.setattr(main, "section_index", SectionIndex())
+    monkeypatch.setattr(main, "paragraph_store", ParagraphStore())
+    monkeypatch.setattr(main, "search_index", BM25Index())
+    monkeypatch.setattr(main, "reload_lock", asyncio.Lock())
+
+    write(tmp_path / "rules.txt", "")
+    result = asyncio.run(main.reload_data_files())
+    assert (result["added"], result["failed"]) == (["rules.txt"], ["rules.txt"])
+    assert "rules" not in main.documents
+
+    result = asyncio.run(main.reload_data_files())
+    assert (result["added"], result["failed"]) == (["rules.txt"], ["rules.txt"])
+
+    write(tmp_path / "rules.txt", "1. Short title\nThese rules may be called the Service Rules.\n", mtime_ns=10 ** 18)
+    result = asyncio.run(main.reload_data_files())
+    assert (result["added"], result["failed"]) == (["rules.txt"], [])
+    assert "rules" in main.documents
+
+    result = asyncio.run(main.reload_data_files())
+    assert not any(result[key] for key in ("added", "changed", "removed", "failed"))
@@ -0,0 +1,40 @@
+"""
+Tests for persisting embeddings in the SQLite embedding cache.
+"""
+import os
+import numpy as np
+from app.modules.embedding_cache import EmbeddingCache
+
+def test_store_per_model(tmp_path):
+    """
+    Embeddings are found by text and model, also by another cache on the same file.
+    """
+    path = str(tmp_path / "cache" / "embeddings.sqlite3")
+    cache = EmbeddingCache(path)
+    cache.set_many("model-a", ["pay", "leave"], np.array([[1, 0], [0, 1]], dtype='float32'))
+
+    results = EmbeddingCache(path).get_many("model-a", ["leave", "pension", "pay"])
+    assert results[0].tolist() == [0.0, 1.0]
+    assert results[1] is None
+    assert results[2].tolist() == [1.0, 0.0]
+    assert cache.get_many("model-b", ["pay"]) == [None]
+
+    cache.clear()
+    assert cache.get_many("model-a", ["pay"]) == [None]
+
+def test_unusual_paths(tmp_path, monkeypatch):
+    """
+    A bare file name is created in the working directory, and an unusable directory disables the cache.
+    """
+    monkeypatch.chdir(tmp_path)
+    cache = EmbeddingCache("embeddings.sqlite3")
+    assert cache.available
+    cache.set_many("model", ["pay"], np.ones((1, 2), dtype='float32'))
+    assert cache.get_many("model", ["pay"])[0].tolist() == [1.0, 1.0]
+    assert os.path.exists(tmp_path / "embeddings.sqlite3")
+
+    (tmp_path / "not_a_directory").write_text("")
+    cache = EmbeddingCache(str(tmp_path / "not_a_directory" / "cache" / "embeddings.sqlite3"))
+    assert not cache.available
+    cache.set_many("model", ["pay"], np.ones((1, 2), dtype='float32'))
+    assert cache.get_many("model", ["pay"]) == [None]
@@ -0,0 +1,70 @@
+"""
+Regression tests for keyword search over the shipped data files.
+"""
+import pytest
+import app.main as main
+from app.modules.corpus_snapshot import CorpusSnapshot
+from app.modules.paragraph_store import MappedParagraph
+
+MINISTERS_ACT = "Gujarat_Ministers_Salaries_and_All"
+CIVIL_SERVICES_RULES = "Gujarat Civil Services Rules"
+
+def search(query, documents):
+    """
+    Run the direct text search for a query across all files.
+
+    Returns:
+        tuple: (matched text without the "Here's information from" line, file options)
+    """
+    text, file_options = main.find_relevant_text(query, documents)
+    return text.split("\n\n", 1)[-1], file_options
+
+@pytest.mark.parametrize("query", ["minister salary", "salary of a minister", "ministers salaries"])
+def test_salary_queries_find_the_salary_section(query, documents):
+    """
+    Short headings and page headers naming the Act do not outrank the section on salaries.
+    """
+    text, file_options = search(query, documents)
+    assert file_options == [MINISTERS_ACT]
+    assert text.startswith("Salaries and Dearness Allowance of Ministers and Ministers of State\n3. (1)")
+
+def test_table_of_contents_does_not_win(documents):
+    """
+    The table of contents lists most terms of the Act, but the section itself is returned.
+    """
+    text, file_options = search("travelling allowance of ministers", documents)
+    assert file_options == [MINISTERS_ACT]
+    assert text.startswith("Travelling and Daily Allowances and Residential Accommodation")
+
+def test_matching_all_terms_beats_one_rare_term(documents):
+    """
+    A file whose best paragraph matches every query term is chosen over one matching a single term.
+    """
+    text, file_options = search("leave rules", documents)
+    assert file_options == [CIVIL_SERVICES_RULES]
+    assert "leave vacancy" in text
+
+def test_mapped_paragraphs_stay_uncached(documents, tmp_path, monkeypatch):
+    """
+    Searching a mapped corpus gives the same results and keeps no decoded text on its paragraphs.
+    """
+    queries = ["what is salary of ministers", "tell me about leave rules", "travelling allowance of ministers"]
+    expected = [main.find_relevant_text(query, documents) for query in queries]
+
+    snapshot = CorpusSnapshot(str(tmp_path))
+    assert snapshot.save(main.data_watcher.fingerprints, dict(documents), main.sections_map, main.section_index,
+                         main.paragraph_store, main.search_index)
+    mapped_documents, sections_map, section_index, paragraph_store, search_index = snapshot.load(
+        snapshot.load_manifest(), mapped=True)
+    monkeypatch.setattr(main, "sections_map", sections_map)
+    monkeypatch.setattr(main, "section_index", section_index)
+    monkeypatch.setattr(main, "paragraph_store", paragraph_store)
+    monkeypatch.setattr(main, "search_index", search_index)
+
+    assert [main.find_relevant_text(query, mapped_documents) for query in queries] == expected
+
+    for paragraph in paragraph_store.iter_paragraphs():
+        assert isinstance(paragraph, MappedParagraph)
+        held_text = [getattr(paragraph, slot) for slot in MappedParagraph.__slots__
+                     if isinstance(getattr(paragraph, slot), str)]
+        assert held_text == [paragraph.file_id]
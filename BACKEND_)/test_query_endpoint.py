@@ -0,0 +1,129 @@
+"""
+Tests for answering queries through /api/query in each response mode, with a stubbed OpenAI client.
+"""
+import pytest
+from fastapi.testclient import TestClient
+import app.main as main
+
+MINISTERS_ACT = "Gujarat_Ministers_Salaries_and_All"
+
+@pytest.fixture
+def client(completions):
+    """
+    Client for the application, without running its startup handlers.
+    """
+    return TestClient(main.app)
+
+def query(client, **body):
+    """
+    Post a query and return the decoded response.
+    """
+    response = client.post("/api/query", json=body)
+    assert response.status_code == 200
+    return response.json()
+
+def test_direct_mode(client, completions):
+    """
+    The direct mode answers with the matched text and makes no model calls.
+    """
+    result = query(client, query="minister salary", mode="direct")
+    assert result["exact_match"].startswith(f"Here's information from {MINISTERS_ACT}:")
+    assert result["ai_response"] == result["enhanced_response"] == result["response"] == result["exact_match"]
+    assert result["file_options"] == []
+    assert completions.requests == []
+
+def test_single_mode(client, completions):
+    """
+    The single mode makes one combined call, and the answer is cached.
+    """
+    completions.replies = ["Ministers receive a monthly salary."]
+    result = query(client, query="minister salary", mode="single")
+    assert result["ai_response"] == result["enhanced_response"] == result["response"] == "Ministers receive a monthly salary."
+
+    assert len(completions.requests) == 1
+    request = completions.requests[0]
+    assert not request.get("stream")
+    assert request["messages"] == main.build_single_messages("minister salary", result["exact_match"], MINISTERS_ACT)
+
+    assert query(client, query="minister salary", mode="single") == result
+    assert len(completions.requests) == 1
+
+def test_full_mode(client, completions):
+    """
+    The full mode answers first and then synthesizes a final answer from the first one.
+    """
+    completions.replies = ["First answer.", "Final answer."]
+    result = query(client, query="minister salary", mode="full")
+    assert result["ai_response"] == "First answer."
+    assert result["enhanced_response"] == result["response"] == "Final answer."
+
+    first, second = completions.requests
+    assert first["messages"] == main.build_ai_messages("minister salary", result["exact_match"], MINISTERS_ACT)
+    assert second["messages"] == main.build_enhanced_messages("minister salary", result["exact_match"], "First answer.",
+                                                              MINISTERS_ACT)
+
+def test_default_and_unknown_modes(client, completions, monkeypatch):
+    """
+    Without a valid mode the deployment default from RESPONSE_MODE is used.
+    """
+    monkeypatch.setattr(main, "DEFAULT_RESPONSE_MODE", "direct")
+    result = query(client, query="minister salary")
+    assert result["response"] == result["exact_match"]
+    assert query(client, query="minister salary", mode="fastest") == result
+    assert completions.requests == []
+
+    monkeypatch.setattr(main, "DEFAULT_RESPONSE_MODE", "single")
+    assert query(client, query="minister salary")["response"] == "Answer 1"
+
+def test_single_mode_fallback(client, completions):
+    """
+    When the model call fails, the matched text is returned and not cached, so the next query retries.
+    """
+    completions.replies = [RuntimeError("model unavailable")]
+    result = query(client, query="minister salary", mode="single")
+    assert result["response"] == f"I found this information from {MINISTERS_ACT}: {result['exact_match']}"
+    assert result["ai_response"] == result["response"]
+
+    assert query(client, query="minister salary", mode="single")["response"] == "Answer 2"
+    assert len(completions.requests) == 2
+
+def test_full_mode_fallbacks(client, completions):
+    """
+    A failed synthesis falls back to the first answer, and a failed first answer to the matched text.
+    """
+    completions.replies = ["First answer.", RuntimeError("model unavailable")]
+    result = query(client, query="minister salary", mode="full")
+    assert result["ai_response"] == result["enhanced_response"] == "First answer."
+
+    completions.replies = [RuntimeError("model unavailable"), "Final answer."]
+    result = query(client, query="minister salary", mode="full")
+    assert result["ai_response"] == f"I found this information from {MINISTERS_ACT}: {result['exact_match']}"
+    assert result["enhanced_response"] == "Final answer."
+    assert len(completions.requests) == 4
+
+    # Neither answer was cached
+    query(client, query="minister salary", mode="full")
+    assert len(completions.requests) == 6
+
+def test_file_selection(client, completions):
+    """
+    A query matching several files asks for a file without calling the model, and is answered once one is selected.
+    """
+    result = query(client, query="leave", mode="single")
+    assert result["response"].startswith("I found information in multiple documents.")
+    assert {option["id"] for option in result["file_options"]} == {"Gujarat Civil Services Rules",
+                                                                   "The Gujarat Civil Services (Discipl"}
+    assert completions.requests == []
+
+    result = query(client, query="leave", selected_file="Gujarat Civil Services Rules", mode="single")
+    assert result["exact_match"].startswith("Here's information from Gujarat Civil Services Rules:")
+    assert result["response"] == "Answer 1"
+    assert result["file_options"] == []
+
+def test_empty_query(client, completions):
+    """
+    An empty query is answered with a prompt for a query.
+    """
+    result = query(client, query="   ")
+    assert result["response"] == "Please provide a specific query about Gujarat Civil Services."
+    assert completions.requests == []
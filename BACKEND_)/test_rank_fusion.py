@@ -0,0 +1,34 @@
+"""
+Tests for fusing keyword and embedding rankings.
+"""
+import math
+from app.modules.rank_fusion import reciprocal_rank_fusion
+
+def test_fused_scores():
+    """
+    Each ranking adds weight * (k + 1) / (k + rank), so a first place is worth exactly its weight.
+    """
+    scores = reciprocal_rank_fusion([["a", "b"], ["b", "c"]], k=60)
+    assert math.isclose(scores["a"], 1.0)
+    assert math.isclose(scores["b"], 61 / 62 + 1.0)
+    assert math.isclose(scores["c"], 61 / 62)
+    assert max(scores, key=scores.get) == "b"
+
+def test_weights():
+    """
+    Weights scale each ranking's contribution, and a zero weight ignores the ranking.
+    """
+    scores = reciprocal_rank_fusion([["a", "b"], ["b", "a"]], weights=[2.0, 1.0], k=0)
+    assert math.isclose(scores["a"], 2.0 + 0.5)
+    assert math.isclose(scores["b"], 1.0 + 1.0)
+
+    assert reciprocal_rank_fusion([["a"], ["b"]], weights=[1.0, 0.0]) == {"a": 1.0}
+    assert reciprocal_rank_fusion([]) == {}
+
+def test_smoothing_constant():
+    """
+    A larger k flattens the difference between neighbouring ranks.
+    """
+    sharp = reciprocal_rank_fusion([["a", "b"]], k=1)
+    flat = reciprocal_rank_fusion([["a", "b"]], k=100)
+    assert sharp["a"] - sharp["b"] > flat["a"] - flat["b"] > 0
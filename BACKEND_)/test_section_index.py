@@ -0,0 +1,104 @@
+"""
+Tests for looking up section IDs in the section index.
+"""
+import app.main as main
+from app.modules.bm25_index import BM25Index
+from app.modules.paragraph_store import ParagraphStore
+from app.modules.section_index import SectionIndex
+
+def build_index():
+    """
+    Index the sections of two files.
+
+    Returns:
+        SectionIndex: The index
+    """
+    index = SectionIndex()
+    index.add_file("rules", ["1", "3", "3A", "3AB", "3B", "31", "9A", "Preamble"])
+    index.add_file("act", ["3", "4"])
+    return index
+
+def test_find_prefix():
+    """
+    A prefix matches the ID itself and IDs with more letters, but not longer numbers.
+    """
+    index = build_index()
+    assert index.find_prefix("rules", "3") == ["3", "3A", "3AB", "3B"]
+    assert index.find_prefix("rules", "3A") == ["3A", "3AB"]
+    assert index.find_prefix("rules", "9") == ["9A"]
+    assert index.find_prefix("rules", "5") == []
+    assert index.find_prefix("unknown", "3") == []
+    assert index.find_prefix("rules", "Preamble") == []
+
+def test_find_closest():
+    """
+    The nearest section with the same number is the one before the ID, or else the one after it.
+    """
+    index = build_index()
+    assert index.find_closest("rules", "3C") == "3B"
+    assert index.find_closest("rules", "3AA") == "3A"
+    assert index.find_closest("rules", "9") == "9A"
+    assert index.find_closest("rules", "2") is None
+    assert index.find_closest("act", "4A") == "4"
+
+def test_files_and_removal():
+    """
+    Files containing a section are listed in load order, and removing a file drops only its IDs.
+    """
+    index = build_index()
+    assert index.files_with_section("3") == ["rules", "act"]
+    assert index.has_section("act", "4")
+    assert not index.has_section("act", "3A")
+
+    copy = index.copy()
+    index.remove_file("rules")
+    assert index.files_with_section("3") == ["act"]
+    assert index.files_with_section("3A") == []
+    assert index.find_prefix("rules", "3") == []
+
+    # The copy taken before is unaffected
+    assert copy.files_with_section("3") == ["rules", "act"]
+
+    # Adding a file again replaces its previous IDs
+    copy.add_file("act", ["5"])
+    assert copy.files_with_section("3") == ["rules"]
+    assert copy.find_prefix("act", "5") == ["5"]
+
+def test_ids_are_returned_as_added():
+    """
+    Zero-padded IDs sort by their number and are returned as written, not rebuilt from the number.
+    """
+    index = SectionIndex()
+    index.add_file("act", ["02", "03", "03A", "3B", "10"])
+    assert index.find_prefix("act", "3") == ["03", "03A", "3B"]
+    assert index.find_prefix("act", "3A") == ["03A"]
+    assert index.find_closest("act", "3C") == "3B"
+    assert index.find_closest("act", "2A") == "02"
+    assert index.files_with_section("03A") == ["act"]
+    assert index.files_with_section("3A") == []
+
+    index.remove_file("act")
+    assert index.section_files == {}
+
+def test_padded_section_query(monkeypatch):
+    """
+    Asking for a section a file numbers with a leading zero returns it instead of failing the lookup.
+    """
+    documents = {"act": "03. Salaries\nEvery minister shall receive a salary.\n\n03A. Allowances\nAn allowance is payable.\n"}
+    sections_map = main.extract_sections(documents["act"], "act")
+    section_index = SectionIndex()
+    section_index.add_file("act", [section.section_id.upper() for section in sections_map.values()])
+    paragraph_store = ParagraphStore()
+    paragraph_store.add_document("act", documents["act"])
+    monkeypatch.setattr(main, "sections_map", sections_map)
+    monkeypatch.setattr(main, "section_index", section_index)
+    monkeypatch.setattr(main, "paragraph_store", paragraph_store)
+    monkeypatch.setattr(main, "search_index", BM25Index())
+
+    text, file_options = main.find_relevant_text("section 3A", documents)
+    assert file_options == ["act"]
+    assert text.endswith("03A. Allowances\nAn allowance is payable.")
+
+    text, file_options = main.find_relevant_text("section 3A", documents, selected_file="act")
+    assert file_options == ["act"]
+    assert text.endswith("03A. Allowances\nAn allowance is payable.")
@@ -0,0 +1,94 @@
+"""
+Tests for splitting the rulebooks into numbered sections.
+"""
+import os
+from app.modules.section_parser import SectionParser
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "app", "data")
+
+def parse_data_file(file_name):
+    """
+    Parse the sections of a data file.
+
+    Returns:
+        tuple: (text, dict mapping section IDs to Section objects)
+    """
+    with open(os.path.join(DATA_DIR, file_name), "r", encoding="utf-8") as file:
+        text = file.read()
+    file_id = file_name[:-4]
+    sections = SectionParser().parse(text, file_id)
+    return text, {key.split(":", 1)[1]: section for key, section in sections.items()}
+
+def test_civil_services_rules_sections():
+    """
+    Headings behind amendment markers are sections of their own, and indented list items stay in their rule.
+    """
+    text, sections = parse_data_file("Gujarat Civil Services Rules.txt")
+    expected = ["1", "2", "3", "4", "5", "6", "7", "8", "9", "9A", "10", "11", "12", "13", "14", "15", "15A",
+                "16", "16C", "16D", "16E", "17"]
+    assert sorted(sections, key=SectionParser.section_order) == expected
+
+    assert sections["9A"].get_text(text).startswith("↔ 9A. Appointment to service or post in Subordinate Services")
+    assert sections["15A"].title.startswith("Mode of certain Examinations")
+    assert sections["16D"].get_text(text).startswith("XX 16D.")
+    assert "9A." not in sections["9"].get_text(text)
+    # The indented "1." and "2." items of rule 11 are part of it
+    assert "possession of experience in a lower service" in sections["11"].get_text(text)
+    assert sections["17"].title.startswith("Repeal")
+
+def test_discipline_rules_sections():
+    """
+    Numbered list items never replace or cut short the rules they belong to.
+    """
+    text, sections = parse_data_file("The Gujarat Civil Services (Discipl.txt")
+    assert sorted(sections, key=SectionParser.section_order) == [str(number) for number in range(1, 29)]
+
+    assert sections["2"].title.startswith("Definitions")
+    assert sections["3"].title.startswith("Special Provision by Agreement")
+    assert sections["9"].title.startswith("Procedure for Imposing Major Penalties")
+    assert "Dismissal from service" in sections["6"].get_text(text)
+    for section_id, item in [("10", "Further Inquiry"), ("11", "Record of Proceedings"), ("13", "Specifications in the Joint Order"),
+                             ("20", "Submission Process"), ("21", "Enhanced Penalties"), ("27", "Right of Appeal")]:
+        assert item in sections[section_id].get_text(text), section_id
+
+def test_ministers_act_sections():
+    """
+    Sections come from the body of the Act, not from its table of contents or footnotes.
+    """
+    text, sections = parse_data_file("Gujarat_Ministers_Salaries_and_All.txt")
+    assert sections["1"].title == "Short title and commencement."
+    assert sections["6"].get_text(text).startswith("6. (1) There shall be paid to the Deputy Minister")
+    assert sections["9A"].get_text(text).startswith("9A. Subject to any rules")
+    assert sections["3B"].get_text(text).startswith("[3B. Dearness allowance to Ministers]")
+    assert sections["15"].title.startswith("Repeal of Gujarat Ministers' Salaries")
+
+def test_nested_numbering_is_not_a_section():
+    """
+    Indented and out-of-order numbered lines do not start sections, and marked headings win over plain ones.
+    """
+    text = (
+        "### **1. Scope**\n"
+        "Applies to all.\n"
+        "\n"
+        "### **2. Penalties**\n"
+        "The penalties are:\n"
+        "1. Censure.\n"
+        "2. Fine.\n"
+        "3. Removal.\n"
+        "    1. Indented detail.\n"
+        "\n"
+        "### **3. Appeals**\n"
+        "Appeals lie to the Government.\n"
+    )
+    sections = SectionParser().parse(text, "doc")
+    assert set(sections) == {"doc:1", "doc:2", "doc:3"}
+    assert "3. Removal." in sections["doc:2"].get_text(text)
+    assert "Indented detail" in sections["doc:2"].get_text(text)
+    assert sections["doc:3"].title == "Appeals"
+
+def test_section_order():
+    """
+    Section IDs with letter suffixes sort between the numbers around them.
+    """
+    ordered = ["9", "9A", "9AA", "9AB", "9B", "10"]
+    assert sorted(reversed(ordered), key=SectionParser.section_order) == ordered
@@ -0,0 +1,84 @@
+"""
+Tests for coalescing identical concurrent computations.
+"""
+import asyncio
+from app.modules.single_flight import SingleFlight
+
+def test_concurrent_callers_share_one_run():
+    """
+    Callers of the same key share one computation; other keys and later calls run their own.
+    """
+    async def scenario():
+        flights = SingleFlight()
+        runs = []
+        release = asyncio.Event()
+
+        async def compute(value):
+            runs.append(value)
+            await release.wait()
+            return value * 2
+
+        callers = [asyncio.ensure_future(flights.run("a", compute, 1)) for _ in range(5)]
+        other = asyncio.ensure_future(flights.run("b", compute, 2))
+        await asyncio.sleep(0)
+        assert len(flights) == 2
+
+        release.set()
+        assert await asyncio.gather(*callers) == [2] * 5
+        assert await other == 4
+        assert runs == [1, 2]
+        assert flights.stats() == {"in_flight": 0, "executions": 2, "coalesced": 4}
+
+        # A finished computation is not reused
+        assert await flights.run("a", compute, 3) == 6
+        assert runs == [1, 2, 3]
+
+    asyncio.run(scenario())
+
+def test_cancelled_caller_does_not_cancel_the_run():
+    """
+    Cancelling one caller leaves the computation running for the others.
+    """
+    async def scenario():
+        flights = SingleFlight()
+        release = asyncio.Event()
+
+        async def compute():
+            await release.wait()
+            return "answer"
+
+        first = asyncio.ensure_future(flights.run("a", compute))
+        second = asyncio.ensure_future(flights.run("a", compute))
+        await asyncio.sleep(0)
+
+        first.cancel()
+        await asyncio.sleep(0)
+        assert first.cancelled()
+        assert len(flights) == 1
+
+        release.set()
+        assert await second == "answer"
+        assert flights.stats()["executions"] == 1
+
+    asyncio.run(scenario())
+
+def test_errors_reach_every_caller():
+    """
+    An exception is raised to every caller, and the next call starts a new computation.
+    """
+    async def scenario():
+        flights = SingleFlight()
+        calls = []
+
+        async def compute():
+            calls.append(1)
+            await asyncio.sleep(0)
+            if len(calls) == 1:
+                raise ValueError("failed")
+            return "recovered"
+
+        results = await asyncio.gather(flights.run("a", compute), flights.run("a", compute), return_exceptions=True)
+        assert [type(result) for result in results] == [ValueError, ValueError]
+        assert await flights.run("a", compute) == "recovered"
+
+    asyncio.run(scenario())
@@ -0,0 +1,123 @@
+"""
+Tests for streaming answers from /api/query/stream as Server-Sent Events, with a stubbed OpenAI client.
+"""
+import json
+import pytest
+from fastapi.testclient import TestClient
+import app.main as main
+
+MINISTERS_ACT = "Gujarat_Ministers_Salaries_and_All"
+
+@pytest.fixture
+def client(completions):
+    """
+    Client for the application, without running its startup handlers.
+    """
+    return TestClient(main.app)
+
+def stream(client, **body):
+    """
+    Post a streaming query and decode the events it sends.
+
+    Returns:
+        list: (event, data) tuples in the order they were sent
+    """
+    response = client.post("/api/query/stream", json=body)
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/event-stream")
+
+    events = []
+    for message in response.text.split("\n\n"):
+        if message:
+            event_line, data_line = message.split("\n")
+            assert event_line.startswith("event: ") and data_line.startswith("data: ")
+            events.append((event_line[len("event: "):], json.loads(data_line[len("data: "):])))
+    return events
+
+def test_direct_mode(client, completions):
+    """
+    The direct mode sends the matched text and the final answer without model calls.
+    """
+    events = stream(client, query="minister salary", mode="direct")
+    assert [event for event, _ in events] == ["exact_match", "done"]
+    exact_match = events[0][1]["exact_match"]
+    assert exact_match.startswith(f"Here's information from {MINISTERS_ACT}:")
+    assert events[1][1] == {"exact_match": exact_match, "ai_response": exact_match, "enhanced_response": exact_match,
+                            "response": exact_match, "file_options": []}
+    assert completions.requests == []
+
+def test_single_mode(client, completions):
+    """
+    The single mode streams tokens of one call, and a repeated query replays the cached answer.
+    """
+    completions.replies = [["Ministers ", "are paid ", "monthly."]]
+    events = stream(client, query="minister salary", mode="single")
+    assert events[0][0] == "exact_match"
+    assert events[1:-1] == [("enhanced_token", {"content": piece}) for piece in ["Ministers ", "are paid ", "monthly."]]
+    done = events[-1]
+    assert done[0] == "done"
+    assert done[1]["ai_response"] == done[1]["enhanced_response"] == done[1]["response"] == "Ministers are paid monthly."
+    assert "incomplete" not in done[1]
+
+    assert len(completions.requests) == 1
+    assert completions.requests[0]["stream"]
+    assert completions.requests[0]["messages"] == main.build_single_messages(
+        "minister salary", events[0][1]["exact_match"], MINISTERS_ACT)
+
+    replay = stream(client, query="minister salary", mode="single")
+    assert replay == [events[0], ("enhanced_token", {"content": "Ministers are paid monthly."}), done]
+    assert len(completions.requests) == 1
+
+def test_full_mode(client, completions):
+    """
+    The full mode streams the first answer as ai_token events and the final answer as enhanced_token events.
+    """
+    completions.replies = [["First ", "answer."], ["Final ", "answer."]]
+    events = stream(client, query="minister salary", mode="full")
+    assert [event for event, _ in events] == ["exact_match", "ai_token", "ai_token", "enhanced_token", "enhanced_token", "done"]
+    assert events[-1][1]["ai_response"] == "First answer."
+    assert events[-1][1]["response"] == "Final answer."
+    assert completions.requests[1]["messages"] == main.build_enhanced_messages(
+        "minister salary", events[0][1]["exact_match"], "First answer.", MINISTERS_ACT)
+
+def test_fallback_before_content(client, completions):
+    """
+    A completion that fails before any content sends the matched text instead, which is not cached.
+    """
+    completions.replies = [RuntimeError("model unavailable")]
+    events = stream(client, query="minister salary", mode="single")
+    fallback = f"I found this information from {MINISTERS_ACT}: {events[0][1]['exact_match']}"
+    assert events[1:] == [("enhanced_token", {"content": fallback}), ("done", {
+        "exact_match": events[0][1]["exact_match"], "ai_response": fallback, "enhanced_response": fallback,
+        "response": fallback, "file_options": []
+    })]
+
+    assert stream(client, query="minister salary", mode="single")[-1][1]["response"] == "Answer 2"
+
+def test_failure_after_content(client, completions):
+    """
+    A completion that fails part-way ends with an incomplete answer, which is not cached.
+    """
+    completions.replies = [["Ministers ", "are ", RuntimeError("connection reset")]]
+    events = stream(client, query="minister salary", mode="single")
+    assert [event for event, _ in events] == ["exact_match", "enhanced_token", "enhanced_token", "done"]
+    assert events[-1][1]["response"] == "Ministers are"
+    assert events[-1][1]["incomplete"] is True
+
+    events = stream(client, query="minister salary", mode="single")
+    assert events[-1][1]["response"] == "Answer 2"
+    assert "incomplete" not in events[-1][1]
+
+def test_file_selection_and_empty_query(client, completions):
+    """
+    A query matching several files ends with the file options, and an empty query with a prompt for one.
+    """
+    events = stream(client, query="leave", mode="single")
+    assert [event for event, _ in events] == ["exact_match", "done"]
+    assert {option["id"] for option in events[-1][1]["file_options"]} == {"Gujarat Civil Services Rules",
+                                                                         "The Gujarat Civil Services (Discipl"}
+
+    events = stream(client, query=" ")
+    assert [event for event, _ in events] == ["done"]
+    assert events[0][1]["response"] == "Please provide a specific query about Gujarat Civil Services."
+    assert completions.requests == []
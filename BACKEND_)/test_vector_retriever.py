@@ -0,0 +1,227 @@
+"""
+Tests for retrieving chunks with the vector retriever.
+"""
+import faiss
+import numpy as np
+from app.modules import vector_retriever
+from app.modules.vector_retriever import PQ_TRAINING_POINTS, VectorRetriever, build_faiss_index, dedup_signature, unwrap_index
+
+PAY = "Pay is fixed monthly."
+PAY_COPY = "pay IS fixed   monthly."  # Same words as PAY, so the same dedup signature
+ALLOWANCE = "Allowances are paid yearly."
+LEAVE = "Leave is granted by the head of office."
+
+class FakeModel:
+    """
+    Stand-in for the sentence transformer that maps known texts to fixed embeddings.
+    """
+
+    EMBEDDINGS = {
+        PAY: [1.0, 0.0, 0.0, 0.0],
+        PAY_COPY: [0.95, 0.31, 0.0, 0.0],
+        ALLOWANCE: [0.8, 0.6, 0.0, 0.0],
+        LEAVE: [0.0, 0.0, 1.0, 0.0],
+        "pay": [1.0, 0.0, 0.0, 0.0],
+        "copied pay": [0.95, 0.31, 0.0, 0.0],
+        "leave": [0.0, 0.0, 1.0, 0.0],
+        "unrelated": [0.0, 0.0, 0.0, 1.0]
+    }
+
+    def __init__(self, name=None):
+        self.name = name
+        self.encoded = []  # Texts of each encode call
+
+    def encode(self, texts):
+        self.encoded.append(list(texts))
+        return np.array([self.EMBEDDINGS.get(text, [0.0, 0.0, 0.0, 1.0]) for text in texts], dtype='float32')
+
+def build_retriever(index_type="flat"):
+    """
+    Build an index over the four chunks, from two files.
+
+    Returns:
+        VectorRetriever: The retriever
+    """
+    retriever = VectorRetriever(model=FakeModel(), index_type=index_type)
+    retriever.add_chunks([PAY, PAY_COPY, ALLOWANCE, LEAVE],
+                         [{"file_id": "rules"}, {"file_id": "act"}, {"file_id": "act"}, {"file_id": "rules"}])
+    return retriever
+
+def test_retrieve_skips_duplicates():
+    """
+    Of chunks with the same words only the most similar is returned, and the rest keep their order.
+    """
+    retriever = build_retriever()
+    assert retriever.retrieve("pay", top_k=2) == [PAY, ALLOWANCE]
+    assert retriever.retrieve("copied pay", top_k=2) == [PAY_COPY, ALLOWANCE]
+    assert retriever.retrieve("pay", top_k=1) == [PAY]
+
+def test_retrieve_many_matches_retrieve():
+    """
+    A batch returns, in query order, what each query would retrieve on its own.
+    """
+    retriever = build_retriever()
+    queries = ["leave", "pay", "unrelated", "copied pay", "pay"]
+    results = retriever.retrieve_many(queries, top_k=3)
+    assert results == [retriever.retrieve(query, top_k=3) for query in queries]
+    assert results[0] == [LEAVE]
+    assert results[1] == [PAY, ALLOWANCE]
+    assert results[2] == []  # Nothing is similar enough
+    assert retriever.retrieve_many([]) == []
+
+def test_retrieve_by_file():
+    """
+    Filtering by file happens before deduplication, so a duplicate from another file is not lost.
+    """
+    retriever = build_retriever()
+    assert retriever.retrieve("pay", top_k=3, file_ids={"act"}) == [PAY_COPY, ALLOWANCE]
+    assert retriever.retrieve("pay", top_k=3, file_ids={"rules"}) == [PAY]
+    assert retriever.retrieve("pay", top_k=3, file_ids={"unknown"}) == []
+
+def test_query_embeddings_are_cached():
+    """
+    Queries are encoded once per normalized text, and the cache can be shared and is bounded.
+    """
+    retriever = build_retriever()
+    model = retriever.model
+    model.encoded = []
+    assert retriever.retrieve("Pay") == retriever.retrieve("  pay ") == [PAY, ALLOWANCE]
+    retriever.retrieve_many(["pay", "leave", "LEAVE"])
+    assert model.encoded == [["pay"], ["leave"]]
+
+    shared = VectorRetriever(model=model, query_cache=retriever.query_cache)
+    assert shared.encode_queries(["PAY"]).tolist() == [[1.0, 0.0, 0.0, 0.0]]
+    assert model.encoded == [["pay"], ["leave"]]
+
+    small = VectorRetriever(model=FakeModel(), query_cache_size=1)
+    for query in ["pay", "leave", "pay"]:
+        small.encode_queries([query])
+    assert small.model.encoded == [["pay"], ["leave"], ["pay"]]
+
+def test_lazy_model_and_warmup(monkeypatch):
+    """
+    The model is loaded on first use, and warmup loads it and encodes a query ahead of time.
+    """
+    loaded = []
+
+    def load_model(name):
+        loaded.append(name)
+        return FakeModel(name)
+
+    monkeypatch.setattr(vector_retriever, "SentenceTransformer", load_model)
+    monkeypatch.setattr(vector_retriever, "SENTENCE_TRANSFORMERS_AVAILABLE", True)
+    retriever = VectorRetriever(model_name="test-model")
+    assert loaded == []
+
+    seconds = retriever.warmup()
+    assert seconds is not None and seconds >= 0
+    assert loaded == ["test-model"]
+    assert retriever.model.encoded == [["warmup query"]]
+    retriever.warmup()
+    assert loaded == ["test-model"]
+
+    assert VectorRetriever(model_name=None).warmup() is None
+
+def test_signatures_are_precomputed(tmp_path, monkeypatch):
+    """
+    Dedup signatures are computed when chunks are added, kept through save and load, and not recomputed by retrieve.
+    """
+    retriever = build_retriever()
+    assert retriever.signatures.tolist() == [dedup_signature(chunk) for chunk in [PAY, PAY_COPY, ALLOWANCE, LEAVE]]
+    assert retriever.signatures[0] == retriever.signatures[1]
+
+    retriever.insert_chunks(["Leave is granted yearly."], [{"file_id": "act"}])
+    assert len(retriever.signatures) == 5
+    retriever.save_index(str(tmp_path))
+    loaded = VectorRetriever(model=FakeModel())
+    assert loaded.load_index(str(tmp_path))
+    assert loaded.signatures.tolist() == retriever.signatures.tolist()
+
+    def fail(chunk):
+        raise AssertionError("signature recomputed")
+
+    monkeypatch.setattr(vector_retriever, "dedup_signature", fail)
+    assert loaded.retrieve("pay", top_k=2) == [PAY, ALLOWANCE]
+
+def test_quantized_indexes():
+    """
+    sq8 and pq indexes store vectors in a fraction of the flat size and still find each vector's nearest neighbour.
+    """
+    embeddings = np.random.default_rng(0).standard_normal((PQ_TRAINING_POINTS, 32)).astype('float32')
+    faiss.normalize_L2(embeddings)
+    flat_bytes = faiss.serialize_index(build_faiss_index(embeddings, "flat")).nbytes
+    for index_type, index_class, max_fraction in [("sq8", faiss.IndexScalarQuantizer, 1 / 3), ("pq", faiss.IndexIVFPQ, 1 / 8)]:
+        index = build_faiss_index(embeddings, index_type)
+        assert isinstance(unwrap_index(index), index_class)
+        assert faiss.serialize_index(index).nbytes < flat_bytes * max_fraction
+        _, indices = index.search(embeddings[:100], 1)
+        assert (indices[:, 0] == np.arange(100)).mean() >= 0.9
+
+    # Too few vectors to train product quantization
+    assert isinstance(unwrap_index(build_faiss_index(embeddings[:100], "pq")), faiss.IndexScalarQuantizer)
+
+def test_quantized_retriever_round_trip(tmp_path):
+    """
+    A retriever with sq8 storage retrieves like a flat one, reports its storage and keeps it through save and load.
+    """
+    retriever = build_retriever("sq8")
+    assert retriever.retrieve("pay", top_k=2) == [PAY, ALLOWANCE]
+    report = retriever.memory_report()
+    assert (report["index_type"], report["index_class"], report["vectors"]) == ("sq8", "IndexScalarQuantizer", 4)
+
+    retriever.save_index(str(tmp_path))
+    loaded = VectorRetriever(model=FakeModel())
+    assert loaded.load_index(str(tmp_path))
+    assert loaded.memory_report()["index_class"] == "IndexScalarQuantizer"
+    assert loaded.index_type == "sq8"
+    assert loaded.retrieve("pay", top_k=2) == [PAY, ALLOWANCE]
+
+def test_memory_mapped_load(tmp_path):
+    """
+    A memory-mapped index searches like one read into memory, and is copied into memory before it is changed.
+    """
+    for index_type in ["flat", "sq8"]:
+        directory = str(tmp_path / index_type)
+        build_retriever(index_type).save_index(directory)
+        with open(f"{directory}/index.faiss", "rb") as file:
+            saved = file.read()
+
+        mapped = VectorRetriever(model=FakeModel())
+        assert mapped.load_index(directory, mmap=vector_retriever.INDEX_MMAP_FLAG is not None)
+        assert mapped.mapped == (vector_retriever.INDEX_MMAP_FLAG is not None)
+        assert mapped.memory_report()["mapped"] == mapped.mapped
+        assert mapped.retrieve("pay", top_k=2) == [PAY, ALLOWANCE]
+
+        copy = mapped.copy()
+        copy.remove_file("act")
+        assert copy.retrieve("pay", top_k=2) == [PAY]
+        assert mapped.retrieve("pay", top_k=2) == [PAY, ALLOWANCE]
+
+        mapped.insert_chunks(["Pension is paid monthly."], [{"file_id": "rules"}])
+        assert not mapped.mapped
+        assert mapped.index.ntotal == 5
+        with open(f"{directory}/index.faiss", "rb") as file:
+            assert file.read() == saved
+
+def test_retrieve_by_section():
+    """
+    Section filters select chunks by (file, section), combine with file filters, and reuse their ID selectors.
+    """
+    retriever = VectorRetriever(model=FakeModel())
+    retriever.add_chunks([PAY, PAY_COPY, ALLOWANCE, LEAVE], [
+        {"file_id": "rules", "section_id": "2"},
+        {"file_id": "act", "section_id": "2"},
+        {"file_id": "act", "section_id": "3"},
+        {"file_id": "rules", "section_id": "5"}
+    ])
+    assert retriever.retrieve("pay", top_k=3, section_ids=[("act", "3")]) == [ALLOWANCE]
+    assert retriever.retrieve("pay", top_k=3, section_ids=[("rules", "2"), ("act", "3")]) == [PAY, ALLOWANCE]
+    assert retriever.retrieve("pay", top_k=3, file_ids={"rules"}, section_ids=[("act", "3")]) == []
+
+    # The most similar chunks of a filter are returned, however many chunks of other files are more similar
+    assert retriever.search("pay", top_k=1, file_ids={"act"})[0][1] == 1
+
+    selector, count = retriever.id_selector(file_ids={"act"})
+    assert count == 2
+    assert retriever.id_selector(file_ids=["act"])[0] is selector
+    assert retriever.id_selector(file_ids={"act", "rules"}) == (None, 4)